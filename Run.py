@@ -1,10 +1,23 @@
 import pygame
 from engine.Engine import GameEngine
 from map.Levels import MainMenu, GameLevel
+from misc.Constants import json_settings
+from misc.path.astar import grid_dimensions
+from misc.path.service import WorkerPool
 
-gameengine = GameEngine()
-gameengine.change_level(MainMenu())
-#gameengine.change_level(GameLevel())
-gameengine.mainloop()
+# path finding worker processes import this module again on platforms that spawn them
+if __name__ == "__main__":
+	# the path finding workers are forked before pygame.init() sets up SDL, and kept for every
+	# game started from the menu. their shared grid is the size of the map's
+	settings = json_settings["pathfinding"]
+	columns, rows = grid_dimensions(pygame.image.load(json_settings["map_img"]).get_size(), settings["spacing"])
+	WorkerPool().start(settings["processes"], columns * rows)
+	try:
+		gameengine = GameEngine()
+		gameengine.change_level(MainMenu())
+		#gameengine.change_level(GameLevel())
+		gameengine.mainloop()
+	finally:
+		WorkerPool().stop()
 
-pygame.quit()
\ No newline at end of file
+	pygame.quit()
\ No newline at end of file
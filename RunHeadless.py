@@ -0,0 +1,62 @@
+import argparse
+import gc
+from engine.Headless import HeadlessRunner
+from event.EventHandler import EventDispatcher
+from misc.Assets import Assets
+from misc.Fonts import Fonts
+
+# runs the game without a window as fast as possible, e.g.
+#   python RunHeadless.py --seconds 120 --runs 20 --velocity 150 200 300
+parser = argparse.ArgumentParser(description="Run the robot simulation headless")
+parser.add_argument("--seconds", type=float, help="simulated seconds per run")
+parser.add_argument("--treasures", type=int, help="stop a run once this many treasures are collected")
+parser.add_argument("--runs", type=int, default=1, help="runs per velocity")
+parser.add_argument("--velocity", type=float, nargs="*", default=[None], help="robot velocities to compare")
+parser.add_argument("--rate", type=float, help="simulation steps per second")
+parser.add_argument("--seed", type=int, default=0, help="seed of the first run")
+parser.add_argument("--handlers", action="store_true", help="report the event handlers still alive after the runs")
+parser.add_argument("--profile-events", metavar="FILE", help="time the event handlers and write the timings to FILE")
+args = parser.parse_args()
+if args.seconds is None and args.treasures is None:
+	parser.error("give --seconds and/or --treasures")
+
+runner = HeadlessRunner(args.rate)
+if args.profile_events:
+	EventDispatcher().profile(True)
+for velocity in args.velocity:
+	scores = []
+	speed = 0.0
+	for run in range(args.runs):
+		result = runner.run(args.seconds, args.treasures, velocity, args.seed + run)
+		scores.append(sum(result["scores"]))
+		speed += result["steps_per_second"]
+		print "velocity %s run %d: %d steps (%.1fs simulated) in %.2fs, %.0f steps/sec, %d treasures, scores %s" % (
+			velocity, run, result["steps"], result["simulated"], result["wall"], result["steps_per_second"],
+			result["collected"], result["scores"])
+		print "velocity %s run %d: path cache %d hits, %d misses, %.0f%% hit rate" % (
+			velocity, run, result["path_cache"]["hits"], result["path_cache"]["misses"], result["path_cache"]["hit_rate"] * 100)
+	print "velocity %s: mean score %.1f, min %d, max %d, %.0f steps/sec" % (
+		velocity, sum(scores) / float(len(scores)), min(scores), max(scores), speed / args.runs)
+
+# every run after the first should find its images already loaded
+assets = Assets().stats()
+print "assets: %d images, %d atlases, %d loads, %d hits, %d conversions, %.0f KB" % (
+	assets["images"], assets["atlases"], assets["loads"], assets["hits"], assets["conversions"], assets["bytes"] / 1024.0)
+for rotations in assets["rotations"]:
+	print "rotations every %.1f degrees: %d of %d frames, %.0f of at most %.0f KB, %.0f%% hit rate" % (
+		rotations["step"], rotations["frames"], rotations["max_frames"], rotations["bytes"] / 1024.0,
+		rotations["max_bytes"] / 1024.0, rotations["hit_rate"] * 100)
+fonts = Fonts().stats()
+print "fonts: %d loaded, %d reused, text cache %d hits, %d misses, %.0f%% hit rate" % (
+	fonts["fonts"], fonts["font_hits"], fonts["hits"], fonts["misses"], fonts["hit_rate"] * 100)
+
+if args.profile_events:
+	EventDispatcher().profiler.dump(args.profile_events)
+	for row in EventDispatcher().profiler.report()["handlers"][:5]:
+		print "%-20s %-20s %6d calls %8.2f ms total %6.3f ms max" % (row["event"], row["handler"], row["calls"], row["total"] * 1000, row["max"] * 1000)
+
+if args.handlers:
+	# the levels hold references to themselves, collect them first so only real leaks are left
+	gc.collect()
+	for scope in EventDispatcher().stats():
+		print "handlers %-8s %3d live%s" % (scope["scope"], scope["live"], " (closed)" if scope["closed"] else "")
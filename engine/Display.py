@@ -0,0 +1,76 @@
+import pygame
+
+class DirtyRects(object):
+
+	_instance = None
+
+	def __new__(cls, *args, **kwargs):
+		# singleton design... everything that draws during a frame reports to the same collector
+		if not cls._instance:
+			cls._instance = super(DirtyRects, cls).__new__(cls, *args, **kwargs)
+			cls._instance.rects = []
+			cls._instance.full = True
+			# whether anything changed this frame, and whether only ambient animations did
+			cls._instance.active = True
+			cls._instance.ambient = False
+		return cls._instance
+
+	def add(self, rect, ambient=False):
+		# report a region of the screen that has been drawn to this frame. ambient regions are
+		# animations that run on their own (pulsing titles, clocks) rather than real changes
+		self.rects.append(pygame.Rect(rect))
+		if ambient:
+			self.ambient = True
+		else:
+			self.active = True
+
+	def invalidate(self):
+		# the whole screen has to be presented on the next frame, e.g. after a level change
+		self.full = True
+		self.active = True
+
+	def discard(self):
+		# forget this frame's regions, for frames presented some other way
+		self.rects = []
+		self.active = False
+		self.ambient = False
+
+	def touches(self, rect):
+		# whether presenting this frame draws over any of rect
+		return self.full or rect.collidelist(self.rects) != -1
+
+	def merged(self):
+		# union any overlapping rects until none of them overlap
+		rects = [rect for rect in self.rects if rect.width > 0 and rect.height > 0]
+		merged = True
+		while merged:
+			merged = False
+			result = []
+			for rect in rects:
+				for i in range(len(result)):
+					if result[i].colliderect(rect):
+						result[i] = result[i].union(rect)
+						merged = True
+						break
+				else:
+					result.append(rect)
+			rects = result
+		return rects
+
+	def present(self, display, source):
+		# copy the changed regions of source onto the display and update only those regions,
+		# unless the whole screen has been invalidated
+		if self.full:
+			display.blit(source, (0, 0))
+			pygame.display.flip()
+		else:
+			bounds = display.get_rect()
+			rects = [rect.clip(bounds) for rect in self.merged()]
+			for rect in rects:
+				display.blit(source, rect, rect)
+			if rects:
+				pygame.display.update(rects)
+		self.rects = []
+		self.full = False
+		self.active = False
+		self.ambient = False
@@ -4,8 +4,15 @@ from event.EventHandler import *
 from event.Events import *
 from misc.Constants import *
 from map.Levels import GameLevel, MainMenu, PauseMenu
+from engine.Display import DirtyRects
+from engine.Governor import FrameGovernor
+from engine.Profiler import EventProfileTable
+from misc.Allocations import Allocations
+from misc.Assets import Assets
+from misc.Fonts import Fonts
 import datetime
 import time
+import json
 
 class GameEngine(IEventHandler, object):
 
@@ -16,67 +23,186 @@ class GameEngine(IEventHandler, object):
 		self.display = None
 		self.level = None
 		self.changinglevels = False
-		self.fps = 60
+		self.fps = json_settings["rendering"]["fps"]
+		# the simulation runs in fixed steps of step_time, as many per frame as the time passed
+		# allows up to max_steps. accumulator holds the time not yet simulated
+		simulation = json_settings["simulation"]
+		self.step_time = 1.0 / simulation["rate"]
+		self.max_steps = simulation["max_steps"]
+		self.accumulator = 0.0
+		# the part of the accumulator built up while waiting for input, which can be more than
+		# max_steps simulate in a frame. it is caught up over the next frames instead of dropped
+		self.owed = 0.0
+		# drops the frame rate while only ambient animations are running, and waits for input
+		# for up to idle_timeout while nothing is changing
+		rendering = json_settings["rendering"]
+		self.governor = FrameGovernor(self.fps, rendering["ambient_fps"], rendering["idle_delay"], rendering["idle_timeout"])
 		self.clock = pygame.time.Clock()
+		# counts the surfaces created each frame, for measuring
+		if rendering["count_allocations"]:
+			Allocations().start()
 		self.ticktime = self.clock.tick(self.fps)
 		self.update_timer = 0
 		self.time_running = 0
 		self.paused = False
+		# frames left of the pause menu fading in, and the screen it fades in over
+		self.pause_fade = 0
+		self.pause_screen = None
+		# F3 times every event handler and shows the slowest in a table over the level
+		self.profile_table = None
+		if json_settings["debug"]["profile_events"]:
+			self.toggle_profiling()
 
 	def init(self):
 		pass
 
 	def mainloop(self):
 		while 1:
-			self.ticktime = self.clock.tick(self.fps)
+			idle = self.governor.state == FrameGovernor.IDLE and not self.paused
+			events, self.ticktime = self.governor.wait(self.clock)
 			ticktimeseconds = self.ticktime / 1000.0
 			self.update_timer += ticktimeseconds
 			self.time_running += ticktimeseconds
-			events = pygame.event.get()
 
 			for event in events:
 				if event.type == pygame.QUIT:
+					if Allocations().running:
+						Allocations().stop()
+						Allocations().dump(json_settings["rendering"]["allocations_file"])
+						print "surface allocations written to", json_settings["rendering"]["allocations_file"]
+					if EventDispatcher().profiling:
+						EventDispatcher().profiler.dump(json_settings["debug"]["profile_file"])
+						print "event handler timings written to", json_settings["debug"]["profile_file"]
+					if json_settings["debug"]["report_stats"]:
+						self.dump_stats(json_settings["debug"]["stats_file"])
+						print "engine statistics written to", json_settings["debug"]["stats_file"]
 					pygame.quit()
 					sys.exit()
+				if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+					self.toggle_profiling()
+
+			if self.update_timer > 0.25:
+				self.update_timer = 0
+				EventDispatcher().post_event(LabelChange("fps", str(math.ceil(self.clock.get_fps()))))
+				EventDispatcher().post_event(LabelChange("time", time.strftime("%H:%M:%S", time.gmtime(self.time_running))))
+				EventDispatcher().post_event(LabelChange("current_time", time.strftime("%H:%M:%S", time.gmtime())))
+
+			if not self.paused:
+				self.accumulator += ticktimeseconds
+				# a wait for input, and the frames until it has been caught up, are owed. no more
+				# than the longest wait is, so a simulation that can't keep up still drops time
+				if idle or self.owed:
+					self.owed = min(self.owed + ticktimeseconds, self.governor.idle_timeout)
+				steps = 0
+				while self.accumulator >= self.step_time and steps < self.max_steps:
+					self.level.step(self.step_time)
+					self.accumulator -= self.step_time
+					steps += 1
+				self.owed = max(0.0, self.owed - steps * self.step_time)
+				# when the simulation can't keep up, the time it is behind by is dropped so it
+				# runs slower rather than taking bigger steps. owed time is kept to catch up
+				if self.accumulator < self.step_time:
+					self.owed = 0.0
+				elif self.accumulator - self.owed >= self.step_time:
+					self.accumulator = self.owed + (self.accumulator - self.owed) % self.step_time
+				self.level.alpha = self.accumulator / self.step_time
+
+			# the events posted since the last frame, by the steps just taken or the gui while it
+			# was last drawn, are sent once before anything is drawn
+			EventDispatcher().dispatch_events()
 
 			if self.paused:
-				if not self.pause_menu.init:
-					self.pause_menu.set_alpha(20)
-					self.pause_menu.init = True
-				self.display.blit(self.pause_menu, (0, 0))
-				self.pause_menu.update(ticktimeseconds, events)
-				
+				# once it has faded in the pause menu is only drawn when there is input for it, so
+				# the title stops pulsing and the engine can go idle
+				if self.pause_fade or events:
+					self.pause_menu.update(ticktimeseconds, events)
 			else:
 				self.level.update(ticktimeseconds, events)
-				self.display.blit(self.level, self.level.get_rect())
 
-			if self.update_timer > 0.25:
-				self.update_timer = 0
-				EventDispatcher().send_event(LabelChange("fps", str(math.ceil(self.clock.get_fps()))))
-				EventDispatcher().send_event(LabelChange("time", time.strftime("%H:%M:%S", time.gmtime(self.time_running))))
-				EventDispatcher().send_event(LabelChange("current_time", time.strftime("%H:%M:%S", time.gmtime())))
+			# anything presented under the profiling table has to have the table drawn over it again
+			covered = self.profile_table is not None and DirtyRects().touches(self.profile_table.rect)
+			if self.paused and self.pause_fade:
+				# the pause menu is faded in over the screen as it was when the game was paused,
+				# and drawn opaque on the last frame of the fade
+				self.pause_fade -= 1
+				if not self.pause_fade:
+					self.pause_menu.set_alpha(None)
+				self.pause_screen.blit(self.pause_menu, (0, 0))
+				DirtyRects().invalidate()
+				self.governor.frame(ticktimeseconds, events, True, False)
+				DirtyRects().present(self.display, self.pause_screen)
+				if not self.pause_fade:
+					self.pause_screen = None
+			elif self.paused:
+				self.governor.frame(ticktimeseconds, events, DirtyRects().active, DirtyRects().ambient)
+				DirtyRects().present(self.display, self.pause_menu)
+			else:
+				# the next frames come at the full rate until any time owed has been caught up
+				self.governor.frame(ticktimeseconds, events, DirtyRects().active or self.owed > 0, DirtyRects().ambient)
+				# only the regions of the level that were drawn to this frame are presented
+				DirtyRects().present(self.display, self.level)
+			if self.profile_table is not None:
+				self.profile_table.draw(self.display, ticktimeseconds, covered)
+			Allocations().frame()
 
-			pygame.display.flip()
+	def toggle_profiling(self):
+		if EventDispatcher().profiling:
+			EventDispatcher().profile(False)
+			self.profile_table = None
+			# the table was drawn over the level
+			DirtyRects().invalidate()
+		else:
+			EventDispatcher().profile(True)
+			self.profile_table = EventProfileTable(EventDispatcher().profiler)
+
+	def dump_stats(self, path):
+		# how long the engine spent in each frame rate state and the cpu it used there, and how
+		# well the level's caches did
+		stats = {"governor": self.governor.stats()}
+		if isinstance(self.level, GameLevel):
+			stats["path_cache"] = self.level.game.astar.cache_stats()
+		stats["assets"] = Assets().stats()
+		stats["fonts"] = Fonts().stats()
+		with open(path, "w") as output:
+			json.dump(stats, output, indent=2)
 
 	def change_level(self, level):
+		if self.level is not None:
+			self.level.close()
 		self.display = pygame.display.set_mode((level.get_rect().width, level.get_rect().height))
+		# anything the first level loaded before there was a display can be converted now
+		Assets().convert_all()
 		self.pause_menu = PauseMenu(self.display)
 		#self.pause_menu.rect.x = (self.level.rect.width - self.pause_menu.rect.width) / 2
 		#self.pause_menu.rect.y = (self.level.rect.height - self.pause_menu.rect.height) / 2
 		self.level = level
+		self.accumulator = 0.0
+		self.owed = 0.0
+		DirtyRects().invalidate()
+
+	def subscriptions(self):
+		return [(ButtonClickEvent, "exit"), (ButtonClickEvent, "pause"), (ButtonClickEvent, "resume"),
+				(LevelChangeEvent, None)]
 
 	def event_handler(self, event):
 		if event.istype(ButtonClickEvent) and event.name is "exit":
 			pygame.event.post(pygame.event.Event(pygame.QUIT))
 		if event.istype(ButtonClickEvent) and event.name is "pause":
 			self.paused = True
+			# the screen as it was, for the pause menu to fade in over
+			self.pause_screen = self.display.copy()
+			self.pause_fade = json_settings["rendering"]["pause_fade_frames"]
+			self.pause_menu.set_alpha(20)
 		if event.istype(ButtonClickEvent) and event.name is "resume":
 			self.paused = False
-			self.pause_menu.init = False
+			self.pause_screen = None
+			# the pause menu covered the whole level
+			DirtyRects().invalidate()
+		# every handler the old level registered goes with its scope
 		if event.istype(LevelChangeEvent) and event.level is LEVEL_MAIN_MENU:
-			EventDispatcher().deregister_events()
+			EventDispatcher().open_scope("menu")
 			self.change_level(MainMenu())
 		if event.istype(LevelChangeEvent) and event.level is LEVEL_GAME:
-			EventDispatcher().deregister_events()
+			EventDispatcher().open_scope("game")
 			self.change_level(GameLevel())
 
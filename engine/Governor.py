@@ -0,0 +1,97 @@
+import os
+import pygame
+import time
+
+class FrameGovernor(object):
+
+	# decides how long the engine waits before each frame. frames where something changed run
+	# at the full frame rate, frames where only ambient animations (pulsing titles, ticking
+	# clocks) changed run at a lower rate, and once nothing has changed for idle_delay seconds
+	# the engine blocks on the event queue until there is input or idle_timeout passes
+
+	ACTIVE = "active"
+	AMBIENT = "ambient"
+	IDLE = "idle"
+
+	def __init__(self, fps=60, ambient_fps=30, idle_delay=0.5, idle_timeout=0.25):
+		self.fps = fps
+		self.ambient_fps = ambient_fps
+		self.idle_delay = idle_delay
+		self.idle_timeout = idle_timeout
+		self.state = FrameGovernor.ACTIVE
+		# seconds since the last frame that changed something other than an ambient animation
+		self.quiet = 0.0
+
+		# wakeups and cpu time, totals and for the current reporting window
+		self.frames = {FrameGovernor.ACTIVE: 0, FrameGovernor.AMBIENT: 0, FrameGovernor.IDLE: 0}
+		self.wakeups = 0
+		self.window_start = (time.time(), self.cpu_time())
+		self.window_wakeups = 0
+		self.wakeups_per_second = 0.0
+		self.cpu = 0.0
+		# wall and cpu seconds spent in each state, from the end of one frame to the end of the
+		# next, and the wakeups in it
+		self.states = dict((state, {"seconds": 0.0, "cpu": 0.0, "wakeups": 0}) for state in self.frames)
+		self.last = self.window_start
+
+	def wait(self, clock):
+		# wait for the next frame according to the current state, returns the events that arrived
+		# and the milliseconds since the last frame
+		events = []
+		if self.state == FrameGovernor.IDLE:
+			# waiting with a timeout needs pygame 2
+			event = pygame.event.wait(int(self.idle_timeout * 1000))
+			if event.type != pygame.NOEVENT:
+				events.append(event)
+			ticktime = clock.tick()
+		elif self.state == FrameGovernor.AMBIENT:
+			ticktime = clock.tick(self.ambient_fps)
+		else:
+			ticktime = clock.tick(self.fps)
+		self.wakeups += 1
+		self.window_wakeups += 1
+		return events + pygame.event.get(), ticktime
+
+	def frame(self, elapsed, events, active, ambient):
+		# the frame just run is counted against the state it was waited for in
+		now, cpu = time.time(), self.cpu_time()
+		spent = self.states[self.state]
+		spent["seconds"] += now - self.last[0]
+		spent["cpu"] += cpu - self.last[1]
+		spent["wakeups"] += 1
+		self.last = (now, cpu)
+
+		# the state for the next frame from what happened in this one
+		if events or active:
+			self.quiet = 0.0
+			self.state = FrameGovernor.ACTIVE
+		else:
+			self.quiet += elapsed
+			if ambient:
+				self.state = FrameGovernor.AMBIENT
+			elif self.quiet >= self.idle_delay:
+				self.state = FrameGovernor.IDLE
+		self.frames[self.state] += 1
+
+		# wakeups per second and the share of a core used, over windows of a second
+		if now - self.window_start[0] >= 1.0:
+			self.wakeups_per_second = self.window_wakeups / (now - self.window_start[0])
+			self.cpu = (cpu - self.window_start[1]) / (now - self.window_start[0])
+			self.window_start = (now, cpu)
+			self.window_wakeups = 0
+
+	def cpu_time(self):
+		# user and system time of the process, time.clock() is wall time on windows
+		user, system = os.times()[:2]
+		return user + system
+
+	def stats(self):
+		# the share of a core used and the wakeups per second while in each state
+		states = {}
+		for state, spent in self.states.items():
+			seconds = spent["seconds"]
+			states[state] = {"seconds": seconds, "cpu_seconds": spent["cpu"],
+				"cpu": spent["cpu"] / seconds if seconds else 0.0,
+				"wakeups_per_second": spent["wakeups"] / seconds if seconds else 0.0}
+		return {"state": self.state, "frames": dict(self.frames), "wakeups": self.wakeups,
+				"wakeups_per_second": self.wakeups_per_second, "cpu": self.cpu, "states": states}
@@ -0,0 +1,67 @@
+import os
+# there is never a window, so make sure SDL doesn't try to open one
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+import random
+import time
+from event.EventHandler import IEventHandler, EventDispatcher
+from event.Events import *
+from misc.Constants import *
+from engine.Display import DirtyRects
+from map.Levels import GameLevel
+
+class HeadlessRunner(IEventHandler, object):
+
+	# runs the game level's simulation without a display, as fast as it will go, stepping it
+	# the same way the engine does but never drawing it
+
+	def __init__(self, rate=None):
+		IEventHandler.__init__(self, solid=True)
+		pygame.init()
+		self.step_time = 1.0 / (rate or json_settings["simulation"]["rate"])
+		self.collected = 0
+
+	def run(self, seconds=None, treasures=None, velocity=None, seed=None):
+		# simulate until seconds of game time have passed or treasures have been collected,
+		# whichever comes first, and return the results of the run. the same seed gives the
+		# same run
+		if seconds is None and treasures is None:
+			raise ValueError("a run needs a number of seconds or treasures to stop at")
+		if seed is not None:
+			random.seed(seed)
+		EventDispatcher().open_scope("headless")
+		# paths are searched inline, a pool of workers per run would cost more than it saves
+		level = GameLevel(processes=0)
+		# draw the level once, as the engine would, so the gui reports its initial values
+		level.update(0, [])
+		EventDispatcher().dispatch_events()
+		DirtyRects().rects = []
+		if velocity is not None:
+			EventDispatcher().send_event(SliderEvent("velocityai", velocity))
+
+		self.collected = 0
+		steps = 0
+		start = time.time()
+		try:
+			while (seconds is None or steps * self.step_time < seconds) and (treasures is None or self.collected < treasures):
+				level.step(self.step_time)
+				# the labels posted by the step, there is no frame to drain them at
+				EventDispatcher().dispatch_events()
+				steps += 1
+		finally:
+			wall = time.time() - start
+			level.close()
+			EventDispatcher().deregister_events()
+
+		return {"steps": steps, "simulated": steps * self.step_time, "wall": wall,
+				"steps_per_second": steps / wall if wall else 0.0, "collected": self.collected,
+				"scores": [robot.score for robot in level.game.robots], "path_cache": level.game.astar.cache_stats()}
+
+	def subscriptions(self):
+		return [(TreasureCollectEvent, None)]
+
+	def event_handler(self, event):
+		if event.istype(TreasureCollectEvent):
+			self.collected += 1
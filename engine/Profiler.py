@@ -0,0 +1,46 @@
+import pygame
+from misc.Constants import *
+from misc.Fonts import Fonts
+
+class EventProfileTable(object):
+
+	# the event handlers that have taken the most time while the dispatcher is being profiled,
+	# drawn over the top left of the screen. the table is only rendered again every so often
+
+	columns = [("event", 0), ("handler", 145), ("calls", 270), ("total ms", 320), ("max ms", 385), ("fan-out", 440)]
+
+	def __init__(self, profiler, rows=10, refresh=0.5):
+		self.profiler = profiler
+		self.rows = rows
+		self.refresh = refresh
+		self.timer = refresh
+		self.font = Fonts().font(FONT_REGULAR, 11)
+		self.line = 14
+		# opaque, so drawing it again never blends it over its last copy
+		self.surface = pygame.Surface((490, (rows + 1) * self.line + 8))
+		self.rect = self.surface.get_rect()
+
+	def render(self):
+		self.surface.fill((32, 32, 32))
+		report = self.profiler.report()
+		fanout = dict((row["event"], row["fanout"]) for row in report["events"])
+		lines = [[name for name, x in EventProfileTable.columns]]
+		for row in report["handlers"][:self.rows]:
+			lines.append([row["event"], row["handler"], str(row["calls"]), "%.2f" % (row["total"] * 1000),
+						"%.3f" % (row["max"] * 1000), "%.1f" % fanout.get(row["event"], 0)])
+		for i, line in enumerate(lines):
+			colour = (249, 249, 249) if i == 0 else (228, 174, 46)
+			for text, (name, x) in zip(line, EventProfileTable.columns):
+				self.surface.blit(Fonts().render(self.font, text, colour), (4 + x, 4 + i * self.line))
+
+	def draw(self, display, time, covered):
+		# drawn straight to the screen after the frame has been presented, but only when the
+		# table has changed or the frame was presented over it
+		self.timer += time
+		if self.timer >= self.refresh:
+			self.timer = 0
+			self.render()
+			covered = True
+		if covered:
+			display.blit(self.surface, self.rect)
+			pygame.display.update(self.rect)
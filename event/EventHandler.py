@@ -1,4 +1,86 @@
+import weakref
 from abc import ABCMeta, abstractmethod
+from collections import OrderedDict, deque
+from timeit import default_timer
+from event.Profile import DispatchProfile
+
+class HandlerScope(object):
+
+	# a group of handlers torn down together, like everything a level registers. handlers are
+	# held by weak reference so a scope never keeps one alive, and one that is collected drops
+	# out of the scope on its own
+
+	def __init__(self, name=None):
+		self.name = name
+		self.closed = False
+		self.count = 0
+		# id(handler) -> (weak reference, the order it registered in)
+		self.handlers = {}
+		# ids of the handlers that want every event
+		self.catchall = set()
+		# (event class, name) -> ids of the handlers subscribed to it, a name of None is every name
+		self.index = {}
+		# id(handler) -> the keys it is in the index under
+		self.subscribed = {}
+		# (event class, name) -> the handlers an event like that is sent to, worked out from the
+		# index the first time one is sent
+		self.routes = {}
+
+	def add(self, device):
+		ident = id(device)
+		self.handlers[ident] = (weakref.ref(device, lambda ref: self._forget(ident)), self.count)
+		self.count += 1
+		self._index(device)
+
+	def remove(self, device):
+		if id(device) in self.handlers:
+			self._forget(id(device))
+
+	def reindex(self, device):
+		if id(device) in self.handlers:
+			self._unindex(id(device))
+			self._index(device)
+
+	def targets(self, key):
+		targets = self.routes.get(key)
+		if targets is None:
+			targets = self.routes[key] = self._route(key)
+		return targets
+
+	def _forget(self, ident):
+		self._unindex(ident)
+		self.handlers.pop(ident, None)
+
+	def _index(self, device):
+		subscriptions = device.subscriptions()
+		if subscriptions is None:
+			self.catchall.add(id(device))
+		else:
+			self.subscribed[id(device)] = list(subscriptions)
+			for key in self.subscribed[id(device)]:
+				self.index.setdefault(key, set()).add(id(device))
+		self.routes = {}
+
+	def _unindex(self, ident):
+		self.catchall.discard(ident)
+		for key in self.subscribed.pop(ident, ()):
+			self.index[key].discard(ident)
+			if not self.index[key]:
+				del self.index[key]
+		self.routes = {}
+
+	def _route(self, key):
+		# the catch-all handlers and those subscribed to the event's class, or any class it
+		# extends, by its name or every name, in the order they registered
+		cls, name = key
+		idents = set(self.catchall)
+		for base in cls.__mro__:
+			idents.update(self.index.get((base, name), ()))
+			idents.update(self.index.get((base, None), ()))
+		return [(ident, self.handlers[ident][0]) for ident in sorted(idents, key=lambda ident: self.handlers[ident][1])]
+
+	def __len__(self):
+		return len(self.handlers)
 
 class EventDispatcher(object):
 
@@ -8,26 +90,102 @@ class EventDispatcher(object):
 		# singleton design... If an instance exists, use that
 		if not cls._instance:
 			cls._instance = super(EventDispatcher, cls).__new__(cls, *args, **kwargs)
-			cls._instance.device_list = []
+			# solid handlers, like the engine, live for the whole game. the rest are registered
+			# in the current scope, which is torn down in one go when the level changes
+			cls._instance.solid = HandlerScope("solid")
+			cls._instance.scope = HandlerScope()
+			# the last few scopes torn down, to report handlers that outlived their level
+			cls._instance.closed = deque(maxlen=8)
+			# events posted to be sent the next time the queue is drained. an event that
+			# coalesces is keyed by its class and name so a later one replaces it, the rest
+			# by the order they were posted in
+			cls._instance.queue = OrderedDict()
+			cls._instance.posted = 0
+			# the timings from the last time the dispatcher was profiled
+			cls._instance.profiler = None
+			cls._instance.profiling = False
 		return cls._instance
 
 	def register_handler(self, device):
 		# Regsiter a new event handler
-		self.device_list.append(device)
+		if device.solid:
+			self.solid.add(device)
+		else:
+			self.scope.add(device)
 
 	def send_event(self, event):
-		# Loop through all of the handlers and dispatch the event
-		for device in self.device_list:
-			device.event_handler(event)
+		# only the handlers subscribed to the event are called, solid handlers first. a handler
+		# deregistered by an earlier one while the event is being sent doesn't get it. while
+		# profiling every handler call is timed
+		key = (type(event), event.name)
+		profiler = self.profiler if self.profiling else None
+		count = 0
+		for scope in (self.solid, self.scope):
+			for ident, ref in scope.targets(key):
+				if scope.closed or ident not in scope.handlers:
+					continue
+				device = ref()
+				if device is None:
+					continue
+				if profiler is None:
+					device.event_handler(event)
+				else:
+					start = default_timer()
+					device.event_handler(event)
+					profiler.record(type(event), type(device), default_timer() - start)
+					count += 1
+		if profiler is not None:
+			profiler.sent(type(event), count)
+
+	def profile(self, enabled=True):
+		# time every handler call, starting again starts new timings. the last timings are kept
+		# once it is turned off
+		if enabled:
+			self.profiler = DispatchProfile()
+		self.profiling = enabled
+
+	def post_event(self, event):
+		# queue the event to be sent when the queue is next drained, once a frame
+		if event.coalesce:
+			self.queue[(type(event), event.name)] = event
+		else:
+			self.queue[self.posted] = event
+		self.posted += 1
+
+	def dispatch_events(self):
+		# send everything posted so far, events posted while the queue is being drained wait
+		# for the next time
+		queue, self.queue = self.queue, OrderedDict()
+		for event in queue.itervalues():
+			self.send_event(event)
+
+	def open_scope(self, name=None):
+		# tear down the current scope and start a new one for the handlers registered from
+		# now on. none of the old scope's handlers are visited
+		self.scope.closed = True
+		# an unnamed scope nothing registered in isn't worth reporting
+		if self.scope.name is not None or len(self.scope):
+			self.closed.appendleft(self.scope)
+		self.scope = HandlerScope(name)
 
 	def deregister_events(self):
-		for device in self.device_list:
-			if not device.solid:
-				self.device_list.remove(device)
+		# deregister every handler that isn't solid
+		self.open_scope()
 
 	def deregister_event(self, device):
-		if device in self.device_list:
-			self.device_list.remove(device)
+		self.solid.remove(device)
+		self.scope.remove(device)
+
+	def reindex(self, device):
+		# a handler's subscriptions changed, e.g. a component was given its name
+		self.solid.reindex(device)
+		self.scope.reindex(device)
+
+	def stats(self):
+		# the handlers still alive in each scope. handlers in a scope that has been torn down
+		# are only alive if something other than the dispatcher still holds on to them
+		return [{"scope": scope.name, "live": len(scope), "closed": scope.closed}
+				for scope in [self.solid, self.scope] + list(self.closed)]
 
 class IEventHandler(object):
 
@@ -38,6 +196,11 @@ class IEventHandler(object):
 		# abstract method to be implemented in all derived classes
 		pass
 
+	def subscriptions(self):
+		# the events to send to the handler, as (event class, name) pairs where a name of None
+		# is every event of that class. None, the default, is every event
+		return None
+
 	def __init__(self, solid=False):
 		# create the next handler and register the new handler
 		self.solid = solid
@@ -45,4 +208,8 @@ class IEventHandler(object):
 
 	def send_event(self, event):
 		# send event to dispatcher
-		EventDispatcher().send_event(event)
\ No newline at end of file
+		EventDispatcher().send_event(event)
+
+	def post_event(self, event):
+		# queue the event with the dispatcher
+		EventDispatcher().post_event(event)
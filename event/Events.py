@@ -1,4 +1,9 @@
 class Event(object):
+
+	# whether a posted event is replaced by a later one of the same class and name that is
+	# posted before the queue is drained
+	coalesce = False
+
 	def __init__(self, name):
 		self.name = name
 
@@ -6,6 +11,10 @@ class Event(object):
 		return isinstance(self, type)
 
 class SliderEvent(Event):
+
+	# only where the slider ended up matters, not every value it was dragged past
+	coalesce = True
+
 	def __init__(self, name, slidervalue):
 		Event.__init__(self, name)
 		self.slidervalue = slidervalue
@@ -24,6 +33,10 @@ class CheckBoxEvent(Event):
 		self.checked = checked
 
 class LabelChange(Event):
+
+	# a label only shows its latest value
+	coalesce = True
+
 	def __init__(self, name, string):
 		Event.__init__(self, name)
 		self.string = string
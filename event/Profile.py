@@ -0,0 +1,46 @@
+import json
+
+class DispatchProfile(object):
+
+	# what the dispatcher records while it is profiling: how long each kind of handler spends on
+	# each kind of event, and how many handlers each kind of event is sent to. a handler's time
+	# includes any events it sends itself
+
+	def __init__(self):
+		# (event class name, handler class name) -> [calls, total seconds, max seconds]
+		self.handlers = {}
+		# event class name -> [events sent, handlers called, most handlers called for one event]
+		self.events = {}
+
+	def record(self, event, handler, elapsed):
+		key = (event.__name__, handler.__name__)
+		stats = self.handlers.get(key)
+		if stats is None:
+			stats = self.handlers[key] = [0, 0.0, 0.0]
+		stats[0] += 1
+		stats[1] += elapsed
+		if elapsed > stats[2]:
+			stats[2] = elapsed
+
+	def sent(self, event, count):
+		stats = self.events.get(event.__name__)
+		if stats is None:
+			stats = self.events[event.__name__] = [0, 0, 0]
+		stats[0] += 1
+		stats[1] += count
+		if count > stats[2]:
+			stats[2] = count
+
+	def report(self):
+		# the handlers slowest in total first
+		handlers = [{"event": event, "handler": handler, "calls": calls, "total": total, "max": longest,
+					"mean": total / calls} for (event, handler), (calls, total, longest) in self.handlers.items()]
+		handlers.sort(key=lambda row: row["total"], reverse=True)
+		events = [{"event": event, "sent": sent, "fanout": float(called) / sent, "max_fanout": most}
+					for event, (sent, called, most) in self.events.items()]
+		events.sort(key=lambda row: row["sent"], reverse=True)
+		return {"handlers": handlers, "events": events}
+
+	def dump(self, path):
+		with open(path, "w") as output:
+			json.dump(self.report(), output, indent=2)
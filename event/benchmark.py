@@ -0,0 +1,101 @@
+import timeit
+from event.EventHandler import EventDispatcher, IEventHandler
+from event.Events import LabelChange, SliderEvent, ButtonClickEvent
+
+# microbenchmark for the event dispatcher, run from the project root with
+#   python -m event.benchmark
+
+# numbers of registered handlers, the game level registers about a dozen
+HANDLERS = [10, 50, 200, 1000]
+
+# what a labels refresh sends: three from the engine and four for the robot
+EVENTS = [LabelChange("fps", "60"), LabelChange("time", "1.0"), LabelChange("current_time", "12:00:00"),
+		LabelChange("bearingai", "90"), LabelChange("positionai", "(1, 2)"), LabelChange("scoreai", "0"),
+		LabelChange("locationai", "N/A")]
+
+class LegacyDispatcher(object):
+
+	# the dispatcher as it was before it indexed its handlers, every event goes to every handler
+
+	def __init__(self):
+		self.device_list = []
+
+	def register_handler(self, device):
+		self.device_list.append(device)
+
+	def send_event(self, event):
+		for device in self.device_list:
+			device.event_handler(event)
+
+class Label(IEventHandler):
+
+	# a label like the gui's, it only wants the label changes sent to its name
+
+	def __init__(self, name, dispatcher=None):
+		self.name = name
+		self.string = ""
+		self.solid = False
+		(dispatcher or EventDispatcher()).register_handler(self)
+
+	def subscriptions(self):
+		return [(LabelChange, self.name)]
+
+	def event_handler(self, event):
+		if event.istype(LabelChange) and event.name == self.name:
+			self.string = event.string
+
+class Control(IEventHandler):
+
+	# a handler with a chain of checks, like the levels have
+
+	def __init__(self, name, dispatcher=None):
+		self.name = name
+		self.solid = False
+		(dispatcher or EventDispatcher()).register_handler(self)
+
+	def subscriptions(self):
+		return [(SliderEvent, self.name), (ButtonClickEvent, self.name)]
+
+	def event_handler(self, event):
+		if event.istype(SliderEvent) and event.name == self.name:
+			self.value = event.slidervalue
+		if event.istype(ButtonClickEvent) and event.name == self.name:
+			self.clicked = True
+
+def names(count):
+	# the names the refresh sends to first, then made up ones
+	names = [event.name for event in EVENTS]
+	return names[:count] + ["label%d" % i for i in range(count - len(names))]
+
+def register(count, dispatcher=None):
+	# half labels and half other controls
+	handlers = []
+	for i, name in enumerate(names(count)):
+		if i % 2 and i >= len(EVENTS):
+			handlers.append(Control(name, dispatcher))
+		else:
+			handlers.append(Label(name, dispatcher))
+	return handlers
+
+def time_refresh(dispatcher, number):
+	def refresh():
+		for event in EVENTS:
+			dispatcher.send_event(event)
+	return min(timeit.repeat(refresh, number=number, repeat=3)) / number
+
+def main(number=200):
+	for count in HANDLERS:
+		legacy = LegacyDispatcher()
+		register(count, legacy)
+		indexed = EventDispatcher()
+		indexed.open_scope("benchmark")
+		handlers = register(count)
+		legacy_time = time_refresh(legacy, number)
+		indexed_time = time_refresh(indexed, number)
+		teardown = timeit.default_timer()
+		indexed.open_scope()
+		teardown = timeit.default_timer() - teardown
+		print("%5d handlers  labels refresh  legacy %8.1f us  indexed %6.1f us  speedup %6.1fx  scope teardown %5.1f us" % (count, legacy_time * 1e6, indexed_time * 1e6, legacy_time / indexed_time, teardown * 1e6))
+
+if __name__ == "__main__":
+	main()
@@ -2,6 +2,8 @@ import pygame
 from event.EventHandler import IEventHandler, EventDispatcher
 from event.Events import *
 from misc.Constants import *
+from misc.Assets import Assets
+from misc.Fonts import Fonts
 import math
 import time
 import random
@@ -10,6 +12,11 @@ from abc import ABCMeta, abstractmethod
 # abstract class containing the update method that all components should implement
 class Component(pygame.Surface, IEventHandler):
 
+	# components that animate on their own every frame, which doesn't stop the engine idling
+	ambient = False
+	# components that take mouse input, the gui only sends input to these
+	interactive = False
+
 	def __init__(self, size, parent, offset=(0, 0), name="untitled", **kwargs):
 
 		pygame.Surface.__init__(self, size, **kwargs)
@@ -22,9 +29,40 @@ class Component(pygame.Surface, IEventHandler):
 		self.event_rect.x, self.event_rect.y = parent.rect.x + self.rect.x, parent.rect.y + self.rect.y
 		self.name = name
 
+	# handlers subscribe to events by the name of their component, which is usually given
+	# after it is made, so a new name moves the subscriptions along with it
+	@property
+	def name(self):
+		return self._name
+
+	@name.setter
+	def name(self, name):
+		self._name = name
+		if isinstance(self, IEventHandler):
+			EventDispatcher().reindex(self)
+
 	def get_position_locally(self, mouse_position):
 		return (mouse_position[0] - self.parent.rect.x - self.rect.x, mouse_position[1] - self.parent.rect.y - self.rect.y)
 
+	# mouse input from the gui, which only sends it to the component under the mouse or the
+	# one that captured it. positions are on the screen, the same as event_rect
+	def mouse_enter(self, position):
+		pass
+
+	def mouse_leave(self, position):
+		pass
+
+	def mouse_motion(self, position):
+		pass
+
+	def mouse_down(self, position, button):
+		# return True to capture the mouse, the component then gets all of the input until the
+		# button is released
+		return False
+
+	def mouse_up(self, position, button):
+		pass
+
 	__metaclass__ = ABCMeta
 
 	# abstractmethod - must be implemented in all subclasses
@@ -34,8 +72,7 @@ class Component(pygame.Surface, IEventHandler):
 
 class Button(Component):
 
-	icons = pygame.image.load("assets/img/button_icon_sprites.png")
-	background = pygame.image.load("assets/img/button_sprites.png")
+	interactive = True
 
 	def __init__(self, text, sprite, parent, **kwargs):
 
@@ -47,44 +84,39 @@ class Button(Component):
 		self.text = text
 		self.size = (100, 25)
 
-		self.states = [Button.background.subsurface((0, 0, 100, 25)),
-						Button.background.subsurface((0, 25, 100, 25)),
-						Button.background.subsurface((0, 50, 100, 25))]
+		self.states = Assets().atlas("assets/img/button_sprites.png", [(0, 0, 100, 25), (0, 25, 100, 25), (0, 50, 100, 25)])
 		if sprite is not None:
-			self.icon_states = [Button.icons.subsurface((sprite*16, 0, 16, 16)),
-								Button.icons.subsurface((sprite*16, 16, 16, 16)),
-								Button.icons.subsurface((sprite*16, 32, 16, 16))]
+			self.icon_states = Assets().atlas("assets/img/button_icon_sprites.png",
+								[(sprite*16, 0, 16, 16), (sprite*16, 16, 16, 16), (sprite*16, 32, 16, 16)])
 		else:
 			self.icon_states = None
 		self.offset = (6, 4)
 
-		self.font = pygame.font.Font(FONT_REGULAR, 12)
+		self.font = Fonts().font(FONT_REGULAR, 12)
+
+	def mouse_enter(self, position):
+		self.hovered = True
+		self.init = False
+
+	def mouse_leave(self, position):
+		self.clicked = False
+		self.hovered = False
+		self.init = False
+
+	def mouse_down(self, position, button):
+		if not self.clicked:
+			EventDispatcher().send_event(ButtonClickEvent(self.name))
+		self.clicked = True
+		self.init = False
+		return False
+
+	def mouse_up(self, position, button):
+		self.clicked = False
+		self.init = False
 
 	def update(self, timer, events):
-		update = False
-		for event in events:
-			if event.type == pygame.MOUSEMOTION:
-				if self.event_rect.collidepoint(event.pos):
-					update = True
-					self.hovered = True
-				else:
-					if self.clicked or self.hovered:
-						update = True
-					self.clicked = False
-					self.hovered = False
-			if event.type == pygame.MOUSEBUTTONDOWN:
-				if self.event_rect.collidepoint(event.pos):
-					if not self.clicked:
-						EventDispatcher().send_event(ButtonClickEvent(self.name))
-					self.clicked = True
-					update = True
-			if event.type == pygame.MOUSEBUTTONUP:
-				if self.event_rect.collidepoint(event.pos):
-					update = True
-					self.clicked = False
-
-		if update or not self.init:
-			self.blit(self.parent.initial_image.subsurface(self.rect), (0,0))
+		if not self.init:
+			self.blit(self.parent.initial_image, (0,0), self.rect)
 			self.init = True
 			if self.hovered:
 				if self.clicked:
@@ -95,13 +127,13 @@ class Button(Component):
 					self.blit(self.states[1], (0, 0))
 					if self.icon_states is not None:
 						self.blit(self.icon_states[1], self.offset)
-				fontimg = self.font.render(self.text.upper(), True, (249, 249, 249))
+				fontimg = Fonts().render(self.font, self.text.upper(), (249, 249, 249))
 				self.blit(fontimg, (30, 8))
 			else:
 				self.blit(self.states[0], (0, 0))
 				if self.icon_states is not None:
 					self.blit(self.icon_states[0], self.offset)
-				fontimg = self.font.render(self.text.upper(), True, (125, 125, 125))
+				fontimg = Fonts().render(self.font, self.text.upper(), (125, 125, 125))
 				self.blit(fontimg, (30, 8))
 				
 			#self.parent.blit(self, self.rect)
@@ -110,7 +142,7 @@ class Button(Component):
 
 class CheckBox(Component):
 
-	sprites = pygame.image.load("assets/img/checkbox_sprites.png")
+	interactive = True
 
 	def __init__(self, name, parent, **kwargs):
 		Component.__init__(self, (210, 16), parent, **kwargs)
@@ -121,43 +153,40 @@ class CheckBox(Component):
 		self.checked = False
 
 		self.counter = 0
-		self.font = pygame.font.Font(FONT_REGULAR, 12).render(name, True, (92, 92, 92))
-		self.bg = CheckBox.sprites.subsurface((0, 0, 16, 16))
-		self.bg_hover = CheckBox.sprites.subsurface((0, 16, 16, 16))
-		self.tick = CheckBox.sprites.subsurface((0, 32, 16, 14))
+		self.font = Fonts().render(Fonts().font(FONT_REGULAR, 12), name, (92, 92, 92))
+		# background, hovered background and tick
+		self.sprites = Assets().atlas("assets/img/checkbox_sprites.png", [(0, 0, 16, 16), (0, 16, 16, 16), (0, 32, 16, 14)])
+
+	def mouse_enter(self, position):
+		self.hovered = True
+		self.init = False
+
+	def mouse_leave(self, position):
+		self.hovered = False
+		self.init = False
+
+	def mouse_down(self, position, button):
+		if self.checked:
+			self.checked = False
+			EventDispatcher().send_event(CheckBoxEvent(self.name, self.checked))
+		else:
+			self.checked = True
+			EventDispatcher().send_event(CheckBoxEvent(self.name, self.checked))
+		self.init = False
+		return False
 
 	def update(self, timer, events):
-		update = False
-		for event in events:
-			if event.type == pygame.MOUSEMOTION:
-				if self.event_rect.collidepoint(event.pos):
-					update = True
-					self.hovered = True
-				else:
-					if self.hovered:
-						update = True
-					self.hovered = False
-			if event.type == pygame.MOUSEBUTTONDOWN:
-				if self.event_rect.collidepoint(event.pos):
-					if self.checked:
-						self.checked = False
-						EventDispatcher().send_event(CheckBoxEvent(self.name, self.checked))
-					else:
-						self.checked = True
-						EventDispatcher().send_event(CheckBoxEvent(self.name, self.checked))
-					update = True
-
-		if update or not self.init:
+		if not self.init:
 			self.init = True
 			#self.fill(self.parent.background)
 			
-			self.blit(self.parent.initial_image.subsurface(self.rect), (0,0))
+			self.blit(self.parent.initial_image, (0,0), self.rect)
 			if self.hovered:
-				self.blit(self.bg_hover, (0, 0))
+				self.blit(self.sprites[1], (0, 0))
 			else:
-				self.blit(self.bg, (0, 0))
+				self.blit(self.sprites[0], (0, 0))
 			if self.checked:
-				self.blit(self.tick, (2,0))
+				self.blit(self.sprites[2], (2,0))
 			self.blit(self.font, (26, 3))
 
 			#self.parent.blit(self, self.rect)
@@ -166,19 +195,17 @@ class CheckBox(Component):
 
 class Title(Component):
 
-	sprites = pygame.image.load("assets/img/title_sprites.png")
-
 	def __init__(self, title, parent, sprite, **kwargs):
 		Component.__init__(self, (210, 38), parent, **kwargs)
-		self.sprite = Title.sprites.subsurface((0, sprite * 16, 16, 16))
-		self.font = pygame.font.Font(FONT_REGULAR, 12).render(title, True, (0, 0, 0))
+		self.sprites = Assets().atlas("assets/img/title_sprites.png", [(0, sprite * 16, 16, 16)])
+		self.font = Fonts().render(Fonts().font(FONT_REGULAR, 12), title, (0, 0, 0))
 		self.init = False
 
 	def update(self, timer, events):
 		if not self.init:
 			self.init = True
-			self.blit(self.parent.initial_image.subsurface(self.rect), (0,0))
-			self.blit(self.sprite, (10, 10))
+			self.blit(self.parent.initial_image, (0,0), self.rect)
+			self.blit(self.sprites[0], (10, 10))
 			self.blit(self.font, (40, 13))
 			pygame.draw.line(self, (212, 212, 212), (0, self.rect.height-1), (self.rect.width, self.rect.height-1))
 			#self.parent.blit(self, self.rect)
@@ -191,9 +218,10 @@ class OrangeLabel(Component, IEventHandler):
 	def __init__(self, title, value, parent, size=(210, 16), **kwargs):
 		Component.__init__(self, size, parent, **kwargs)
 		IEventHandler.__init__(self)
-		self.font = pygame.font.Font(FONT_REGULAR, 12)
-		self.title = self.font.render(title, True, (92, 92, 92))
-		self.value = self.font.render(value, True, (228, 174, 46))
+		self.font = Fonts().font(FONT_REGULAR, 12)
+		self.title = Fonts().render(self.font, title, (92, 92, 92))
+		self.value = Fonts().render(self.font, value, (228, 174, 46))
+		self.string = value
 		self.init = False
 		self.test = 0
 
@@ -201,7 +229,7 @@ class OrangeLabel(Component, IEventHandler):
 
 		if not self.init:
 			self.init = True
-			self.blit(self.parent.initial_image.subsurface(self.rect), (0,0))
+			self.blit(self.parent.initial_image, (0,0), self.rect)
 			#self.blit(self.sprite, (10, 10))
 			self.blit(self.title, (0, 0))
 			self.blit(self.value, (self.get_rect().width - self.value.get_rect().width, 0))
@@ -211,26 +239,27 @@ class OrangeLabel(Component, IEventHandler):
 			return True
 		return False
 
+	def subscriptions(self):
+		return [(LabelChange, self.name)]
+
 	def event_handler(self, event):
-		if event.istype(LabelChange) and event.name == self.name:
-			self.value = self.font.render(event.string, True, (228, 174, 46))
+		# labels are sent their values on a timer, so only redraw when the value has changed
+		if event.istype(LabelChange) and event.name == self.name and event.string != self.string:
+			self.value = Fonts().render(self.font, event.string, (228, 174, 46))
+			self.string = event.string
 			self.init = False
 
 class Slider(Component):
 
+	interactive = True
 	slider_sprites = None
 
 	def __init__(self, title, parent, offset=(0, 0), increment=10.0, minvalue=10.0, maxvalue=100.0, **kwargs):
 		Component.__init__(self, (210, 38), parent, offset, **kwargs)
 
 		if Slider.slider_sprites == None:
-			sprites = pygame.image.load("assets/img/slider_sprites.png")
-			Slider.slider_sprites = [
-				sprites.subsurface((0,0,210,13)),
-				sprites.subsurface((0,13,210,13)),
-				sprites.subsurface((0,26,30,7)),
-				sprites.subsurface((0,33,30,7))
-			]
+			Slider.slider_sprites = Assets().atlas("assets/img/slider_sprites.png",
+				[(0,0,210,13), (0,13,210,13), (0,26,30,7), (0,33,30,7)])
 
 		# user options
 		self.paddingright = 3
@@ -256,6 +285,8 @@ class Slider(Component):
 
 		self.click = False
 		self.offset = None
+		# where the mouse dragging the bar is across the screen
+		self.mouse_x = 0
 		self.currentvalue = 0
 
 		# calculate empty space between bar and padded edges along with the ratio
@@ -273,47 +304,57 @@ class Slider(Component):
 		self.bar_rect_event.x = self.bar_rect.x + self.event_rect.x
 		self.bar_rect_event.y = self.bar_rect.y + self.event_rect.y
 
-		self.font = pygame.font.Font(FONT_REGULAR, 12)
-		self.label = self.font.render(title, True, (92, 92, 92))
+		self.font = Fonts().font(FONT_REGULAR, 12)
+		self.label = Fonts().render(self.font, title, (92, 92, 92))
 		self.init = False
 
 		self.hovered = False
 		self.previousvalue = 0
 
-	def update(self, timer, events):
+	def mouse_motion(self, position):
+		if self.click:
+			self.mouse_x = position[0]
+		# only the track lights up, not the label above it
+		if self.track_rect_event.collidepoint(position):
+			if not self.hovered:
+				self._hovered(True)
+				self.init = False
+		elif not self.click and self.hovered:
+			self._hovered(False)
+			self.init = False
 
-		required = False
+	def mouse_leave(self, position):
+		if not self.click and self.hovered:
+			self._hovered(False)
+			self.init = False
 
-		for event in events:
-			if event.type == pygame.MOUSEMOTION:
-			
-				if self.track_rect_event.collidepoint(event.pos):
-					self._hovered(True)
-					required = True
-				elif not self.click and self.hovered:
-					self._hovered(False)
-					required = True
-			if event.type == pygame.MOUSEBUTTONDOWN:
-
-				if self.bar_rect_event.collidepoint(event.pos):
-					required = True
-					self._hovered_bar(True)
-					self.click = True
-					if self.offset is None:
-						self.offset = event.pos[0] - self.bar_rect.x
-
-			elif event.type == pygame.MOUSEBUTTONUP and self.hovered:
-				required = True
-				self.click = False
-				self.offset = None
-				self._hovered_bar(False)
-
-		if required or self.click or not self.init:
+	def mouse_down(self, position, button):
+		# the bar is dragged with the mouse captured, so it keeps moving when the mouse
+		# leaves the slider
+		if self.bar_rect_event.collidepoint(position):
+			self._hovered_bar(True)
+			self.click = True
+			self.mouse_x = position[0]
+			if self.offset is None:
+				self.offset = position[0] - self.bar_rect.x
+			self.init = False
+			return True
+		return False
+
+	def mouse_up(self, position, button):
+		self.click = False
+		self.offset = None
+		self._hovered_bar(False)
+		self.init = False
+
+	def update(self, timer, events):
+
+		if self.click or not self.init:
 			self.init = True
 			self.fill(self.parent.background)
 
 			if self.click:
-				newpos = pygame.mouse.get_pos()[0] - self.offset
+				newpos = self.mouse_x - self.offset
 				if newpos + self.bar_rect.width < self.maxright and newpos > self.maxleft:
 					self.bar_rect.right = newpos + self.bar_rect.width
 					self.bar_rect_event.x = self.track_rect_event.left + self.paddingleft + newpos
@@ -326,7 +367,7 @@ class Slider(Component):
 
 			self.currentvalue = self.myround( ( (self.bar_rect.left - self.maxleft ) * self.ratio) * self.increment + self.minvalue, self.increment)
 			
-			text = self.font.render(str(self.currentvalue), True, (41, 140, 218))
+			text = Fonts().render(self.font, str(self.currentvalue), (41, 140, 218))
 
 			self.blit(text, (self.track_rect.right - self.paddingright - text.get_rect().width, self.track_rect.y - 20))
 			self.blit(self.label, (self.track_rect.left + self.paddingleft, self.track_rect.y - 20))
@@ -338,7 +379,7 @@ class Slider(Component):
 			#self.parent.blit(self, self.rect)
 
 			if self.currentvalue is not self.previousvalue:
-				EventDispatcher().send_event(SliderEvent(self.name, self.currentvalue))
+				EventDispatcher().post_event(SliderEvent(self.name, self.currentvalue))
 				self.previousvalue = self.currentvalue
 
 			return True
@@ -363,11 +404,13 @@ class Slider(Component):
 
 class FlashingLabel(Component, IEventHandler):
 
+	ambient = True
+
 	def __init__(self, title, parent, **kwargs):
 		Component.__init__(self, (210, 16), parent, **kwargs)
 		IEventHandler.__init__(self)
-		self.font = pygame.font.Font(FONT_REGULAR, 12)
-		self.title = self.font.render(title, True, (92, 92, 92))
+		self.font = Fonts().font(FONT_REGULAR, 12)
+		self.title = Fonts().render(self.font, title, (92, 92, 92))
 		self.init = False
 
 		self.amount = 510
@@ -387,7 +430,7 @@ class FlashingLabel(Component, IEventHandler):
 
 		if not self.init:
 			self.init = True
-			self.blit(self.parent.initial_image.subsurface(self.rect), (0,0))
+			self.blit(self.parent.initial_image, (0,0), self.rect)
 			#self.blit(self.sprite, (10, 10))
 			self.blit(self.title, (0, 0))
 			#self.parent.blit(self, self.rect)
@@ -397,26 +440,29 @@ class FlashingLabel(Component, IEventHandler):
 		self.set_alpha(math.ceil(self.current))
 		return True
 
+	def subscriptions(self):
+		return [(LabelChange, self.name)]
+
 	def event_handler(self, event):
 		if event.istype(LabelChange) and event.name == self.name:
-			self.value = self.font.render(event.string, True, (228, 174, 46))
+			self.value = Fonts().render(self.font, event.string, (228, 174, 46))
 			self.init = False
 
 class MainTitle(Component):
 
 	def __init__(self, parent, **kwargs):
 		Component.__init__(self, (225, 100), parent, **kwargs)
-		self.font = pygame.font.Font(FONT_REGULAR, 12)
+		self.font = Fonts().font(FONT_REGULAR, 12)
 		self.init = False
 
 	def update(self, timer, events):
 
 		if not self.init:
-			self.blit(self.parent.initial_image.subsurface(self.rect), (0,0))
-			title = self.font.render("Python Virtual Robot", True, (0, 0, 0))
-			value = self.font.render("Group B13A", True, (125, 125, 125))
+			self.blit(self.parent.initial_image, (0,0), self.rect)
+			title = Fonts().render(self.font, "Python Virtual Robot", (0, 0, 0))
+			value = Fonts().render(self.font, "Group B13A", (125, 125, 125))
 
-			img = pygame.image.load("assets/img/python_sml.png")
+			img = Assets().image("assets/img/python_sml.png")
 			self.blit(img, (15, 15))
 			self.blit(title, (self.rect.width - title.get_rect().width, 40))
 			self.blit(value, (self.rect.width - value.get_rect().width, 60))
@@ -426,11 +472,13 @@ class MainTitle(Component):
 
 class PlayTitle(Component, IEventHandler):
 
+	ambient = True
+
 	def __init__(self, title, parent, **kwargs):
 		Component.__init__(self, (210, 30), parent, **kwargs)
 		IEventHandler.__init__(self)
-		self.font = pygame.font.Font(FONT_REGULAR, 20)
-		self.title = self.font.render(title, True, (0, 0, 0))
+		self.font = Fonts().font(FONT_REGULAR, 20)
+		self.title = Fonts().render(self.font, title, (0, 0, 0))
 		self.init = False
 
 		self.amount = 510
@@ -450,7 +498,7 @@ class PlayTitle(Component, IEventHandler):
 
 		if not self.init:
 			self.init = True
-			self.blit(self.parent.initial_image.subsurface(self.rect), (0,0))
+			self.blit(self.parent.initial_image, (0,0), self.rect)
 			#self.blit(self.sprite, (10, 10))
 			self.blit(self.title, (0, 0))
 			#self.parent.blit(self, self.rect)
@@ -458,9 +506,12 @@ class PlayTitle(Component, IEventHandler):
 		self.set_alpha(math.ceil(self.current))
 		return True
 
+	def subscriptions(self):
+		return [(LabelChange, self.name)]
+
 	def event_handler(self, event):
 		if event.istype(LabelChange) and event.name is self.name:
-			self.value = self.font.render(event.string, True, (228, 174, 46))
+			self.value = Fonts().render(self.font, event.string, (228, 174, 46))
 			self.init = False
 
 class TrafficLight(Component):
@@ -469,19 +520,17 @@ class TrafficLight(Component):
 		Component.__init__(self, (41, 88), parent, **kwargs)
 		self.init = False
 
-		lights = pygame.image.load("assets/img/trafficlights.png")
-		self.red = lights.subsurface(0, 0, 15, 15)
-		self.yellow = lights.subsurface(0, 15, 15, 15)
-		self.green = lights.subsurface(0, 30, 15, 15)
+		self.red, self.yellow, self.green = Assets().atlas("assets/img/trafficlights.png", [(0, 0, 15, 15), (0, 15, 15, 15), (0, 30, 15, 15)])
 
-		self.bg = pygame.image.load("assets/img/trafficlight.png")
+		self.bg = Assets().image("assets/img/trafficlight.png")
 
 		self.amount = 510
 		self.direction = -1
 		self.current = random.randint(0, 255)
 
-		self.font = pygame.font.Font(FONT_REGULAR, 20)
-		self.title = self.font.render("T", True, (255, 255, 255))
+		self.font = Fonts().font(FONT_REGULAR, 20)
+		# faded out, so it takes its own copy of the shared text
+		self.title = Fonts().render(self.font, "T", (255, 255, 255)).copy()
 		self.title.set_alpha(0)
 
 		self.timer = 0
@@ -503,8 +552,8 @@ class TrafficLight(Component):
 
 		if not self.init:
 			self.init = True
-			self.blit(self.parent.initial_image.subsurface(self.rect).copy(), (0,0))
-		self.blit(self.bg.copy(), self.bg.get_rect())
+			self.blit(self.parent.initial_image, (0,0), self.rect)
+		self.blit(self.bg, self.bg.get_rect())
 
 		#pygame.draw.circle(self, (255, 255, 255), (0,0), 50)
 
@@ -544,10 +593,11 @@ class TreasureSelectorTreasure(pygame.sprite.Sprite):
 	def __init__(self, treasure):
 		pygame.sprite.Sprite.__init__(self)
 
-		surface = pygame.image.load("assets/img/treasure_bg.png")
+		# the background is shared, so draw onto a copy of it
+		surface = Assets().image("assets/img/treasure_bg.png").copy()
 
-		testfont = pygame.font.SysFont(FONT_REGULAR, 14)
-		font_rendered = testfont.render(str(treasure.score), 1, (0, 0, 0))
+		testfont = Fonts().sysfont(FONT_REGULAR, 14)
+		font_rendered = Fonts().render(testfont, str(treasure.score), (0, 0, 0))
 		surface.blit(treasure.image, ((surface.get_rect().width/2)-(treasure.image.get_rect().width/2), 3))
 		surface.blit(font_rendered, ((surface.get_rect().width/2)-(font_rendered.get_rect().width/2), (surface.get_rect().height)-(font_rendered.get_rect().height) - 3))
 		self.image = surface
@@ -613,6 +663,8 @@ class TreasureSelectorTreasure(pygame.sprite.Sprite):
 
 class TreasureSelector(Component, IEventHandler):
 
+	interactive = True
+
 	def __init__(self, parent, **kwargs):
 		Component.__init__(self, (202, 135), parent, **kwargs)
 		IEventHandler.__init__(self)
@@ -664,15 +716,15 @@ class TreasureSelector(Component, IEventHandler):
 
 		self.unsorted = True
 
-	def update(self, timer, events):
+	def mouse_down(self, position, button):
+		for treasure in self.treasures:
+			if treasure.rect.collidepoint(self.get_position_locally(position)):
+				if not self.swapping:
+					self.treasures.remove(treasure)
+					self.recalculate_positions()
+		return False
 
-		for event in events:
-			if event.type == pygame.MOUSEBUTTONDOWN:
-				for treasure in self.treasures:
-					if treasure.rect.collidepoint(self.get_position_locally(event.pos)):
-						if not self.swapping:
-							self.treasures.remove(treasure)
-							self.recalculate_positions()
+	def update(self, timer, events):
 
 		if not self.unsorted and self.final_blit:
 			return False
@@ -711,6 +763,9 @@ class TreasureSelector(Component, IEventHandler):
 		# do some bubble magic
 		# if not sorted and not swapping
 		if self.unsorted and not self.swapping:
+			# fewer than two treasures are always sorted, the loop below never runs to say so
+			if len(self.treasures) < 2:
+				self.unsorted = False
 			index = self.current_index
 			for i in range(index, len(self.treasures) - 1):
 				if self.sort_encountered:
@@ -738,6 +793,10 @@ class TreasureSelector(Component, IEventHandler):
 
 		return True
 
+	def subscriptions(self):
+		return [(SliderEvent, "treasurevelocitychange"), (CheckBoxEvent, "sortdescending"),
+				(TreasureCollectEvent, None), (RemoveEvent, "removelasttreasure")]
+
 	def event_handler(self, event):
 		if event.istype(SliderEvent) and event.name == "treasurevelocitychange":
 			self.velocity = event.slidervalue
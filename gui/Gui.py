@@ -1,20 +1,32 @@
 import pygame
+from itertools import product
 from gui.Components import *
+from engine.Display import DirtyRects
+from misc.Assets import Assets
+from misc.Fonts import Fonts
 
 class Gui(pygame.Surface):
 
+	# the size of the squares the screen is split into to find the component under the mouse
+	cell_size = 64
+
 	def __init__(self, parent, size=(100, 100), offset=(0, 0), background=(242, 242, 242), **kwargs):
 		pygame.Surface.__init__(self, size, **kwargs)
 		self.components = []
+		# (column, row) -> the interactive components overlapping that square, in the order added
+		self.cells = {}
+		# the component under the mouse, and the one that captured it while a button is held
+		self.hovered = None
+		self.captured = None
 		self.parent = parent
 		self.rect = self.get_rect()
 		self.rect.x, self.rect.y = offset[0], offset[1]
 		self.background = background
-		self.python_bg = pygame.image.load("assets/img/python_bg.png")
+		self.python_bg = Assets().image("assets/img/python_bg.png")
 		self.fill(self.background)
 		self.blit(self.python_bg, (self.rect.width - self.python_bg.get_rect().width, self.rect.height - self.python_bg.get_rect().height))
 		
-		font = pygame.font.Font(FONT_REGULAR, 12)
+		font = Fonts().font(FONT_REGULAR, 12)
 		rectangle = pygame.Rect(0, self.rect.height - 30, self.rect.width, 30)
 		pygame.draw.rect(self, (242, 242, 242), rectangle)
 		
@@ -27,13 +39,18 @@ class Gui(pygame.Surface):
 		self.blit(software_version, (rectangle.right - software_version.get_rect().width - 15, rectangle.center[1] - (software_version.get_rect().height / 2)))
 
 		self.parent.blit(self, self.rect)
+		DirtyRects().add(self.rect)
 		self.initial_image = self.copy()
 
 	def redraw_initial(self):
 		self.parent.blit(self.initial_image, self.rect)
+		DirtyRects().add(self.rect)
 
 	def add_component(self, component):
 		self.components.append(component)
+		if component.interactive:
+			for cell in self._cells(component.event_rect):
+				self.cells.setdefault(cell, []).append(component)
 
 	def remove_component(self, component):
 		if not component:
@@ -41,9 +58,17 @@ class Gui(pygame.Surface):
 		# deregister handler if the component was a handler
 		if isinstance(component, IEventHandler):
 			EventDispatcher().deregister_event(component)
-		# update the region of the removed component
-		self.parent.blit(self.initial_image.subsurface(component.rect).copy(), component.event_rect)
+		# update the region of the removed component, straight from the cached background
+		self.parent.blit(self.initial_image, component.event_rect, component.rect)
+		DirtyRects().add(component.event_rect)
 		self.components.remove(component)
+		if component.interactive:
+			for cell in self._cells(component.event_rect):
+				self.cells[cell].remove(component)
+		if self.hovered is component:
+			self.hovered = None
+		if self.captured is component:
+			self.captured = None
 
 	def get_component(self, name):
 		for component in self.components:
@@ -51,9 +76,63 @@ class Gui(pygame.Surface):
 				return component
 		return False
 
+	def component_at(self, position):
+		# the interactive component under a point on the screen, the one added last if they overlap
+		for component in reversed(self.cells.get((position[0] // Gui.cell_size, position[1] // Gui.cell_size), ())):
+			if component.event_rect.collidepoint(position):
+				return component
+		return None
+
+	def _cells(self, rect):
+		size = Gui.cell_size
+		return product(range(rect.left // size, (rect.right - 1) // size + 1), range(rect.top // size, (rect.bottom - 1) // size + 1))
+
+	def dispatch_input(self, events):
+		# the mouse is only looked at where it ended up each frame, unless a button was pressed
+		# or released along the way
+		position = None
+		for event in events:
+			if event.type == pygame.MOUSEMOTION:
+				position = event.pos
+			elif event.type == pygame.MOUSEBUTTONDOWN:
+				self._move(event.pos)
+				position = None
+				if self.hovered is not None and self.hovered.mouse_down(event.pos, event.button):
+					self.captured = self.hovered
+			elif event.type == pygame.MOUSEBUTTONUP:
+				self._move(event.pos)
+				position = None
+				if self.captured is not None:
+					captured, self.captured = self.captured, None
+					captured.mouse_up(event.pos, event.button)
+					# the mouse may have been released over something else
+					self._move(event.pos)
+				elif self.hovered is not None:
+					self.hovered.mouse_up(event.pos, event.button)
+		if position is not None:
+			self._move(position)
+
+	def _move(self, position):
+		# a component that captured the mouse gets all of its movement, otherwise the
+		# components it moves between are told it entered and left them
+		if self.captured is not None:
+			self.captured.mouse_motion(position)
+			return
+		component = self.component_at(position)
+		if component is not self.hovered:
+			if self.hovered is not None:
+				self.hovered.mouse_leave(position)
+			self.hovered = component
+			if component is not None:
+				component.mouse_enter(position)
+		if component is not None:
+			component.mouse_motion(position)
+
 	def update(self, timer, events):
+		self.dispatch_input(events)
 		for component in self.components:
 			update = component.update(timer, events)
 			if update:
-				self.parent.blit(self.initial_image.subsurface(component.rect).copy(), component.event_rect)
+				self.parent.blit(self.initial_image, component.event_rect, component.rect)
 				self.parent.blit(component, component.event_rect)
+				DirtyRects().add(component.event_rect, component.ambient)
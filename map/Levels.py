@@ -8,6 +8,11 @@ from time import sleep
 from misc.Constants import *
 from misc.Entity import *
 from misc.path.astar import *
+from misc.path.service import PathfindingService
+from misc.path.route import RoutePlanner
+from misc.path.smoothing import PathSmoother
+from engine.Display import DirtyRects
+from misc.Assets import Assets
 import random
 from abc import ABCMeta, abstractmethod
 
@@ -23,6 +28,17 @@ class Level(pygame.Surface):
 
 	def __init__(self, size=(500,500)):
 		pygame.Surface.__init__(self, size)
+		# how far the level is being drawn between its last two simulation steps, from 0 to 1
+		self.alpha = 1.0
+
+	# advance the simulation by a fixed step of time, called by the engine before update
+	# draws the level. levels without a simulation have nothing to do
+	def step(self, time):
+		pass
+
+	# release anything the level holds on to once it is no longer in use
+	def close(self):
+		pass
 
 # main menu class that draws the main menu screen
 class MainMenu(Level, IEventHandler):
@@ -48,19 +64,23 @@ class MainMenu(Level, IEventHandler):
 	def update(self, time, events):
 		self.gui.update(time, events)
 
+	def subscriptions(self):
+		return [(ButtonClickEvent, "start")]
+
 	def event_handler(self, event):
 		if event.istype(ButtonClickEvent) and event.name == "start":
 			EventDispatcher().send_event(LevelChangeEvent("test", LEVEL_GAME))
 
 class GameLevel(Level, IEventHandler):
 
-	def __init__(self):
+	def __init__(self, processes=None):
 		Level.__init__(self, size=(860, 800))
 		IEventHandler.__init__(self)
 		self.state = False
 		self.time = 0
 
-		self.game = GameSurface(self)
+		# 0 searches paths inline rather than in the worker pool, None for the settings
+		self.game = GameSurface(self, processes)
 
 		#self.gui_ = Gui(self, (300, 300), offset=(100, 100))
 		#component = MainTitle(self.gui_, offset=(0, 0))
@@ -71,8 +91,10 @@ class GameLevel(Level, IEventHandler):
 		component = MainTitle(self.gui, offset=(0, 0))
 		self.gui.add_component(component)
 
+		# the clock labels tick over on their own, so they are ambient
 		component = OrangeLabel("", "0.0", self.gui, offset=(155, 20), size=(70, 16))
 		component.name = "current_time"
+		component.ambient = True
 		self.gui.add_component(component)
 
 		component = Title("Robot 1 : Automated", self.gui, 0, offset=(25, 100))
@@ -143,10 +165,12 @@ class GameLevel(Level, IEventHandler):
 
 		component = OrangeLabel("Time Running", "0.0", self.gui, offset=(25, 730))
 		component.name = "time"
+		component.ambient = True
 		self.gui.add_component(component)
 
 		component = OrangeLabel("FPS", "0.0", self.gui, offset=(25, 750))
 		component.name = "fps"
+		component.ambient = True
 		self.gui.add_component(component)
 
 		# add pause button to component array at end due to updating issues
@@ -154,13 +178,23 @@ class GameLevel(Level, IEventHandler):
 		component.name = "pauserobot"
 		self.gui.add_component(component)
 
+	def step(self, time):
+		self.game.step(time)
+
 	def update(self, time, events):
 		self.gui.update(time, events)
+		self.game.alpha = self.alpha
 		self.game.update(time, events)
 		#self.gui_.update(time, events)
 		#self.blit(self.gui_, self.gui_.rect)
 		#self.gui1.update(time, events)
 
+	def close(self):
+		self.game.close()
+
+	def subscriptions(self):
+		return [(ButtonClickEvent, "pauserobot"), (ButtonClickEvent, "resumerobot")]
+
 	def event_handler(self, event):
 		if event.istype(ButtonClickEvent) and event.name == "pauserobot":
 			self.gui.remove_component(self.gui.get_component("pauserobot"))
@@ -187,14 +221,20 @@ class GameLevel(Level, IEventHandler):
 
 class GameSurface(Level, IEventHandler):
 
-	def __init__(self, parent):
+	# the most areas of a cached layer waiting to be redrawn before they are merged
+	max_layer_changes = 8
+
+	def __init__(self, parent, processes=None):
 		Level.__init__(self, size=(600, 800))
 		IEventHandler.__init__(self)
 		self.parent = parent
-		self.mapimg = pygame.image.load(json_settings["map_img"])
+		self.mapimg = Assets().image(json_settings["map_img"])
 		self.rect = self.mapimg.get_rect()
 
-		self.nodegraph = NodeGraph(self)
+		# the resolution of the path finding grid comes from the settings, its dimensions
+		# from the map
+		settings = json_settings["pathfinding"]
+		self.nodegraph = NodeGraph(self, settings["spacing"])
 		self.astar = AStar(self.nodegraph.graph)
 
 		self.blit(self.mapimg, self.rect)
@@ -206,26 +246,123 @@ class GameSurface(Level, IEventHandler):
 
 		self.update_timer = 0
 
+		# the traps and treasures don't move between frames, so each kind is kept drawn on a
+		# layer of its own and the layers that are switched on are composited with the map into
+		# the background. a layer is only redrawn where something on it changed
+		self.background = self.mapimg.copy()
+		self.layers = {}
+		self.layer_entities = {}
+		# layer -> [(area to redraw, whether it only changed by an ambient animation)]
+		self.layer_changes = {}
+		for layer in (LAYER_TRAPS, LAYER_TREASURES):
+			self.layers[layer] = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+			self.layer_entities[layer] = []
+			self.layer_changes[layer] = []
+
+		# the moving entities are drawn over the background in layers, only the ones that are
+		# dirty are redrawn and the background is restored behind wherever they were before
+		self.sprites = pygame.sprite.LayeredDirty()
+		self.sprites.clear(self.parent, self.background)
+		self.sprites.set_clip(self.rect)
+
 		self.known_entities = []
+		# where each entity was before the last simulation step, for drawing between steps
+		self.positions = {}
 		self.robots = []
 		robot = RobotAI(self)
 
 		self.obstacles = []
 		
-		self.known_entities.append(robot)
+		self.add_entity(robot)
 		self.robots.append(robot)
 
 		entity = Cloud(self)
-		self.known_entities.append(entity)
+		self.add_entity(entity)
 		self.obstacles.append(entity)
 
 		entity = Cloud(self)
-		self.known_entities.append(entity)
+		self.add_entity(entity)
 		self.obstacles.append(entity)
 
+		# rasterise the clouds into the path finder's occupancy grid, dilated by the size of
+		# the robot so that paths keep the whole robot clear of them
+		self.astar.set_footprint(robot.rect.size)
+		for obstacle in self.obstacles:
+			self.astar.add_obstacle(obstacle)
+
+		# robots request their paths from the worker processes started with the game, which
+		# search this level's grid once it is copied into the memory they share
+		if processes is None:
+			processes = settings["processes"]
+		self.pathfinder = PathfindingService(self.astar, processes, settings["cluster_size"] if settings["hierarchical"] else 0)
+		# path distances between the treasures, used by robots to plan their route
+		self.routeplanner = RoutePlanner(self.astar)
+		# cuts the paths down to the waypoints where the robots need to turn
+		self.smoother = PathSmoother(self.astar)
+
 		self.treasures = []
+
+	def add_entity(self, entity):
+		self.known_entities.append(entity)
+		if entity._layer in self.layers:
+			self.layer_entities[entity._layer].append(entity)
+			self.layer_changed(entity)
+		else:
+			self.sprites.add(entity)
+
+	def remove_entity(self, entity):
+		self.known_entities.remove(entity)
+		if entity._layer in self.layers:
+			self.layer_entities[entity._layer].remove(entity)
+			self.layer_changed(entity)
+		else:
+			entity.kill()
+
+	def layer_changed(self, entity, previous=None):
+		# an entity on one of the cached layers changed, the layer is redrawn where it is now
+		# and where it was before if it moved
+		self.layer_change(entity._layer, entity.rect, entity.ambient)
+		if previous is not None:
+			self.layer_change(entity._layer, previous, entity.ambient)
+
+	def layer_change(self, layer, rect, ambient=False):
+		# the changes are only drawn when the map is, and the simulation can step many times
+		# before that (or never, when paused or headless). an area already waiting to be redrawn
+		# isn't added again, and past a few areas they are merged into one
+		changes = self.layer_changes[layer]
+		for i, (pending, pending_ambient) in enumerate(changes):
+			if pending.contains(rect):
+				changes[i] = (pending, pending_ambient and ambient)
+				return
+		changes.append((pygame.Rect(rect), ambient))
+		if len(changes) > GameSurface.max_layer_changes:
+			changes[:] = [(changes[0][0].unionall([pending for pending, pending_ambient in changes[1:]]),
+						all(pending_ambient for pending, pending_ambient in changes))]
+
+	def refresh_layers(self):
+		# redraw the changed areas of the cached layers and composite them back into the
+		# background, the sprite group then repaints whatever was drawn over those areas
+		for layer, changes in self.layer_changes.items():
+			for rect, ambient in changes:
+				rect = rect.clip(self.rect)
+				surface = self.layers[layer]
+				surface.set_clip(rect)
+				surface.fill((0, 0, 0, 0))
+				for entity in self.layer_entities[layer]:
+					if entity.rect.colliderect(rect):
+						surface.blit(entity.image, entity.rect)
+				surface.set_clip(None)
+
+				self.background.blit(self.mapimg, rect, rect)
+				if self.display_traps:
+					self.background.blit(self.layers[LAYER_TRAPS], rect, rect)
+				if self.display_treasures:
+					self.background.blit(self.layers[LAYER_TREASURES], rect, rect)
+				self.sprites.repaint_rect(rect)
+				DirtyRects().add(rect, ambient)
+			del changes[:]
 	
-	def update(self, time, events):
+	def step(self, time):
 
 		if len(self.treasures) == 0:
 			for i in range(0, 5):
@@ -236,21 +373,25 @@ class GameSurface(Level, IEventHandler):
 						collision = True
 				if not collision:
 					self.treasures.append(treasure)
-					self.known_entities.append(treasure)
-
-		for entity in self.known_entities:
-			self.blit(self.mapimg.subsurface(entity.previous_rect.x, entity.previous_rect.y, entity.previous_rect.width, entity.previous_rect.height), entity.previous_rect)
-
-		# remove all of the unrequired entities from the list of know entities
-		for entity in self.known_entities:
+					self.add_entity(treasure)
+			# snap every new treasure to its path finding node in one go
+			ids = self.nodegraph.find_closest_nodes([treasure.rect.center for treasure in self.treasures])
+			for treasure, node_id in zip(self.treasures, ids):
+				treasure.node = self.astar.nodes[node_id]
+				self.routeplanner.add_treasure(treasure)
+
+		# remove all of the unrequired entities from the list of know entities, the sprite
+		# group or their layer restores the map where they were drawn
+		for entity in list(self.known_entities):
 			if entity.remove:
-				self.known_entities.remove(entity)
+				self.remove_entity(entity)
 
+		self.positions = dict((sprite, sprite.rect.topleft) for sprite in self.sprites)
 		self.update_timer += time
 
 		for i in range(0, len(self.known_entities)):
 
-			self.known_entities[i].update(time, events)
+			self.known_entities[i].update(time, [])
 
 			if isinstance(self.known_entities[i], Robot):
 
@@ -259,8 +400,9 @@ class GameSurface(Level, IEventHandler):
 						if self.known_entities[i].rect.colliderect(entity.rect):
 							self.known_entities[i].score += entity.score
 							indicator = ScoreIndicator(self, self.known_entities[i].x, self.known_entities[i].y, entity.score)
-							self.known_entities.append(indicator)
+							self.add_entity(indicator)
 							self.treasures.remove(entity)
+							self.routeplanner.remove_treasure(entity)
 							entity.remove = True
 							EventDispatcher().send_event(TreasureCollectEvent(entity))
 					if isinstance(entity, Cloud) and not entity.remove:
@@ -270,10 +412,10 @@ class GameSurface(Level, IEventHandler):
 							treasure = self.parent.gui.get_component("treasureselector").remove_last_treasure()
 							if not treasure:
 								indicator = ScoreRemoveIndicator(self, self.known_entities[i].rect.x, self.known_entities[i].rect.y, "No Treasure!")
-								self.known_entities.append(indicator)
+								self.add_entity(indicator)
 							else:
 								indicator = ScoreRemoveIndicator(self, self.known_entities[i].rect.x, self.known_entities[i].rect.y, treasure.score)
-								self.known_entities.append(indicator)
+								self.add_entity(indicator)
 								self.known_entities[i].score -= treasure.score
 
 							entity.in_collision = True
@@ -285,22 +427,50 @@ class GameSurface(Level, IEventHandler):
 		if self.update_timer > 0.25:
 			self.update_timer = 0
 			for robot in self.robots:
-				EventDispatcher().send_event(LabelChange("bearing"+robot.type, str(robot.bearing)))
-				EventDispatcher().send_event(LabelChange("position"+robot.type, "(" + str(robot.rect.center[0]) + ", " + str(robot.rect.center[1]) + ")"))
-				EventDispatcher().send_event(LabelChange(str("score"+robot.type), str(robot.score)))
+				EventDispatcher().post_event(LabelChange("bearing"+robot.type, str(robot.bearing)))
+				EventDispatcher().post_event(LabelChange("position"+robot.type, "(" + str(robot.rect.center[0]) + ", " + str(robot.rect.center[1]) + ")"))
+				EventDispatcher().post_event(LabelChange(str("score"+robot.type), str(robot.score)))
 
 				points = pygame.sprite.spritecollide(robot, self.landmarks, False)
 				if len(points) > 0:
 					loc = ""
 					for landmark in points:
 						loc += landmark.name + "/"
-					EventDispatcher().send_event(LabelChange("location"+robot.type, loc))
+					EventDispatcher().post_event(LabelChange("location"+robot.type, loc))
 
 				else:
-					EventDispatcher().send_event(LabelChange("location"+robot.type, "N/A"))
+					EventDispatcher().post_event(LabelChange("location"+robot.type, "N/A"))
+
+	def update(self, time, events):
+		self.refresh_layers()
+
+		# entities that moved in the last step are drawn part way between where they were and
+		# where they are now, so movement stays smooth when drawing and stepping don't line up
+		moved = []
+		for entity, (x, y) in self.positions.items():
+			if entity.rect.topleft != (x, y):
+				moved.append((entity, entity.rect))
+				entity.rect = entity.rect.move(int(round((x - entity.rect.x) * (1.0 - self.alpha))), int(round((y - entity.rect.y) * (1.0 - self.alpha))))
+				entity.dirty = 1
+
+		# sprites are drawn with their image at the top left of their rect. a robot's rotated
+		# image is larger than its rect, so the area its image covers is reported as well
+		dirty = [sprite for sprite in self.sprites if sprite.dirty]
+		drawn = [sprite.image.get_rect(topleft=sprite.rect.topleft) for sprite in dirty if sprite.visible]
+		# the map only counts as changed when something other than an ambient animation was redrawn
+		ambient = all(sprite.ambient for sprite in dirty)
+		for rect in self.sprites.draw(self.parent) + drawn:
+			DirtyRects().add(rect, ambient)
+
+		# back to the simulated positions
+		for entity, rect in moved:
+			entity.rect = rect
 
 		#self.parent.blit(self, self.rect)
 
+	def close(self):
+		self.pathfinder.close()
+
 	# override the blit method in case we need to do anything with it later on
 	def blit(self, surface, rect):
 		#if rect.right > self.rect.width: rect.right = self.rect.width
@@ -309,9 +479,15 @@ class GameSurface(Level, IEventHandler):
 		#if rect.bottom > self.rect.height: rect.bottom = self.rect.height
 
 		self.parent.blit(surface, rect)
+		DirtyRects().add(rect)
 
 		#super(Level, self).blit(surface, rect)
 
+	def subscriptions(self):
+		return [(CheckBoxEvent, "displaypath"), (CheckBoxEvent, "displaytreasure"), (CheckBoxEvent, "displaytraps"),
+				(ButtonClickEvent, "menu"), (ButtonClickEvent, "trapreset"),
+				(SliderEvent, "bearing"), (SliderEvent, "velocity"), (SliderEvent, "velocityai")]
+
 	def event_handler(self, event):
 		if event.istype(CheckBoxEvent) and event.name == "displaypath":
 			if event.checked:
@@ -336,10 +512,13 @@ class GameSurface(Level, IEventHandler):
 					robot.velocity = event.slidervalue
 					robot.previous_velocity = event.slidervalue
 			
-		if event.istype(CheckBoxEvent) and event.name == "displaytreasure":
+		# switching a layer on or off only changes what is composited into the background
+		if event.istype(CheckBoxEvent) and event.name == "displaytreasure" and self.display_treasures != event.checked:
 			self.display_treasures = event.checked
-		if event.istype(CheckBoxEvent) and event.name == "displaytraps":
+			self.layer_change(LAYER_TREASURES, self.rect)
+		if event.istype(CheckBoxEvent) and event.name == "displaytraps" and self.display_traps != event.checked:
 			self.display_traps = event.checked
+			self.layer_change(LAYER_TRAPS, self.rect)
 		if event.istype(ButtonClickEvent) and event.name == "trapreset":
 			# do something with flashing indicator
 			for entity in self.known_entities:
@@ -348,10 +527,17 @@ class GameSurface(Level, IEventHandler):
 
 			text = ["Please click anywhere to place a treasure", "Now use the gui to adjust the value of the treasure"]
 			indicator = FlashingIndicator(self, y=20, text=text[random.randint(0, len(text)-1)], duration=-1, colour=(92, 92, 92))
-			self.known_entities.append(indicator)
+			self.add_entity(indicator)
 
+			changed = set()
 			for obstacle in self.obstacles:
 				obstacle.change_position()
+				# only the cells under the old and new positions are re-rasterised
+				changed.update(self.astar.update_obstacle(obstacle))
+
+			# robots part way along a path repair it around the moved traps
+			for robot in self.robots:
+				robot.obstacles_changed(changed)
 
 class PauseMenu(Level):
 
@@ -367,7 +553,5 @@ class PauseMenu(Level):
 		component.name = "resume"
 		self.gui.add_component(component)
 
-		self.init = False
-
 	def update(self, time, events):
 		self.gui.update(time, events)
\ No newline at end of file
@@ -0,0 +1,54 @@
+import json
+import sys
+import pygame
+
+class Allocations(object):
+
+	_instance = None
+
+	# the pygame calls that hand back a new surface
+	creators = set(["copy", "subsurface", "convert", "convert_alpha", "render", "rotate", "rotozoom",
+					"scale", "smoothscale", "flip", "load"])
+
+	def __new__(cls, *args, **kwargs):
+		# singleton design... counts surfaces created anywhere in the process while it is running
+		if not cls._instance:
+			cls._instance = super(Allocations, cls).__new__(cls, *args, **kwargs)
+			cls._instance.counts = {}
+			cls._instance.frames = 0
+			cls._instance.running = False
+		return cls._instance
+
+	def start(self):
+		# counting uses the profiler hook, which sees every call into pygame's c code. it slows
+		# everything down, so it is only switched on to measure
+		self.counts = {}
+		self.frames = 0
+		self.running = True
+		sys.setprofile(self._profile)
+
+	def stop(self):
+		sys.setprofile(None)
+		self.running = False
+
+	def frame(self):
+		if self.running:
+			self.frames += 1
+
+	def _profile(self, frame, event, arg):
+		if event == "c_call" and arg.__name__ in Allocations.creators:
+			owner = getattr(arg, "__self__", None)
+			# surface and font methods, and the image and transform module functions. pygame 2's
+			# module functions have no __self__, only the name of their module
+			if isinstance(owner, pygame.Surface) or isinstance(owner, pygame.font.Font) or arg.__module__ in ("pygame.image", "pygame.transform"):
+				name = arg.__name__
+				self.counts[name] = self.counts.get(name, 0) + 1
+
+	def stats(self):
+		total = sum(self.counts.values())
+		return {"counts": dict(self.counts), "total": total, "frames": self.frames,
+				"per_frame": float(total) / self.frames if self.frames else 0.0}
+
+	def dump(self, path):
+		with open(path, "w") as output:
+			json.dump(self.stats(), output, indent=2)
@@ -0,0 +1,134 @@
+import pygame
+
+class Assets(object):
+
+	_instance = None
+
+	def __new__(cls, *args, **kwargs):
+		# singleton design... every image is loaded once and shared from here
+		if not cls._instance:
+			cls._instance = super(Assets, cls).__new__(cls, *args, **kwargs)
+			# path -> loaded surface, and (path, rects) -> list of frames cut from it
+			cls._instance.images = {}
+			cls._instance.atlases = {}
+			# paths loaded before there was a display to convert them to
+			cls._instance.unconverted = set()
+			cls._instance.loads = 0
+			cls._instance.hits = 0
+			cls._instance.conversions = 0
+			# (path, step) -> RotationCache
+			cls._instance.rotation_caches = {}
+		return cls._instance
+
+	def _convert(self, surface):
+		# match the display's pixel format, keeping per pixel alpha where the image has it
+		self.conversions += 1
+		if surface.get_flags() & pygame.SRCALPHA:
+			return surface.convert_alpha()
+		return surface.convert()
+
+	def image(self, path):
+		# the surface for an image file, shared between everything that asks for it, so
+		# anything that draws onto it has to take a copy first
+		if path in self.images:
+			self.hits += 1
+			return self.images[path]
+		self.loads += 1
+		surface = pygame.image.load(path)
+		if pygame.display.get_surface() is not None:
+			surface = self._convert(surface)
+		else:
+			self.unconverted.add(path)
+		self.images[path] = surface
+		return surface
+
+	def atlas(self, path, rects):
+		# the frames at rects within a sprite sheet. the list returned is shared and is
+		# refilled in place when the sheet is converted, so keep the list rather than
+		# copying its frames out of it
+		key = (path, tuple(tuple(rect) for rect in rects))
+		if key in self.atlases:
+			self.hits += 1
+			return self.atlases[key]
+		sheet = self.image(path)
+		frames = [sheet.subsurface(rect) for rect in key[1]]
+		self.atlases[key] = frames
+		return frames
+
+	def rotations(self, path, step=2.0, prerender=False):
+		# the rotated frames of an image, shared by everything drawn with the same image and step
+		key = (path, step)
+		if key not in self.rotation_caches:
+			self.rotation_caches[key] = RotationCache(self.image(path), step, prerender)
+		return self.rotation_caches[key]
+
+	def convert_all(self):
+		# convert anything loaded before the display existed, called once a display mode is set
+		if pygame.display.get_surface() is None:
+			return
+		for path in self.unconverted:
+			self.images[path] = self._convert(self.images[path])
+		for key, frames in self.atlases.items():
+			if key[0] in self.unconverted:
+				sheet = self.images[key[0]]
+				frames[:] = [sheet.subsurface(rect) for rect in key[1]]
+		# frames rotated from the unconverted images are rendered again
+		for (path, step), cache in self.rotation_caches.items():
+			if path in self.unconverted:
+				cache.set_image(self.images[path])
+		self.unconverted = set()
+
+	def stats(self):
+		size = 0
+		for surface in self.images.values():
+			size += surface.get_width() * surface.get_height() * surface.get_bytesize()
+		return {"images": len(self.images), "atlases": len(self.atlases), "loads": self.loads,
+				"hits": self.hits, "conversions": self.conversions, "unconverted": len(self.unconverted),
+				"bytes": size, "rotations": [cache.stats() for cache in self.rotation_caches.values()]}
+
+class RotationCache(object):
+
+	# an image rotated in fixed steps of step degrees. at most 360 / step frames are ever kept,
+	# rendered as they are first asked for unless prerender is set, and the frame nearest to
+	# the angle asked for is served
+	def __init__(self, image, step=2.0, prerender=False):
+		self.step = max(float(step), 1.0)
+		self.count = int(round(360.0 / self.step))
+		self.step = 360.0 / self.count
+		self.prerender = prerender
+		self.hits = 0
+		self.misses = 0
+		self.set_image(image)
+
+	def set_image(self, image):
+		self.image = image
+		self.frames = [None] * self.count
+		if self.prerender:
+			for index in range(self.count):
+				self._render(index)
+
+	def _render(self, index):
+		self.frames[index] = pygame.transform.rotate(self.image, index * self.step)
+		return self.frames[index]
+
+	def frame(self, angle):
+		# the frame for an anticlockwise rotation of angle degrees, like pygame.transform.rotate
+		index = int(round(angle / self.step)) % self.count
+		frame = self.frames[index]
+		if frame is None:
+			self.misses += 1
+			return self._render(index)
+		self.hits += 1
+		return frame
+
+	def stats(self):
+		frames = [frame for frame in self.frames if frame is not None]
+		size = 0
+		for frame in frames:
+			size += frame.get_width() * frame.get_height() * frame.get_bytesize()
+		# the most a full set of frames can take, each no bigger than the image's diagonal squared
+		width, height = self.image.get_size()
+		bound = self.count * (width * width + height * height) * self.image.get_bytesize()
+		lookups = self.hits + self.misses
+		return {"step": self.step, "frames": len(frames), "max_frames": self.count, "bytes": size,
+				"max_bytes": bound, "hit_rate": float(self.hits) / lookups if lookups else 0.0}
@@ -9,6 +9,13 @@ SOFTWARE_VERSION = "v1.01"
 LEVEL_MAIN_MENU = 0
 LEVEL_GAME = 1
 
+# draw order of the entities on the map, layer 0 is the map itself which is drawn as the
+# background of the sprite group
+LAYER_TRAPS = 1
+LAYER_TREASURES = 2
+LAYER_ROBOTS = 3
+LAYER_INDICATORS = 4
+
 # constant arrays used for distance calculations
 angles = [0, 90, 180, 270, 360]
 azimuth = [0, 180, 180, 360]
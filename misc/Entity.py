@@ -1,8 +1,11 @@
 from misc.Constants import *
-import random, pygame, copy, time, threading, Queue
+import random, pygame, copy, time
 from abc import ABCMeta, abstractmethod
 from event.EventHandler import *
 from event.Events import *
+from misc.path.dstarlite import DStarLite
+from misc.Assets import Assets
+from misc.Fonts import Fonts
 
 # holds information about a landmark
 class Landmark(object):
@@ -15,6 +18,9 @@ class Entity(object):
 
 	__metaclass__ = ABCMeta
 
+	# entities that animate on their own, like a flashing cloud, rather than moving or changing
+	ambient = False
+
 	def __init__(self):
 		self.remove = False
 
@@ -23,11 +29,16 @@ class Entity(object):
 	def update(self, time, events):
 		raise NotImplementedError("Subclasses must implement the abstract method")
 
-class RemovableEntity(Entity, pygame.sprite.Sprite):
+# entities are drawn by the map's layered sprite group, which redraws a sprite when it is
+# marked dirty and restores the map behind wherever it was before
+class RemovableEntity(Entity, pygame.sprite.DirtySprite):
+
+	# indicators are drawn above everything else on the map
+	_layer = LAYER_INDICATORS
 
 	def __init__(self):
 		Entity.__init__(self)
-		pygame.sprite.Sprite.__init__(self)
+		pygame.sprite.DirtySprite.__init__(self)
 
 class ScoreIndicator(RemovableEntity):
 
@@ -37,11 +48,10 @@ class ScoreIndicator(RemovableEntity):
 		# put the treasure at a random position on the map
 		self.x, self.y = x, y
 		# get the image path from the json settings and load it
-		self.font = pygame.font.SysFont(MAIN_FONT, 16)
+		self.font = Fonts().sysfont(MAIN_FONT, 16)
 
-		self.image = self.font.render(" + " + str(score), 1, colour)
+		self.image = Fonts().render(self.font, " + " + str(score), colour)
 		self.rect = pygame.Rect(self.x, self.y, self.image.get_rect().width, self.image.get_rect().height)
-		self.previous_rect = self.rect.copy()
 
 		# move the text 30 pixels
 		self.movement = 30
@@ -53,8 +63,6 @@ class ScoreIndicator(RemovableEntity):
 
 	def update(self, timer, events):
 
-		self.previous_rect = self.rect.copy()
-
 		self.timer += timer
 		if self.timer > 1:
 			# remove the object from the list on the next cycle
@@ -66,7 +74,7 @@ class ScoreIndicator(RemovableEntity):
 
 		#self.image.set_alpha(self.current_alpha)
 
-		self.parent.blit(self.image, self.rect)
+		self.dirty = 1
 
 class ScoreRemoveIndicator(RemovableEntity):
 
@@ -76,11 +84,10 @@ class ScoreRemoveIndicator(RemovableEntity):
 		# put the treasure at a random position on the map
 		self.x, self.y = x, y
 		# get the image path from the json settings and load it
-		self.font = pygame.font.SysFont(MAIN_FONT, 16)
+		self.font = Fonts().sysfont(MAIN_FONT, 16)
 
-		self.image = self.font.render(" - " + str(score), 1, (255, 0, 0))
+		self.image = Fonts().render(self.font, " - " + str(score), (255, 0, 0))
 		self.rect = pygame.Rect(self.x, self.y, self.image.get_rect().width, self.image.get_rect().height)
-		self.previous_rect = self.rect.copy()
 
 		# move the text 30 pixels
 		self.movement = 30
@@ -92,8 +99,6 @@ class ScoreRemoveIndicator(RemovableEntity):
 
 	def update(self, timer, events):
 
-		self.previous_rect = self.rect.copy()
-
 		self.timer += timer
 		if self.timer > 1:
 			# remove the object from the list on the next cycle
@@ -105,18 +110,20 @@ class ScoreRemoveIndicator(RemovableEntity):
 
 		#self.image.set_alpha(self.current_alpha)
 
-		self.parent.blit(self.image, self.rect)
+		self.dirty = 1
 
 
 class FlashingIndicator(RemovableEntity):
 
+	ambient = True
+
 	def __init__(self, parent, y=-1, text="null", duration=-1, colour=(255, 51, 51)):
 		RemovableEntity.__init__(self)
 		self.parent = parent
 		# put the treasure at a random position on the map
 
-		font = pygame.font.SysFont(MAIN_FONT, 12)
-		surface = font.render(text, 1, colour)
+		font = Fonts().sysfont(MAIN_FONT, 12)
+		surface = Fonts().render(font, text, colour)
 
 		mainsurface = pygame.Surface((surface.get_rect().width + 50, surface.get_rect().height + 10))
 		mainsurface.fill((242, 242, 242))
@@ -126,7 +133,6 @@ class FlashingIndicator(RemovableEntity):
 			y = (parent.rect.height/2) - (mainsurface.get_rect().height/2)
 
 		self.rect = pygame.Rect((parent.rect.width/2) - (mainsurface.get_rect().width/2), y, mainsurface.get_rect().width, mainsurface.get_rect().height)
-		self.previous_rect = self.rect.copy()
 
 		self.image = mainsurface
 		self.duration = duration
@@ -152,8 +158,6 @@ class FlashingIndicator(RemovableEntity):
 			if self.remove:
 				return
 
-		self.previous_rect = self.rect.copy()
-
 		self.timer_opaque += timer
 		self.current += timer * self.direction * self.amount
 
@@ -168,24 +172,21 @@ class FlashingIndicator(RemovableEntity):
 			self.current = 50
 
 		self.image.set_alpha(math.ceil(self.current))
-		self.parent.blit(self.image, self.rect)
+		self.dirty = 1
 
 # treasure class extending entity and sprite class within the pygame library
 # holds information about any given treasure on the map
 class Treasure(Entity, pygame.sprite.Sprite):
 
 	sprites = None
+	_layer = LAYER_TREASURES
 
 	def __init__(self, parent):
 		Entity.__init__(self)
 		pygame.sprite.Sprite.__init__(self)
 
 		if Treasure.sprites is None:
-			sprites = pygame.image.load("assets/img/treasure_sprites.png")
-			Treasure.sprites = [sprites.subsurface(0, 0, 32, 32)
-								, sprites.subsurface(32, 0, 32, 32)
-								, sprites.subsurface(64, 0, 32, 32)]
-			self.sprites = Treasure.sprites
+			Treasure.sprites = Assets().atlas("assets/img/treasure_sprites.png", [(0, 0, 32, 32), (32, 0, 32, 32), (64, 0, 32, 32)])
 
 		self.parent = parent
 		# put the treasure at a random position on the map
@@ -194,11 +195,13 @@ class Treasure(Entity, pygame.sprite.Sprite):
 		# get the image path from the json settings and load it
 		self.image = self.sprites[0]
 		self.rect = pygame.Rect(self.x, self.y, self.image.get_rect().width, self.image.get_rect().height)
-		self.previous_rect = self.rect.copy()
 
 		self.score = 0
 		self.set_score(random.randint(0, 990))
 
+		# the path finding node closest to the treasure, set by the map once it is placed
+		self.node = None
+
 	def set_score(self, score):
 		if score < 250:
 			self.image = self.sprites[0]
@@ -207,28 +210,28 @@ class Treasure(Entity, pygame.sprite.Sprite):
 		else:
 			self.image = self.sprites[2]
 		self.score = score
+		# the treasure layer is redrawn with the new image
+		self.parent.layer_changed(self)
 
 	def update(self, timer, events):
-		self.previous_rect = self.rect.copy()
-		# draw the current treasure if the user has opted to display treasures
-		if self.parent.display_treasures:
-			self.parent.blit(self.image, self.rect)
+		# treasures don't move or change on their own, the map keeps them drawn on the
+		# treasure layer
+		pass
 
 # cloud class extends entity and sprite class within pygame library
 # holds information about any given storm/cloud on the map
 class Cloud(Entity, pygame.sprite.Sprite):
 
 	sprites = None
+	_layer = LAYER_TRAPS
+	ambient = True
 
 	def __init__(self, parent):
 		Entity.__init__(self)
 		pygame.sprite.Sprite.__init__(self)
 		# load the cloud sprites into a static variable for reuse
 		if Cloud.sprites == None:
-			sprites = pygame.image.load("assets/img/cloud_sprites.png")
-			Cloud.sprites = [sprites.subsurface(0, 0, 36, 31)
-							, sprites.subsurface(36, 0, 36, 31)
-							, sprites.subsurface(72, 0, 36, 31)]
+			Cloud.sprites = Assets().atlas("assets/img/cloud_sprites.png", [(0, 0, 36, 31), (36, 0, 36, 31), (72, 0, 36, 31)])
 		self.parent = parent
 		self.sprites = Cloud.sprites
 		self.rect = self.sprites[0].get_rect(center=(random.randint(100, parent.rect.width - 100), random.randint(100, parent.rect.height - 100)))
@@ -236,14 +239,12 @@ class Cloud(Entity, pygame.sprite.Sprite):
 		self.flash_period = random.uniform(0.5, 1)
 		self.current_image = 0
 		self.image = self.sprites[self.current_image]
-		self.previous_rect = self.rect.copy()
 		self.in_collision = False
 
 	def update(self, time, events):
 		if not self.parent.display_traps:
 			return
 
-		self.previous_rect = self.rect.copy()
 		self.timer += time
 
 		# if the flash period has been exceeded, generate a new flash period and change the cloud sprite
@@ -258,26 +259,33 @@ class Cloud(Entity, pygame.sprite.Sprite):
 					self.current_image = rand
 					gen = True
 			self.image = self.sprites[self.current_image]
-
-		self.parent.blit(self.image, self.rect)
+			self.parent.layer_changed(self)
 
 	def generate_flash_period(self):
 		self.flash_period = random.uniform(0.5, 1)
 
 	def change_position(self):
+		previous = self.rect
 		self.rect = self.sprites[0].get_rect(center=(random.randint(100, self.parent.rect.width - 100), random.randint(100, self.parent.rect.height - 100)))
+		self.parent.layer_changed(self, previous)
 
 
-class Robot(Entity, pygame.sprite.Sprite, IEventHandler):
+class Robot(Entity, pygame.sprite.DirtySprite, IEventHandler):
+
+	_layer = LAYER_ROBOTS
 
 	def __init__(self, parent, x=150, y=150):
 		Entity.__init__(self)
-		pygame.sprite.Sprite.__init__(self)
+		pygame.sprite.DirtySprite.__init__(self)
 		IEventHandler.__init__(self)
 
 		self.type = ""
-		self.image = pygame.image.load("assets/img/plane.png")
-		self.image_static = self.image.copy()
+		# every robot shares the same plane image, it is only ever rotated and never drawn on
+		self.image_static = Assets().image("assets/img/plane.png")
+		self.image = self.image_static
+		# the plane pre-rotated in steps, so turning doesn't rotate the image every frame
+		rendering = json_settings["rendering"]
+		self.rotations = Assets().rotations("assets/img/plane.png", rendering["rotation_step"], rendering["prerender_rotations"])
 		self.rect = self.image.get_rect().copy()
 		self.rect.x = 50
 		self.rect.y = 50
@@ -291,11 +299,12 @@ class Robot(Entity, pygame.sprite.Sprite, IEventHandler):
 
 		self.parent = parent
 
-		self.previous_rect = self.rect.copy()
-
 		self.collisioncount = 0
 		self.score = 0
 
+	def subscriptions(self):
+		return [(LightChangeEvent, None)]
+
 	def event_handler(self, event):
 		
 		if event.istype(LightChangeEvent) and event.status is 0:
@@ -309,6 +318,10 @@ class Robot(Entity, pygame.sprite.Sprite, IEventHandler):
 		if event.istype(LightChangeEvent) and event.status is 2:
 			self.velocity = self.previous_velocity
 
+	# called by the map with the ids of the path finding cells that became blocked or free
+	def obstacles_changed(self, changed):
+		pass
+
 	# encapsulation - bearing must be maintained between 0 and 360 degrees
 	def set_bearing(self, value):
 		if value > 360: value -= 360
@@ -360,8 +373,7 @@ class RobotManual(Robot):
 
 	def update(self, time, events):
 
-		self.previous_rect = self.rect.copy()
-
+		previous = (self.rect.topleft, self.image)
 		self.timer += time
 
 		if self.timer > 2 and not self.velocity == 0:
@@ -378,7 +390,7 @@ class RobotManual(Robot):
 		self.rect.x = self.x
 		self.rect.y = self.y
 
-		self.image = pygame.transform.rotate(self.image_static, abs(360 - self.bearing))
+		self.image = self.rotations.frame(abs(360 - self.bearing))
 		self.rect = self.image.get_rect(center=self.rect.center)
 
 		# if the robot is out of the bounds of the map, change its bearing
@@ -391,7 +403,8 @@ class RobotManual(Robot):
 		if update:
 			self.set_bearing(self.bearing + 45)
 
-		self.parent.blit(self.image, self.rect)
+		if (self.rect.topleft, self.image) != previous:
+			self.dirty = 1
 
 class RobotAI(Robot):
 
@@ -405,47 +418,47 @@ class RobotAI(Robot):
 		self.xg = True
 		self.yg = True
 
-		self.paththread = None
-		self.threadqueue = Queue.Queue()
+		self.pathrequest = None
 		self.pathnodes = []
 		self.pathdone = True
 
 		self.treasure = None
+		# the node being travelled to and the incremental planner used to repair the path
+		# towards it when obstacles move
+		self.goal = None
+		self.planner = None
 
 	def update(self, time, events):
 
-		self.previous_rect = self.image.get_rect(x=self.rect.x, y=self.rect.y)
-		
+		previous = (self.rect.topleft, self.image)
+
 		# if no path exists, start to calculate a new path to a random treasure
 		if len(self.pathnodes) == 0:
-			if self.paththread == None or not self.paththread.is_alive():
+			if self.pathrequest is None:
 				if len(self.parent.treasures) > 0 and self.pathdone:
 					self.pathdone = False
 					start_node = self.parent.nodegraph.find_closest_node(self.rect.center[0], self.rect.center[1])
 
-					min_treasure = None
-					min_distance = None
-					for treasure in self.parent.treasures:
-						distance = math.hypot(abs(start_node.xpos - treasure.rect.center[0]), abs(start_node.ypos - treasure.rect.center[1]))
-						if min_treasure is None or distance < min_distance:
-							min_treasure = treasure
-							min_distance = distance
-
-					if min_treasure is not None:
-						self.paththread = threading.Thread(target=self.parent.astar.search_thread, args=(start_node, self.parent.nodegraph.find_closest_node(min_treasure.rect.center[0], min_treasure.rect.center[1]), self.rect, self.parent, self.threadqueue))
-						self.paththread.start()
-						self.treasure = treasure
-		# check the queue to see if any of the paths have been found
-		try:
-			new_path = self.threadqueue.get_nowait()
+					# head for the first stop of the best tour over the treasures, planned with
+					# the real path distances and the treasure scores
+					route = self.parent.routeplanner.plan(start_node, self.parent.treasures)
+
+					if len(route) > 0:
+						# the search runs in the path finding service's worker processes
+						self.pathrequest = self.parent.pathfinder.submit(start_node, route[0].node, self.rect)
+						self.treasure = route[0]
+						self.goal = route[0].node
+		# check to see if the requested path has been found
+		if self.pathrequest is not None and self.pathrequest.done():
+			# only the corners of the path are needed to steer along it
+			new_path = self.parent.smoother.smooth(self.pathrequest.result())
+			self.pathrequest = None
 			if not new_path == None:
 				for item in new_path:
 					self.pathnodes.append((item.xpos, item.ypos))
 				self.determine_direction(self.rect.center, self.pathnodes.pop(0))
 			else:
 				self.pathdone = True
-		except Queue.Empty:
-			pass
 		
 		# determine dx and dy from the current bearing
 		bearing = bearing_conversion(self.bearing, self.velocity * time)
@@ -467,16 +480,58 @@ class RobotAI(Robot):
 			self.rect.y = self.y
 
 			# if a path exists, determine the bearing to take from the current location
-			# to the next node in the path array
+			# to the next node in the path array. the path is complete once the last node
+			# has been reached, rather than when it is taken from the array, as with
+			# smoothed paths it can still be a long way off
 			if not len(self.pathnodes) == 0:
 				self.determine_direction(self.rect.center, self.pathnodes.pop(0))
-				if len(self.pathnodes) == 0:
-					self.pathdone = True
+			else:
+				self.pathdone = True
 			# if the treasure no longer exists, empty the path and change the path status to complete
 			# so that a new path is calculated
 			if self.treasure not in self.parent.treasures:
 				self.pathdone = True
 				self.pathnodes = []
 		# transform the original image according to the current bearing
-		self.image = pygame.transform.rotate(self.image_static, abs(360 - self.bearing))
-		self.parent.blit(self.image, self.rect)
+		self.image = self.rotations.frame(abs(360 - self.bearing))
+		# a robot that has stopped isn't redrawn
+		if (self.rect.topleft, self.image) != previous:
+			self.dirty = 1
+
+	def obstacles_changed(self, changed):
+		# the planner's search state has to see every change, even while it isn't being used,
+		# or it could be reused later with costs that don't match the grid
+		if self.planner is not None:
+			self.planner.update_cells(changed)
+		# a path still being searched for may have been found against the old grid, so
+		# drop it and request a new one
+		if self.pathrequest is not None:
+			self.pathrequest = None
+			self.pathdone = True
+			return
+		if len(self.pathnodes) == 0 or self.goal is None:
+			return
+
+		# keep following the current path unless it now runs through a blocked cell
+		nodes = self.parent.astar.nodes
+		waypoints = [nodes[node_id] for node_id in self.parent.nodegraph.find_closest_nodes([self.target] + self.pathnodes)]
+		if self.parent.smoother.is_clear(waypoints):
+			return
+
+		# repair the path from the robot's current node, the planner keeps its search state
+		# for the goal so later changes only touch the affected nodes
+		start_node = self.parent.nodegraph.find_closest_node(self.rect.center[0], self.rect.center[1])
+		if self.planner is None or self.planner.goal != self.goal.id:
+			self.planner = DStarLite(self.parent.astar, start_node, self.goal)
+			new_path = self.planner.path()
+		else:
+			new_path = self.planner.plan(start_node)
+		new_path = self.parent.smoother.smooth(new_path)
+
+		self.pathnodes = []
+		if new_path is None:
+			self.pathdone = True
+			return
+		for item in new_path:
+			self.pathnodes.append((item.xpos, item.ypos))
+		self.determine_direction(self.rect.center, self.pathnodes.pop(0))
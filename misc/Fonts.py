@@ -0,0 +1,56 @@
+import pygame
+from collections import OrderedDict
+
+class Fonts(object):
+
+	_instance = None
+
+	def __new__(cls, *args, **kwargs):
+		# singleton design... fonts and rendered text are shared by the whole process
+		if not cls._instance:
+			cls._instance = super(Fonts, cls).__new__(cls, *args, **kwargs)
+			# (path, size) or ("sys", name, size) -> font
+			cls._instance.fonts = {}
+			# (font, text, colour, antialias) -> rendered surface, least recently used first
+			cls._instance.cache = OrderedDict()
+			cls._instance.cache_size = 256
+			cls._instance.hits = 0
+			cls._instance.misses = 0
+			cls._instance.font_hits = 0
+		return cls._instance
+
+	def font(self, path, size):
+		key = (path, size)
+		if key in self.fonts:
+			self.font_hits += 1
+		else:
+			self.fonts[key] = pygame.font.Font(path, size)
+		return self.fonts[key]
+
+	def sysfont(self, name, size):
+		key = ("sys", name, size)
+		if key in self.fonts:
+			self.font_hits += 1
+		else:
+			self.fonts[key] = pygame.font.SysFont(name, size)
+		return self.fonts[key]
+
+	def render(self, font, text, colour, antialias=True):
+		# the rendered surface is shared with everything else that renders the same text,
+		# so anything that changes it (e.g. set_alpha) has to take a copy first
+		key = (font, text, tuple(colour), bool(antialias))
+		surface = self.cache.pop(key, None)
+		if surface is None:
+			self.misses += 1
+			surface = font.render(text, antialias, colour)
+			if len(self.cache) >= self.cache_size:
+				self.cache.popitem(last=False)
+		else:
+			self.hits += 1
+		self.cache[key] = surface
+		return surface
+
+	def stats(self):
+		lookups = self.hits + self.misses
+		return {"fonts": len(self.fonts), "font_hits": self.font_hits, "hits": self.hits, "misses": self.misses,
+				"size": len(self.cache), "hit_rate": float(self.hits) / lookups if lookups else 0.0}
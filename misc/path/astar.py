@@ -1,142 +1,269 @@
 import pygame
-from itertools import product
+from heapq import heappush, heappop
+from collections import OrderedDict
+from array import array
 import math, random
+from misc.path.occupancy import OccupancyGrid
+
+def grid_dimensions(size, spacing):
+	# the number of nodes across and down a map of size pixels with a node every spacing
+	# pixels, including both edges
+	return size[0] // spacing + 1, size[1] // spacing + 1
 
 class NodeGraph(object):
 
-	def __init__(self, parent):
+	def __init__(self, parent, spacing=20, width=None, height=None):
 		self.nodes = None
 		self.graph = None
 		self.parent = parent
-		self.init_map()
+		self.spacing = spacing
+		# unless given, the dimensions cover the parent's map
+		if width is None:
+			width = grid_dimensions(parent.rect.size, spacing)[0]
+		if height is None:
+			height = grid_dimensions(parent.rect.size, spacing)[1]
+		self.init_map(width, height)
 
 	def init_map(self, width=31, height=41):
-		nodes = [[AStarGridNode(x, y) for y in range(height)] for x in range(width)]
-		graph = {}
-		for x, y in product(range(width), range(height)):
-			node = nodes[x][y]
-			graph[node] = []
-			# loop for each adjacent node to the current node
-			for i, j in product([-1, 0, 1], [-1, 0, 1]):
-				# if the adjacent node is out of range, ignore it
-				if not (0 <= x + i < width): continue
-				if not (0 <= y + j < height): continue
-
-				# add the adjacent node to the dictionary associating it to the index of the parent
-				# (current) node
-				graph[nodes[x][y]].append(nodes[x+i][y+j])
-				nodes[x+i][y+j].xpos = ((x+i)*20)
-				nodes[x+i][y+j].ypos = ((y+j)*20)
-		self.nodes = nodes
-		self.graph = graph
+		self.graph = GridGraph(width, height, self.spacing)
+		# the nodes are also kept by column and row for looking them up by position
+		self.nodes = [self.graph.nodes[x * height:(x + 1) * height] for x in range(width)]
+
+	def find_closest_node(self, x, y):
+		# snap the coordinates to the nearest node, anything off the map goes to its edge
+		column = min(max(int(math.floor(float(x) / self.spacing + 0.5)), 0), self.graph.width - 1)
+		row = min(max(int(math.floor(float(y) / self.spacing + 0.5)), 0), self.graph.height - 1)
+		return self.nodes[column][row]
+
+	def find_closest_nodes(self, coords):
+		# the id of the closest node to each (x, y) in coords, resolved in a single pass
+		spacing = float(self.spacing)
+		height = self.graph.height
+		max_column, max_row = self.graph.width - 1, height - 1
+		floor = math.floor
+		ids = []
+		for x, y in coords:
+			column = int(floor(x / spacing + 0.5))
+			row = int(floor(y / spacing + 0.5))
+			column = 0 if column < 0 else (max_column if column > max_column else column)
+			row = 0 if row < 0 else (max_row if row > max_row else row)
+			ids.append(column * height + row)
+		return ids
+
+class GridGraph(object):
 
-	def find_closest_node(self, x, y, spacing=20):
-		# find the closest node to the supplied coordinates
-		node = self.nodes[int(spacing * math.ceil(float(x)/spacing)/20)][int(spacing * math.ceil(float(y)/spacing)/20)]
-		# get from the graph dictionary the adjacent nodes to the closest node found
-		node_array = self.graph[node]
+	# the eight neighbours of a grid node and the cost of moving to each of them
+	# (diagonal being 14 and non-diagonal being 10)
+	directions = [(i, j, 14 if i and j else 10) for i in (-1, 0, 1) for j in (-1, 0, 1) if i or j]
 
-		mx, my = 1000, 1000
-		selected_node = None
-		# find the closest node to the supplied coordinates based on the adjacent nodes
-		# of the 'closest' node to the supplied coordinates and return it
-		for node in node_array:
-			if abs(x - node.xpos) < mx or abs(y - node.ypos) < my:
-				selected_node = node
-				mx, my = abs(x - node.xpos), abs(y - node.ypos)
+	def __init__(self, width, height, spacing=20):
+		self.width = width
+		self.height = height
+		self.spacing = spacing
+		# nodes are numbered column by column (x * height + y) so that a node's id can be
+		# used to index flat per-search arrays
+		self.nodes = [AStarGridNode(x, y, x * height + y, x * spacing, y * spacing) for x in range(width) for y in range(height)]
+		# adjacency in compressed sparse row form: the neighbours of node i are the ids in
+		# neighbours[offsets[i]:offsets[i + 1]], with their move costs at the same positions
+		# in costs
+		self.offsets = array("i", [0])
+		self.neighbours = array("i")
+		self.costs = bytearray()
+		for x in range(width):
+			for y in range(height):
+				for i, j, cost in GridGraph.directions:
+					if 0 <= x + i < width and 0 <= y + j < height:
+						self.neighbours.append((x + i) * height + y + j)
+						self.costs.append(cost)
+				self.offsets.append(len(self.neighbours))
 
-		return selected_node
+	def __len__(self):
+		return len(self.nodes)
+
+	def __iter__(self):
+		return iter(self.nodes)
+
+	def __getitem__(self, node):
+		# the adjacent nodes of a node, like the lists of the old dictionary graph
+		nodes = self.nodes
+		return [nodes[i] for i in self.neighbours[self.offsets[node.id]:self.offsets[node.id + 1]]]
 
 class AStar(object):
 
-	def __init__(self, graph):
+	def __init__(self, graph, cache_size=256):
 		self.graph = graph
+		# lookup table from node id to node, used to rebuild paths from the parent array
+		self.nodes = graph.nodes
+		self.occupancy = OccupancyGrid(graph.width, graph.height, graph.spacing)
+		# obstacles (rects or sprites) along with the rect each one was rasterised with
 		self.obstacles = []
+		self.obstacle_rects = []
 		self.object_rect = None
+		# bounded lru cache of found paths keyed by (start id, end id, obstacle version), the
+		# version is bumped whenever the occupancy grid changes so stale paths are never hit
+		self.version = 0
+		self.cache = OrderedDict()
+		self.cache_size = cache_size
+		self.cache_hits = 0
+		self.cache_misses = 0
+
+	def _obstacle_rect(self, obstacle):
+		if isinstance(obstacle, pygame.sprite.Sprite):
+			return obstacle.rect.copy()
+		return pygame.Rect(obstacle)
+
+	def _obstacle_index(self, obstacle):
+		# obstacles are compared by identity as rects compare equal by value
+		for i in range(len(self.obstacles)):
+			if self.obstacles[i] is obstacle:
+				return i
+		raise ValueError("obstacle is not known to the path finder")
+
+	def _obstacles_changed(self, changed):
+		# only a change to the grid can change a path, moving an obstacle somewhere that
+		# doesn't cover any nodes keeps the cached paths
+		if changed:
+			self.version += 1
+			self.cache.clear()
+		return changed
 
 	def remove_obstacle(self, obstacle):
-		self.obstacles.remove(obstacle)
+		i = self._obstacle_index(obstacle)
+		self.obstacles.pop(i)
+		return self._obstacles_changed(self.occupancy.remove_rect(self.obstacle_rects.pop(i)))
 
 	def add_obstacle(self, obstacle):
-		if isinstance(obstacle, pygame.Rect):
+		if isinstance(obstacle, pygame.Rect) or isinstance(obstacle, pygame.sprite.Sprite):
+			rect = self._obstacle_rect(obstacle)
 			self.obstacles.append(obstacle)
-		elif isinstance(obstacle, pygame.sprite.Sprite):
-			self.obstacles.append(obstacle.rect)
+			self.obstacle_rects.append(rect)
+			return self._obstacles_changed(self.occupancy.add_rect(rect))
+		return []
+
+	def update_obstacle(self, obstacle):
+		# re-rasterise an obstacle after it has moved, only the nodes under its old and new
+		# positions are touched. returns the ids of the nodes that changed state
+		i = self._obstacle_index(obstacle)
+		freed = self.occupancy.remove_rect(self.obstacle_rects[i])
+		self.obstacle_rects[i] = self._obstacle_rect(obstacle)
+		blocked = self.occupancy.add_rect(self.obstacle_rects[i])
+		return self._obstacles_changed(list(set(freed) ^ set(blocked)))
+
+	def set_footprint(self, size):
+		# obstacles are dilated by the size of the object that follows the path, so the
+		# grid has to be rebuilt when a different sized object searches
+		if tuple(size) != tuple(self.occupancy.footprint):
+			self.occupancy.rebuild(self.obstacle_rects, tuple(size))
+			self._obstacles_changed(True)
+
+	def cache_stats(self):
+		lookups = self.cache_hits + self.cache_misses
+		return {"hits": self.cache_hits, "misses": self.cache_misses, "size": len(self.cache),
+				"hit_rate": float(self.cache_hits) / lookups if lookups else 0.0}
 
-	def check_collision(self, node, world):
-		rect = self.object_rect.copy()
-		rect.center = (node.xpos, node.ypos)
-		for obstacle in world.obstacles:
-			if rect.colliderect(obstacle):
-				return True
-		return False
+	def check_collision(self, node, world=None):
+		return self.occupancy.is_blocked(node.id)
 
 	def heuristic(self, node, end):
-		return abs(end.x - node.x) + abs(end.y - node.y)
+		# octile distance using the same costs as move_cost (10 straight, 14 diagonal) so the
+		# estimate never overestimates the remaining cost
+		dx, dy = abs(end.x - node.x), abs(end.y - node.y)
+		return 10 * (dx + dy) - 6 * min(dx, dy)
 
-	def search_thread(self, start, end, object_rect, world, q):
-		q.put(self.search(start, end, object_rect, world))
+	def cache_lookup(self, key):
+		# returns (hit, path), a hit can still have a path of None when no route exists
+		if key in self.cache:
+			self.cache_hits += 1
+			# re-insert the entry to mark it as the most recently used
+			path = self.cache.pop(key)
+			self.cache[key] = path
+			return True, path
+		self.cache_misses += 1
+		return False, None
+
+	def cache_store(self, key, path):
+		# a path found against an older version of the grid is not worth keeping
+		if key[2] != self.version:
+			return
+		self.cache[key] = path
+		if len(self.cache) > self.cache_size:
+			self.cache.popitem(last=False)
 
 	def search(self, start, end, object_rect, world):
 		self.object_rect = object_rect
-		openset = set()
-		closedset = set()
-		current = start
-		openset.add(current)
+		if object_rect is not None:
+			self.set_footprint(object_rect.size)
+
+		key = (start.id, end.id, self.version)
+		hit, path = self.cache_lookup(key)
+		if not hit:
+			path = self._search(start, end)
+			self.cache_store(key, path)
+		# callers are free to modify the path they are given, so hand out a copy
+		return list(path) if path is not None else None
+
+	def _search(self, start, end):
+		nodes = self.nodes
+		offsets, neighbours, costs = self.graph.offsets, self.graph.neighbours, self.graph.costs
+		blocked = self.occupancy.cells
+		end_id, end_x, end_y = end.id, end.x, end.y
+		# all of the search state lives in arrays indexed by node id, nothing is written
+		# to the shared nodes so every search starts from a clean slate
+		g = [None] * len(nodes)
+		parent = [-1] * len(nodes)
+		closedset = bytearray(len(nodes))
+		g[start.id] = 0
+		# the open set is a binary heap of (f, h, id) entries, ties on f favour the node
+		# closest to the end
+		h = self.heuristic(start, end)
+		openset = [(h, h, start.id)]
 		while openset:
-			# find the smallest f value from the list
-			current = min(openset, key=lambda o:o.g + o.h)
-			# if the current node is the end node
-			if current == end:
-				# create an array of path nodes and back-trace appending nodes
+			current = heappop(openset)[2]
+			# a node can be pushed more than once, skip the stale entries
+			if closedset[current]:
+				continue
+			# if the current node is the end node, back-trace the parents to build the path
+			if current == end_id:
 				path = []
-				while current is not start:
-					path.append(current)
-					current = current.parent
-				path.append(current)
-				#return path
+				while current != -1:
+					path.append(nodes[current])
+					current = parent[current]
 				# reverse the array elements
 				return path[::-1]
-			openset.remove(current)
-			closedset.add(current)
-			for node in self.graph[current]:
-				# if the node is in the closed set or the node is an obstacle
-				# then don't process the current node
-				# collision checker if statement
-				#if node in closedset or self.check_collision(node, world):
-				if node in closedset:
+			closedset[current] = 1
+			for i in range(offsets[current], offsets[current + 1]):
+				adjacent = neighbours[i]
+				# if the node is in the closed set or is covered by an obstacle then don't
+				# process it. the end node is always allowed so that a goal next to an
+				# obstacle can still be reached
+				if closedset[adjacent] or (blocked[adjacent] and adjacent != end_id):
 					continue
-				# if the node exists in the openset
-				if node in openset:
-					# calculate its new movement cost from the current node
-					new_g = current.g + current.move_cost(node)
-					# if the current node movement cost is greater than the new move cost
-					# set the new move cost for the node and set its parent as the current node
-					if node.g > new_g:
-						node.g = new_g
-						node.parent = current
-				else:
-					# node does not exist in the openset so calculate the relevant information
-					# and make it exist in the openset
-					node.g = current.g + current.move_cost(node)
-					node.h = self.heuristic(node, end)
-					node.parent = current
-					openset.add(node)
+				# calculate the movement cost from the current node and keep it if it is
+				# cheaper than any found so far
+				new_g = g[current] + costs[i]
+				if g[adjacent] is None or new_g < g[adjacent]:
+					g[adjacent] = new_g
+					parent[adjacent] = current
+					# the heuristic, inlined as it is the hottest part of the search
+					node = nodes[adjacent]
+					dx, dy = abs(end_x - node.x), abs(end_y - node.y)
+					h = 10 * (dx + dy) - 6 * (dx if dx < dy else dy)
+					heappush(openset, (new_g + h, h, adjacent))
 		# no path found, return null
 		return None
 
 class AStarGridNode(object):
 
-	def __init__(self, x, y):
+	__slots__ = ("id", "x", "y", "xpos", "ypos")
+
+	def __init__(self, x, y, id=0, xpos=0, ypos=0):
 
-		self.g = 0
-		self.h = 0
-		self.parent = None
+		self.id = id
 		self.x, self.y = x, y
-		self.xpos, self.ypos = 0, 0
+		self.xpos, self.ypos = xpos, ypos
 
 	def move_cost(self, other):
 		# return the movement cost of the current node relative to another node
 		# (diagonal being 14 and non-diagonal being 10)
 		diagonal = abs(self.x - other.x) == 1 and abs(self.y - other.y) == 1
-		return 14 if diagonal else 10
\ No newline at end of file
+		return 14 if diagonal else 10
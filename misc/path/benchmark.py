@@ -0,0 +1,178 @@
+import random
+import sys
+import timeit
+import pygame
+from array import array
+from itertools import product
+from misc.path.astar import NodeGraph, AStar, GridGraph
+from misc.path.hierarchical import HierarchicalAStar
+
+# microbenchmark for the path finding code, run from the project root with
+#   python -m misc.path.benchmark
+
+# the grid used by the game and one with ten times as many nodes
+GRIDS = [("31x41", 31, 41), ("98x130", 98, 130)]
+
+# the game's 600x800 map at increasingly fine node spacings, for the hierarchical search
+SPACINGS = [20, 10, 5]
+
+class LegacyGridNode(object):
+
+	# the grid node as it was before it had __slots__, including its search state
+
+	def __init__(self, x, y):
+		self.g = 0
+		self.h = 0
+		self.parent = None
+		self.x, self.y = x, y
+		self.xpos, self.ypos = 0, 0
+
+	def move_cost(self, other):
+		diagonal = abs(self.x - other.x) == 1 and abs(self.y - other.y) == 1
+		return 14 if diagonal else 10
+
+def legacy_graph(width, height):
+	# the original dictionary of node -> list of adjacent nodes
+	nodes = [[LegacyGridNode(x, y) for y in range(height)] for x in range(width)]
+	graph = {}
+	for x, y in product(range(width), range(height)):
+		node = nodes[x][y]
+		graph[node] = []
+		for i, j in product([-1, 0, 1], [-1, 0, 1]):
+			if not (0 <= x + i < width): continue
+			if not (0 <= y + j < height): continue
+			graph[nodes[x][y]].append(nodes[x+i][y+j])
+			nodes[x+i][y+j].xpos = ((x+i)*20)
+			nodes[x+i][y+j].ypos = ((y+j)*20)
+	return nodes, graph
+
+def deep_size(obj, seen=None):
+	# approximate memory held by an object and everything reachable from it
+	if seen is None:
+		seen = set()
+	if id(obj) in seen:
+		return 0
+	seen.add(id(obj))
+	size = sys.getsizeof(obj)
+	if isinstance(obj, dict):
+		size += sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+	elif isinstance(obj, (list, tuple, set)):
+		size += sum(deep_size(item, seen) for item in obj)
+	elif isinstance(obj, (array, bytearray, int, float)):
+		pass
+	else:
+		if hasattr(obj, "__dict__"):
+			size += deep_size(obj.__dict__, seen)
+		for slot in getattr(type(obj), "__slots__", ()):
+			size += deep_size(getattr(obj, slot), seen)
+	return size
+
+def main_graph(repeats=3):
+	for label, width, height in GRIDS:
+		legacy = min(timeit.repeat(lambda: legacy_graph(width, height), number=1, repeat=repeats))
+		compact = min(timeit.repeat(lambda: GridGraph(width, height), number=1, repeat=repeats))
+		legacy_memory = deep_size(legacy_graph(width, height))
+		compact_memory = deep_size(GridGraph(width, height))
+		print("%-8s build  dict %7.2f ms  csr %7.2f ms    memory  dict %8.1f kb  csr %8.1f kb" % (label, legacy * 1000, compact * 1000, legacy_memory / 1024.0, compact_memory / 1024.0))
+
+def legacy_search(graph, start, end):
+	# the original search: the open set is a python set scanned with min() on every
+	# iteration, kept here so the heap based search has something to be measured against
+	g, h, parent = {start: 0}, {start: 0}, {}
+	openset = set([start])
+	closedset = set()
+	while openset:
+		current = min(openset, key=lambda o: g[o] + h[o])
+		if current == end:
+			path = []
+			while current is not start:
+				path.append(current)
+				current = parent[current]
+			path.append(current)
+			return path[::-1]
+		openset.remove(current)
+		closedset.add(current)
+		for node in graph[current]:
+			if node in closedset:
+				continue
+			if node in openset:
+				new_g = g[current] + current.move_cost(node)
+				if g[node] > new_g:
+					g[node] = new_g
+					parent[node] = current
+			else:
+				g[node] = g[current] + current.move_cost(node)
+				h[node] = abs(end.x - node.x) + abs(end.y - node.y)
+				parent[node] = current
+				openset.add(node)
+	return None
+
+def path_cost(path):
+	return sum(path[i].move_cost(path[i + 1]) for i in range(len(path) - 1))
+
+def time_searches(search, pairs):
+	start_time = timeit.default_timer()
+	for start, end in pairs:
+		search(start, end)
+	return (timeit.default_timer() - start_time) / len(pairs)
+
+def main(samples=20, seed=1):
+	rnd = random.Random(seed)
+	for label, width, height in GRIDS:
+		nodegraph = NodeGraph(None, 20, width, height)
+		astar = AStar(nodegraph.graph)
+		nodes = astar.nodes
+		legacy_nodes, graph = legacy_graph(width, height)
+		# always include the worst case of one corner to the opposite corner
+		pairs = [(nodes[0], nodes[-1])]
+		pairs += [(rnd.choice(nodes), rnd.choice(nodes)) for i in range(samples - 1)]
+		legacy_pairs = [(legacy_nodes[start.x][start.y], legacy_nodes[end.x][end.y]) for start, end in pairs]
+
+		# both searches are optimal so the path costs have to agree
+		for (start, end), (legacy_start, legacy_end) in zip(pairs, legacy_pairs):
+			assert path_cost(legacy_search(graph, legacy_start, legacy_end)) == path_cost(astar._search(start, end))
+
+		legacy = time_searches(lambda start, end: legacy_search(graph, start, end), legacy_pairs)
+		heap = time_searches(lambda start, end: astar._search(start, end), pairs)
+		# fill the path cache so that the timed lookups are all hits
+		for start, end in pairs:
+			astar.search(start, end, None, None)
+		cached = time_searches(lambda start, end: astar.search(start, end, None, None), pairs)
+		print("%-8s %6d nodes  legacy %8.2f ms  heap %8.2f ms  cached %6.3f ms  speedup %5.1fx" % (label, len(nodes), legacy * 1000, heap * 1000, cached * 1000, legacy / heap))
+
+def random_walls(astar, rnd, count=12):
+	# vertical and horizontal walls spread over the map, so routes have to go around them
+	width, height = astar.occupancy.width * astar.occupancy.spacing, astar.occupancy.height * astar.occupancy.spacing
+	for i in range(count):
+		if i % 2:
+			rect = (rnd.randint(0, width), rnd.randint(0, height), 20, rnd.randint(100, 300))
+		else:
+			rect = (rnd.randint(0, width), rnd.randint(0, height), rnd.randint(100, 300), 20)
+		astar.add_obstacle(pygame.Rect(rect))
+
+def main_hierarchical(samples=20, seed=1, cluster_size=10):
+	for spacing in SPACINGS:
+		rnd = random.Random(seed)
+		nodegraph = NodeGraph(None, spacing, 600 // spacing + 1, 800 // spacing + 1)
+		astar = AStar(nodegraph.graph)
+		random_walls(astar, rnd)
+		hierarchical = HierarchicalAStar(astar, cluster_size)
+		build_start = timeit.default_timer()
+		hierarchical.build()
+		build = timeit.default_timer() - build_start
+		free = [node for node in astar.nodes if not astar.check_collision(node)]
+		pairs = [(rnd.choice(free), rnd.choice(free)) for i in range(samples)]
+		flat = time_searches(lambda start, end: astar._search(start, end), pairs)
+		hpa = time_searches(lambda start, end: hierarchical._search(start, end), pairs)
+		# hierarchical paths are near optimal, report how much longer they are on average
+		ratios = []
+		for start, end in pairs:
+			optimal = astar._search(start, end)
+			if optimal is not None and len(optimal) > 1:
+				ratios.append(float(path_cost(hierarchical._search(start, end))) / path_cost(optimal))
+		print("spacing %2d %6d nodes  a* %8.2f ms  hpa* %6.2f ms  build %7.2f ms  %d entrances  path %.3fx optimal" % (spacing, len(astar.nodes), flat * 1000, hpa * 1000, build * 1000, len(hierarchical.edges), sum(ratios) / len(ratios)))
+
+if __name__ == "__main__":
+	main_graph()
+	main()
+	main_hierarchical()
@@ -0,0 +1,131 @@
+from heapq import heappush, heappop
+
+INFINITY = float("inf")
+
+class DStarLite(object):
+
+	# incremental planner (d* lite) towards a single goal on an AStar grid. the search runs
+	# backwards from the goal so the costs it keeps stay valid as the start moves, and when
+	# cells of the occupancy grid change only the nodes whose costs depend on them are
+	# repaired instead of searching again from scratch
+
+	def __init__(self, astar, start, goal):
+		self.astar = astar
+		self.graph = astar.graph
+		self.height = astar.graph.height
+		self.goal = goal.id
+		self.start = start.id
+		self.last = start.id
+		# the key modifier, grows as the start moves so old queue keys stay lower bounds
+		self.km = 0
+		count = len(self.graph)
+		self.g = [INFINITY] * count
+		self.rhs = [INFINITY] * count
+		self.rhs[self.goal] = 0
+		# the priority queue with lazy deletion, queued holds the current key of each node
+		self.openset = []
+		self.queued = {}
+		self._push(self.goal)
+		# cells that changed since the last plan, applied by the next call to plan()
+		self.changed = set()
+		self.expanded = 0
+		self._compute()
+
+	def heuristic(self, a, b):
+		ax, ay = divmod(a, self.height)
+		bx, by = divmod(b, self.height)
+		dx, dy = abs(ax - bx), abs(ay - by)
+		return 10 * (dx + dy) - 6 * min(dx, dy)
+
+	def _key(self, node_id):
+		cost = min(self.g[node_id], self.rhs[node_id])
+		return (cost + self.heuristic(self.start, node_id) + self.km, cost)
+
+	def _push(self, node_id):
+		key = self._key(node_id)
+		self.queued[node_id] = key
+		heappush(self.openset, (key, node_id))
+
+	def _edges(self, node_id):
+		# (adjacent id, cost of moving there) for every neighbour, entering a blocked node
+		# costs infinity unless it is the goal
+		# the cells are looked up each time, the path finding service swaps them for shared
+		# memory when it starts its workers
+		graph, blocked, goal = self.graph, self.astar.occupancy.cells, self.goal
+		for i in range(graph.offsets[node_id], graph.offsets[node_id + 1]):
+			adjacent = graph.neighbours[i]
+			yield adjacent, (INFINITY if blocked[adjacent] and adjacent != goal else graph.costs[i])
+
+	def _update_node(self, node_id):
+		if node_id != self.goal:
+			g = self.g
+			self.rhs[node_id] = min([cost + g[adjacent] for adjacent, cost in self._edges(node_id)])
+		if self.g[node_id] != self.rhs[node_id]:
+			self._push(node_id)
+		else:
+			self.queued.pop(node_id, None)
+
+	def _top(self):
+		# drop stale queue entries and return the smallest valid one
+		while self.openset:
+			key, node_id = self.openset[0]
+			if self.queued.get(node_id) == key:
+				return key, node_id
+			heappop(self.openset)
+		return None, None
+
+	def _compute(self):
+		g, rhs, start = self.g, self.rhs, self.start
+		while True:
+			key, node_id = self._top()
+			if key is None or (key >= self._key(start) and rhs[start] == g[start]):
+				break
+			self.expanded += 1
+			new_key = self._key(node_id)
+			if key < new_key:
+				self._push(node_id)
+			elif g[node_id] > rhs[node_id]:
+				g[node_id] = rhs[node_id]
+				self.queued.pop(node_id)
+				# the grid is undirected, so the predecessors are the neighbours
+				for adjacent, cost in self._edges(node_id):
+					self._update_node(adjacent)
+			else:
+				g[node_id] = INFINITY
+				self._update_node(node_id)
+				for adjacent, cost in self._edges(node_id):
+					self._update_node(adjacent)
+
+	def move_to(self, start):
+		self.km += self.heuristic(self.last, start.id)
+		self.last = self.start = start.id
+
+	def update_cells(self, node_ids):
+		# cells whose blocked state has changed, applied on the next plan()
+		self.changed.update(node_ids)
+
+	def plan(self, start):
+		# repair the search for the new start and any changed cells, then return the path
+		# from start to the goal as a list of nodes (or None)
+		self.move_to(start)
+		for node_id in self.changed:
+			# the costs of the edges into a changed node depend on it
+			for adjacent, cost in self._edges(node_id):
+				self._update_node(adjacent)
+		self.changed = set()
+		self._compute()
+		return self.path()
+
+	def path(self):
+		nodes, g = self.astar.nodes, self.g
+		current = self.start
+		if g[current] == INFINITY:
+			return None
+		path = [nodes[current]]
+		while current != self.goal:
+			current, cost = min(((adjacent, cost + g[adjacent]) for adjacent, cost in self._edges(current)), key=lambda edge: edge[1])
+			# nowhere left to go that leads to the goal, or going round in circles
+			if cost == INFINITY or len(path) > len(nodes):
+				return None
+			path.append(nodes[current])
+		return path
@@ -0,0 +1,214 @@
+from heapq import heappush, heappop
+
+class HierarchicalAStar(object):
+
+	# hierarchical path finding (hpa*) on top of an AStar grid. the grid is split into square
+	# clusters, the free stretches of each border between two clusters become entrances and
+	# the entrances of a cluster are linked with the cost of travelling between them inside
+	# the cluster. a search runs over this small abstract graph and each abstract step is
+	# then refined to grid nodes with a search bounded to a single cluster
+
+	def __init__(self, astar, cluster_size=10):
+		self.astar = astar
+		self.cluster_size = cluster_size
+		self.width = astar.occupancy.width
+		self.height = astar.occupancy.height
+		# the abstract graph is rebuilt lazily whenever the obstacle version changes
+		self.built_version = None
+		# cluster -> entrance node ids, and node id -> {adjacent entrance id: cost}
+		self.entrances = {}
+		self.edges = {}
+		# entrance id -> parents of the search within its cluster, used to refine edges
+		self.trees = {}
+
+	def cluster_of(self, node_id):
+		x, y = divmod(node_id, self.height)
+		return (x // self.cluster_size, y // self.cluster_size)
+
+	def cluster_bounds(self, cluster):
+		size = self.cluster_size
+		return (cluster[0] * size, cluster[1] * size,
+				min((cluster[0] + 1) * size, self.width) - 1, min((cluster[1] + 1) * size, self.height) - 1)
+
+	def heuristic(self, a, b):
+		# octile distance between two node ids, matching AStar.heuristic
+		ax, ay = divmod(a, self.height)
+		bx, by = divmod(b, self.height)
+		dx, dy = abs(ax - bx), abs(ay - by)
+		return 10 * (dx + dy) - 6 * min(dx, dy)
+
+	def build(self):
+		self.entrances = {}
+		self.edges = {}
+		self.trees = {}
+		size, width, height = self.cluster_size, self.width, self.height
+		# borders between clusters side by side
+		for x in range(size - 1, width - 1, size):
+			for y0 in range(0, height, size):
+				self._add_entrances([(x * height + y, (x + 1) * height + y) for y in range(y0, min(y0 + size, height))])
+		# borders between clusters one above the other
+		for y in range(size - 1, height - 1, size):
+			for x0 in range(0, width, size):
+				self._add_entrances([(x * height + y, x * height + y + 1) for x in range(x0, min(x0 + size, width))])
+		# link every pair of entrances within a cluster that can reach each other
+		for cluster, cells in self.entrances.items():
+			bounds = self.cluster_bounds(cluster)
+			for cell in cells:
+				costs, self.trees[cell] = self._explore(cell, bounds)
+				for other in cells:
+					if other != cell and other in costs:
+						self.edges[cell][other] = costs[other]
+		self.built_version = self.astar.version
+
+	def _add_entrances(self, pairs):
+		# split a border into runs of node pairs that are free on both sides. short runs get
+		# a single transition in the middle, long runs one at each end
+		blocked = self.astar.occupancy.cells
+		run = []
+		for pair in pairs + [None]:
+			if pair is not None and not blocked[pair[0]] and not blocked[pair[1]]:
+				run.append(pair)
+				continue
+			if run:
+				transitions = [run[len(run) // 2]] if len(run) < 6 else [run[0], run[-1]]
+				for a, b in transitions:
+					self._add_transition(a, b)
+				run = []
+
+	def _add_transition(self, a, b):
+		for cell in (a, b):
+			if cell not in self.edges:
+				self.edges[cell] = {}
+				self.entrances.setdefault(self.cluster_of(cell), []).append(cell)
+		# the two nodes of a transition are straight neighbours
+		self.edges[a][b] = 10
+		self.edges[b][a] = 10
+
+	def _explore(self, source, bounds, target=None):
+		# dijkstra from source over the free nodes inside bounds, stopping early once target
+		# is reached. the target is allowed even if blocked, like the end node in AStar
+		x0, y0, x1, y1 = bounds
+		nodes, graph, blocked = self.astar.nodes, self.astar.graph, self.astar.occupancy.cells
+		offsets, neighbours, costs = graph.offsets, graph.neighbours, graph.costs
+		g = {source: 0}
+		parent = {source: -1}
+		closedset = set()
+		openset = [(0, source)]
+		while openset:
+			cost, current = heappop(openset)
+			if current in closedset:
+				continue
+			if current == target:
+				break
+			closedset.add(current)
+			for i in range(offsets[current], offsets[current + 1]):
+				adjacent_id = neighbours[i]
+				if adjacent_id in closedset or (blocked[adjacent_id] and adjacent_id != target):
+					continue
+				adjacent = nodes[adjacent_id]
+				if not (x0 <= adjacent.x <= x1 and y0 <= adjacent.y <= y1):
+					continue
+				new_g = cost + costs[i]
+				if adjacent_id not in g or new_g < g[adjacent_id]:
+					g[adjacent_id] = new_g
+					parent[adjacent_id] = current
+					heappush(openset, (new_g, adjacent_id))
+		return g, parent
+
+	def _backtrack(self, parent, node):
+		# the path from the root of a search to node
+		path = []
+		while node != -1:
+			path.append(node)
+			node = parent[node]
+		return path[::-1]
+
+	def _refine(self, start, end):
+		# the grid path between two node ids of the same cluster, or None
+		g, parent = self._explore(start, self.cluster_bounds(self.cluster_of(start)), end)
+		if end not in g:
+			return None
+		return self._backtrack(parent, end)
+
+	def search(self, start, end, object_rect, world):
+		# same interface and path cache as AStar.search
+		if object_rect is not None:
+			self.astar.set_footprint(object_rect.size)
+		key = (start.id, end.id, self.astar.version)
+		hit, path = self.astar.cache_lookup(key)
+		if not hit:
+			path = self._search(start, end)
+			self.astar.cache_store(key, path)
+		return list(path) if path is not None else None
+
+	def _search(self, start, end):
+		if self.built_version != self.astar.version:
+			self.build()
+		nodes = self.astar.nodes
+		start_id, end_id = start.id, end.id
+		start_cluster, end_cluster = self.cluster_of(start_id), self.cluster_of(end_id)
+
+		# a route within one cluster doesn't need the abstract graph
+		if start_cluster == end_cluster:
+			path = self._refine(start_id, end_id)
+			if path is not None:
+				return [nodes[i] for i in path]
+
+		# temporarily connect the start and end to the entrances of their clusters
+		start_costs, start_tree = self._explore(start_id, self.cluster_bounds(start_cluster))
+		start_links = dict((cell, start_costs[cell]) for cell in self.entrances.get(start_cluster, []) if cell in start_costs)
+		end_costs, end_tree = self._explore(end_id, self.cluster_bounds(end_cluster))
+		end_links = dict((cell, end_costs[cell]) for cell in self.entrances.get(end_cluster, []) if cell in end_costs)
+
+		# a* over the abstract graph
+		g = {start_id: 0}
+		parent = {start_id: -1}
+		closedset = set()
+		openset = [(self.heuristic(start_id, end_id), start_id)]
+		while openset:
+			current = heappop(openset)[1]
+			if current in closedset:
+				continue
+			if current == end_id:
+				break
+			closedset.add(current)
+			links = list(self.edges.get(current, {}).items())
+			if current == start_id:
+				links += list(start_links.items())
+			if current in end_links:
+				links.append((end_id, end_links[current]))
+			for adjacent, cost in links:
+				if adjacent in closedset:
+					continue
+				new_g = g[current] + cost
+				if adjacent not in g or new_g < g[adjacent]:
+					g[adjacent] = new_g
+					parent[adjacent] = current
+					heappush(openset, (new_g + self.heuristic(adjacent, end_id), adjacent))
+		if end_id not in g:
+			# the abstract graph only crosses borders through straight transitions, so
+			# confirm there really is no route with a search over the full grid
+			return self.astar._search(start, end)
+
+		abstract = []
+		current = end_id
+		while current != -1:
+			abstract.append(current)
+			current = parent[current]
+		abstract.reverse()
+
+		# refine each abstract step by walking back through the search trees that produced
+		# its cost, transitions between clusters are already neighbours
+		path = [start_id]
+		for i in range(len(abstract) - 1):
+			a, b = abstract[i], abstract[i + 1]
+			if self.cluster_of(a) != self.cluster_of(b):
+				path.append(b)
+			elif b == end_id:
+				# the end's tree was grown from the end, so its branch is walked in reverse
+				path.extend(self._backtrack(end_tree, a)[::-1][1:])
+			elif i == 0:
+				path.extend(self._backtrack(start_tree, b)[1:])
+			else:
+				path.extend(self._backtrack(self.trees[a], b)[1:])
+		return [nodes[i] for i in path]
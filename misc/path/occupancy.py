@@ -0,0 +1,57 @@
+import math
+from array import array
+
+class OccupancyGrid(object):
+
+	typecode = "H"
+
+	def __init__(self, width, height, spacing=20, footprint=(0, 0)):
+		self.width = width
+		self.height = height
+		self.spacing = spacing
+		self.footprint = footprint
+		# the number of obstacles covering each node, indexed by node id (x * height + y)
+		# so a node is blocked whenever its count is not zero. any indexable array of the
+		# same typecode will do, which lets it be swapped for shared memory. a byte would
+		# overflow once 256 dilated obstacles overlap, so the counts are 16 bit
+		self.cells = array(OccupancyGrid.typecode, [0]) * (width * height)
+
+	def is_blocked(self, node_id):
+		return self.cells[node_id] != 0
+
+	def cells_for_rect(self, rect):
+		# find the ids of the nodes where an object of the footprint size, centred on the
+		# node, would overlap the rect. this is the rect dilated by half the footprint on
+		# each side, with the same strict edges as pygame.Rect.colliderect
+		half_w, half_h = self.footprint[0] / 2.0, self.footprint[1] / 2.0
+		x0 = max(0, int(math.floor((rect.x - half_w) / self.spacing)) + 1)
+		x1 = min(self.width - 1, int(math.ceil((rect.x + rect.width + half_w) / self.spacing)) - 1)
+		y0 = max(0, int(math.floor((rect.y - half_h) / self.spacing)) + 1)
+		y1 = min(self.height - 1, int(math.ceil((rect.y + rect.height + half_h) / self.spacing)) - 1)
+		return [x * self.height + y for x in range(x0, x1 + 1) for y in range(y0, y1 + 1)]
+
+	def add_rect(self, rect):
+		# rasterise the rect into the grid and return the ids of the nodes that became blocked
+		changed = []
+		for node_id in self.cells_for_rect(rect):
+			if self.cells[node_id] == 0:
+				changed.append(node_id)
+			self.cells[node_id] += 1
+		return changed
+
+	def remove_rect(self, rect):
+		# remove a previously added rect and return the ids of the nodes that became free
+		changed = []
+		for node_id in self.cells_for_rect(rect):
+			self.cells[node_id] -= 1
+			if self.cells[node_id] == 0:
+				changed.append(node_id)
+		return changed
+
+	def rebuild(self, rects, footprint=None):
+		# clear the grid and rasterise every rect again, used when the footprint changes
+		if footprint is not None:
+			self.footprint = footprint
+		self.cells[:] = array(OccupancyGrid.typecode, [0]) * len(self.cells)
+		for rect in rects:
+			self.add_rect(rect)
@@ -0,0 +1,108 @@
+from heapq import heappush, heappop
+from itertools import permutations
+
+INFINITY = float("inf")
+
+class RoutePlanner(object):
+
+	# plans the order to collect the treasures on the map in. one dijkstra search per
+	# treasure gives the path distance from every node to that treasure, which makes up a
+	# distance matrix between the robot and all of the treasures. a short tour is then
+	# chosen over the matrix that collects the most score for the distance travelled
+
+	def __init__(self, astar, exact_limit=6):
+		self.astar = astar
+		# tours over this many treasures or fewer are solved exactly, larger ones greedily
+		self.exact_limit = exact_limit
+		# treasure -> path distance from every node id to the treasure's node
+		self.fields = {}
+		self.version = astar.version
+		self.searches = 0
+
+	def distance_field(self, target):
+		# dijkstra outwards from the target giving the cost of reaching it from every node.
+		# a blocked node can be left but not entered, unless it is the target itself
+		graph, blocked = self.astar.graph, self.astar.occupancy.cells
+		offsets, neighbours, costs = graph.offsets, graph.neighbours, graph.costs
+		dist = [INFINITY] * len(graph)
+		dist[target] = 0
+		openset = [(0, target)]
+		while openset:
+			cost, current = heappop(openset)
+			if cost > dist[current] or (blocked[current] and current != target):
+				continue
+			for i in range(offsets[current], offsets[current + 1]):
+				adjacent = neighbours[i]
+				new_cost = cost + costs[i]
+				if new_cost < dist[adjacent]:
+					dist[adjacent] = new_cost
+					heappush(openset, (new_cost, adjacent))
+		self.searches += 1
+		return dist
+
+	def add_treasure(self, treasure):
+		self.fields[treasure] = self.distance_field(treasure.node.id)
+
+	def remove_treasure(self, treasure):
+		self.fields.pop(treasure, None)
+
+	def sync(self, treasures):
+		# bring the matrix up to date with the treasures on the map, only new treasures are
+		# searched unless the obstacles have changed since the fields were built
+		if self.version != self.astar.version:
+			self.fields = {}
+			self.version = self.astar.version
+		for treasure in list(self.fields):
+			if treasure not in treasures:
+				self.remove_treasure(treasure)
+		for treasure in treasures:
+			if treasure not in self.fields:
+				self.add_treasure(treasure)
+
+	def distance(self, node, treasure):
+		return self.fields[treasure][node.id]
+
+	def value(self, start, tour):
+		# the score of each treasure divided by the distance travelled to reach it, so
+		# valuable treasures collected early are worth the most
+		total = 0.0
+		travelled = 0
+		position = start
+		for treasure in tour:
+			travelled += self.distance(position, treasure)
+			total += treasure.score / float(max(travelled, 1))
+			position = treasure.node
+		return total
+
+	def plan(self, start, treasures):
+		# returns the treasures in the order they should be collected from the start node,
+		# leaving out any that can't be reached
+		self.sync(treasures)
+		reachable = [treasure for treasure in treasures if self.distance(start, treasure) != INFINITY]
+		if len(reachable) <= self.exact_limit:
+			return list(max(permutations(reachable), key=lambda tour: self.value(start, tour))) if reachable else []
+
+		# greedily take the best score per distance from the current position...
+		tour = []
+		position = start
+		remaining = list(reachable)
+		while remaining:
+			best = max(remaining, key=lambda treasure: treasure.score / float(max(self.distance(position, treasure), 1)))
+			remaining.remove(best)
+			tour.append(best)
+			position = best.node
+		# ...then keep swapping pairs of stops while it improves the tour
+		best_value = self.value(start, tour)
+		improved = True
+		while improved:
+			improved = False
+			for i in range(len(tour) - 1):
+				for j in range(i + 1, len(tour)):
+					tour[i], tour[j] = tour[j], tour[i]
+					value = self.value(start, tour)
+					if value > best_value:
+						best_value = value
+						improved = True
+					else:
+						tour[i], tour[j] = tour[j], tour[i]
+		return tour
@@ -0,0 +1,150 @@
+import multiprocessing
+from array import array
+from multiprocessing.sharedctypes import RawArray
+from misc.path.astar import NodeGraph, AStar
+from misc.path.hierarchical import HierarchicalAStar
+from misc.path.occupancy import OccupancyGrid
+
+# the path finder owned by each worker process, made by _search_worker for the layout of the
+# grid it is asked to search and kept until a level with a different layout attaches
+_worker_cells = None
+_worker_layout = None
+_worker_astar = None
+_worker_searcher = None
+
+def _init_worker(cells):
+	global _worker_cells
+	# search against the occupancy grid shared with the main process rather than a copy,
+	# so obstacle changes are seen by the workers without sending anything to them
+	_worker_cells = cells
+
+def _search_worker(layout, generation, version, start_id, end_id):
+	global _worker_layout, _worker_astar, _worker_searcher
+	if layout != _worker_layout:
+		width, height, spacing, cluster_size = layout
+		_worker_astar = AStar(NodeGraph(None, spacing, width, height).graph)
+		_worker_astar.occupancy.cells = _worker_cells
+		_worker_searcher = HierarchicalAStar(_worker_astar, cluster_size) if cluster_size else _worker_astar
+		_worker_layout = layout
+	# the main process's obstacle version tells the hierarchical search when to rebuild, and
+	# the generation tells apart the versions of the grids of different levels
+	_worker_astar.version = (generation, version)
+	nodes = _worker_astar.nodes
+	path = _worker_searcher._search(nodes[start_id], nodes[end_id])
+	# only node ids are sent back, the main process maps them to its own nodes
+	return [node.id for node in path] if path is not None else None
+
+class WorkerPool(object):
+
+	_instance = None
+
+	def __new__(cls, *args, **kwargs):
+		# singleton design... the worker processes are started once and shared by every level
+		if not cls._instance:
+			cls._instance = super(WorkerPool, cls).__new__(cls, *args, **kwargs)
+			cls._instance.pool = None
+			cls._instance.cells = None
+			# the service whose grid is in the shared cells, and how many grids have been put there
+			cls._instance.owner = None
+			cls._instance.generation = 0
+		return cls._instance
+
+	def start(self, processes, size):
+		# fork the workers with shared cells for a grid of size nodes. this has to happen before
+		# pygame.init(), a worker forked later would inherit SDL's state and the fork stalls a
+		# frame. None is one worker per core but one, 0 starts none
+		if self.pool is not None:
+			return
+		if processes is None:
+			processes = max(1, multiprocessing.cpu_count() - 1)
+		if processes <= 0:
+			return
+		self.cells = RawArray(OccupancyGrid.typecode, size)
+		self.pool = multiprocessing.Pool(processes, _init_worker, (self.cells,))
+
+	def stop(self):
+		if self.pool is not None:
+			self.pool.terminate()
+			self.pool.join()
+		self.pool = None
+		self.cells = None
+		self.owner = None
+
+	def attach(self, service):
+		# copy a service's grid into the shared cells and hand it the workers. the grid has to
+		# be the size the cells were made for
+		occupancy = service.astar.occupancy
+		if self.pool is None or len(occupancy.cells) != len(self.cells):
+			return False
+		self.cells[:] = list(occupancy.cells)
+		occupancy.cells = self.cells
+		self.owner = service
+		self.generation += 1
+		return True
+
+	def detach(self, service):
+		# the service keeps a copy of its grid, the shared cells are left for the next one
+		if self.owner is service:
+			occupancy = service.astar.occupancy
+			occupancy.cells = array(OccupancyGrid.typecode, occupancy.cells)
+			self.owner = None
+
+class PathFuture(object):
+
+	def __init__(self, service, key, path=None, async_result=None):
+		self.service = service
+		self.key = key
+		self.path = path
+		self.async_result = async_result
+
+	def done(self):
+		return self.async_result is None or self.async_result.ready()
+
+	def result(self):
+		# block until the path is available and return it as a list of nodes (or None)
+		if self.async_result is not None:
+			ids = self.async_result.get()
+			self.async_result = None
+			nodes = self.service.astar.nodes
+			self.path = [nodes[i] for i in ids] if ids is not None else None
+			self.service.astar.cache_store(self.key, self.path)
+		return list(self.path) if self.path is not None else None
+
+class PathfindingService(object):
+
+	def __init__(self, astar, processes=None, cluster_size=0):
+		self.astar = astar
+		# a cluster size switches on hierarchical search, used for large or fine grids
+		self.cluster_size = cluster_size
+		self.searcher = HierarchicalAStar(astar, cluster_size) if cluster_size else astar
+		# searches run in the worker pool started with the game, unless processes is 0 or
+		# there is no pool. a later service taking over the pool leaves this one inline
+		self.pool = None
+		if processes != 0 and WorkerPool().attach(self):
+			self.pool = WorkerPool()
+			occupancy = astar.occupancy
+			self.layout = (occupancy.width, occupancy.height, occupancy.spacing, cluster_size)
+			self.generation = WorkerPool().generation
+
+	def submit(self, start, end, object_rect):
+		# request a path from start to end, returning a PathFuture that can be polled
+		# with done() from the main loop
+		if object_rect is not None:
+			self.astar.set_footprint(object_rect.size)
+		key = (start.id, end.id, self.astar.version)
+		hit, path = self.astar.cache_lookup(key)
+		if hit:
+			return PathFuture(self, key, path=path)
+		if self.pool is None or self.pool.owner is not self:
+			# no worker processes, search in the calling thread
+			path = self.searcher._search(start, end)
+			self.astar.cache_store(key, path)
+			return PathFuture(self, key, path=path)
+		return PathFuture(self, key, async_result=self.pool.pool.apply_async(_search_worker,
+							(self.layout, self.generation, self.astar.version, start.id, end.id)))
+
+	def close(self):
+		# the workers are kept for the next level
+		if self.pool is not None:
+			self.pool.detach(self)
+			self.pool = None
@@ -0,0 +1,85 @@
+import math
+
+class PathSmoother(object):
+
+	# post-processing for grid paths: runs of nodes in a straight line, and nodes that can
+	# be seen past on the occupancy grid, are pulled out of the path so whatever follows it
+	# steers along a few long segments instead of one per grid node
+
+	def __init__(self, astar):
+		self.astar = astar
+		self.height = astar.graph.height
+		# the waypoint counts before and after smoothing, for the last path and in total
+		self.last = (0, 0)
+		self.total_in = 0
+		self.total_out = 0
+
+	def line_of_sight(self, a, b):
+		# sample the segment from node a to node b every half a node and check the nodes at
+		# the corners of the square each sample falls in. the end node is allowed to be
+		# blocked, like the end node of a search
+		blocked, height = self.astar.occupancy.cells, self.height
+		dx, dy = b.x - a.x, b.y - a.y
+		steps = 2 * max(abs(dx), abs(dy))
+		for step in range(1, steps):
+			fx = a.x + dx * step / float(steps)
+			fy = a.y + dy * step / float(steps)
+			for x in set([int(math.floor(fx)), int(math.ceil(fx))]):
+				for y in set([int(math.floor(fy)), int(math.ceil(fy))]):
+					node_id = x * height + y
+					if blocked[node_id] and node_id != b.id:
+						return False
+		return True
+
+	def smooth(self, path):
+		# returns a new list of nodes, the first and last nodes of the path are always kept
+		if path is None or len(path) < 3:
+			return path
+		result = [path[0]]
+		anchor = 0
+		straight = True
+		for i in range(2, len(path)):
+			# nodes in a straight line from the anchor can always be dropped, otherwise the
+			# anchor has to be able to see the node to skip the ones in between
+			if straight:
+				straight = self._step(path, i) == self._step(path, anchor + 1)
+			if not straight and not self.line_of_sight(path[anchor], path[i]):
+				result.append(path[i - 1])
+				anchor = i - 1
+				straight = True
+		result.append(path[-1])
+
+		self.last = (len(path), len(result))
+		self.total_in += len(path)
+		self.total_out += len(result)
+		return result
+
+	def _step(self, path, i):
+		return (path[i].x - path[i - 1].x, path[i].y - path[i - 1].y)
+
+	def segment_clear(self, a, b):
+		# a straight or diagonal segment is clear when the nodes it steps through are, like
+		# the grid moves it replaced, any other segment needs a line of sight
+		dx, dy = b.x - a.x, b.y - a.y
+		if dx and dy and abs(dx) != abs(dy):
+			return self.line_of_sight(a, b)
+		blocked, height = self.astar.occupancy.cells, self.height
+		steps = max(abs(dx), abs(dy))
+		for step in range(1, steps):
+			if blocked[(a.x + dx // steps * step) * height + a.y + dy // steps * step]:
+				return False
+		return True
+
+	def is_clear(self, path):
+		# whether every waypoint, other than the end, and every segment of an already
+		# smoothed path is still free of obstacles
+		blocked = self.astar.occupancy.cells
+		for i in range(len(path) - 1):
+			if (i > 0 and blocked[path[i].id]) or not self.segment_clear(path[i], path[i + 1]):
+				return False
+		return True
+
+	def stats(self):
+		reduction = 1.0 - float(self.total_out) / self.total_in if self.total_in else 0.0
+		return {"last_in": self.last[0], "last_out": self.last[1], "total_in": self.total_in,
+				"total_out": self.total_out, "reduction": reduction}
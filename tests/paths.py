@@ -0,0 +1,24 @@
+import pygame
+from misc.path.astar import NodeGraph, AStar
+
+# a grid of nodes every spacing pixels with no map behind it, like the path finding workers build
+def grid(width=20, height=20, spacing=20, cache_size=256):
+	return AStar(NodeGraph(None, spacing, width, height).graph, cache_size)
+
+def wall(x, y0, y1, spacing=20):
+	# a rect over the column of nodes at x from row y0 to y1, the grid's edges are strict so it
+	# reaches half a node past them
+	return pygame.Rect(x * spacing - spacing / 2, y0 * spacing - spacing / 2, spacing, (y1 - y0 + 1) * spacing)
+
+class PathAssertions(object):
+
+	def assertValidPath(self, astar, path, start, end):
+		# the path runs from start to end in single grid moves and only the end can be blocked
+		self.assertIsNotNone(path)
+		self.assertIs(path[0], start)
+		self.assertIs(path[-1], end)
+		for a, b in zip(path, path[1:]):
+			self.assertLessEqual(max(abs(a.x - b.x), abs(a.y - b.y)), 1)
+			self.assertNotEqual(a.id, b.id)
+		for node in path[:-1]:
+			self.assertFalse(astar.occupancy.is_blocked(node.id), "path crosses blocked node %d, %d" % (node.x, node.y))
@@ -0,0 +1,124 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import unittest
+import random
+import shutil
+import tempfile
+import pygame
+from misc.Assets import Assets, RotationCache
+
+class AssetsTest(unittest.TestCase):
+
+	def setUp(self):
+		# images of their own, so the shared cache hasn't seen them before
+		self.directory = tempfile.mkdtemp()
+		self.sheet = os.path.join(self.directory, "sheet.png")
+		surface = pygame.Surface((40, 20), pygame.SRCALPHA)
+		surface.fill((255, 0, 0, 128), (0, 0, 20, 20))
+		surface.fill((0, 0, 255, 255), (20, 0, 20, 20))
+		pygame.image.save(surface, self.sheet)
+		self.assets = Assets()
+
+	def tearDown(self):
+		shutil.rmtree(self.directory)
+		pygame.display.quit()
+
+	def test_image_loaded_once(self):
+		loads, hits = self.assets.loads, self.assets.hits
+		first = self.assets.image(self.sheet)
+		self.assertIs(self.assets.image(self.sheet), first)
+		self.assertEqual(self.assets.loads, loads + 1)
+		self.assertEqual(self.assets.hits, hits + 1)
+
+	def test_atlas_frames_shared(self):
+		frames = self.assets.atlas(self.sheet, [(0, 0, 20, 20), (20, 0, 20, 20)])
+		self.assertEqual([frame.get_size() for frame in frames], [(20, 20), (20, 20)])
+		self.assertEqual(frames[1].get_at((5, 5)), (0, 0, 255, 255))
+		self.assertIs(self.assets.atlas(self.sheet, [pygame.Rect(0, 0, 20, 20), pygame.Rect(20, 0, 20, 20)]), frames)
+
+	def test_converted_once_there_is_a_display(self):
+		pygame.display.quit()
+		image = self.assets.image(self.sheet)
+		frames = self.assets.atlas(self.sheet, [(0, 0, 20, 20)])
+		self.assertIn(self.sheet, self.assets.unconverted)
+		pygame.display.init()
+		display = pygame.display.set_mode((50, 50))
+		self.assets.convert_all()
+		self.assertEqual(self.assets.unconverted, set())
+		converted = self.assets.image(self.sheet)
+		self.assertIsNot(converted, image)
+		# the image has per pixel alpha, so it keeps it
+		self.assertTrue(converted.get_flags() & pygame.SRCALPHA)
+		# the frames handed out earlier are refilled from the converted sheet
+		self.assertIs(frames[0].get_parent(), converted)
+
+	def test_stats(self):
+		self.assets.image(self.sheet)
+		stats = self.assets.stats()
+		self.assertEqual(stats["images"], len(self.assets.images))
+		self.assertGreaterEqual(stats["bytes"], 40 * 20 * 4)
+
+class RotationCacheTest(unittest.TestCase):
+
+	def setUp(self):
+		self.image = pygame.Surface((30, 10), pygame.SRCALPHA)
+		self.image.fill((255, 255, 255, 255))
+
+	def test_step_divides_a_turn(self):
+		cache = RotationCache(self.image, 7)
+		self.assertEqual(cache.count, 51)
+		self.assertAlmostEqual(cache.step * cache.count, 360.0)
+		self.assertEqual(RotationCache(self.image, 0.1).count, 360)
+
+	def test_nearest_frame_within_bounds(self):
+		cache = RotationCache(self.image, 2)
+		rng = random.Random(9)
+		for i in range(2000):
+			angle = rng.uniform(-1080, 1080)
+			frame = cache.frame(angle)
+			# the frame is the image turned by the nearest step, whichever way round the angle is given
+			nearest = round(angle / cache.step) * cache.step
+			self.assertEqual(frame.get_size(), pygame.transform.rotate(self.image, nearest).get_size())
+			self.assertIs(cache.frame(angle + 360), frame)
+		stats = cache.stats()
+		self.assertEqual(stats["frames"], 180)
+		self.assertEqual(stats["max_frames"], 180)
+		self.assertLessEqual(stats["bytes"], stats["max_bytes"])
+		self.assertEqual(len(cache.frames), 180)
+
+	def test_frames_rendered_when_first_asked_for(self):
+		cache = RotationCache(self.image, 90)
+		self.assertEqual(cache.stats()["frames"], 0)
+		first = cache.frame(44)
+		self.assertIs(cache.frame(-316), first)
+		self.assertEqual((cache.hits, cache.misses), (1, 1))
+		self.assertEqual(cache.frame(46).get_size(), (10, 30))
+
+	def test_prerender(self):
+		cache = RotationCache(self.image, 45, prerender=True)
+		self.assertEqual(cache.stats()["frames"], 8)
+		cache.frame(10)
+		self.assertEqual(cache.misses, 0)
+
+	def test_new_image_renders_again(self):
+		cache = RotationCache(self.image, 90)
+		cache.frame(90)
+		image = pygame.Surface((20, 4))
+		cache.set_image(image)
+		self.assertEqual(cache.stats()["frames"], 0)
+		self.assertEqual(cache.frame(90).get_size(), (4, 20))
+
+	def test_shared_by_path_and_step(self):
+		directory = tempfile.mkdtemp()
+		try:
+			path = os.path.join(directory, "robot.png")
+			pygame.image.save(self.image, path)
+			cache = Assets().rotations(path, 2)
+			self.assertIs(Assets().rotations(path, 2), cache)
+			self.assertIsNot(Assets().rotations(path, 5), cache)
+		finally:
+			shutil.rmtree(directory)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,128 @@
+import unittest
+import pygame
+from tests.paths import grid, wall, PathAssertions
+
+class AStarObstacleTest(PathAssertions, unittest.TestCase):
+
+	def setUp(self):
+		self.astar = grid()
+		self.nodes = self.astar.nodes
+		self.start = self.node(2, 10)
+		self.end = self.node(17, 10)
+
+	def node(self, x, y):
+		return self.nodes[x * self.astar.occupancy.height + y]
+
+	def search(self):
+		return self.astar.search(self.start, self.end, None, None)
+
+	def test_open_grid_is_straight(self):
+		path = self.search()
+		self.assertValidPath(self.astar, path, self.start, self.end)
+		self.assertEqual(len(path), 16)
+
+	def test_path_goes_around_added_obstacle(self):
+		self.search()
+		obstacle = wall(10, 3, 17)
+		self.assertTrue(self.astar.add_obstacle(obstacle))
+		path = self.search()
+		self.assertValidPath(self.astar, path, self.start, self.end)
+		self.assertGreater(len(path), 16)
+		self.assertFalse([node for node in path if node.x == 10 and 3 <= node.y <= 17])
+
+	def test_path_straight_again_after_removal(self):
+		obstacle = wall(10, 3, 17)
+		self.astar.add_obstacle(obstacle)
+		self.search()
+		self.astar.remove_obstacle(obstacle)
+		path = self.search()
+		self.assertValidPath(self.astar, path, self.start, self.end)
+		self.assertEqual(len(path), 16)
+
+	def test_path_follows_moved_obstacle(self):
+		obstacle = wall(10, 0, 12)
+		self.astar.add_obstacle(obstacle)
+		above = self.search()
+		self.assertValidPath(self.astar, above, self.start, self.end)
+		self.assertTrue([node for node in above if node.y > 12])
+		# move the wall to the bottom half, the gap is now at the top
+		obstacle.y = 8 * 20 - 10
+		obstacle.height = 12 * 20
+		self.assertTrue(self.astar.update_obstacle(obstacle))
+		below = self.search()
+		self.assertValidPath(self.astar, below, self.start, self.end)
+		self.assertTrue([node for node in below if node.y < 8])
+
+	def test_no_path_through_full_wall(self):
+		self.astar.add_obstacle(wall(10, 0, 19))
+		self.assertIsNone(self.search())
+
+	def test_blocked_end_can_be_reached(self):
+		self.astar.add_obstacle(wall(17, 10, 10))
+		self.assertValidPath(self.astar, self.search(), self.start, self.end)
+
+	def test_footprint_keeps_clear_of_obstacle(self):
+		self.astar.add_obstacle(wall(10, 3, 17))
+		path = self.astar.search(self.start, self.end, pygame.Rect(0, 0, 40, 40), None)
+		self.assertEqual(self.astar.occupancy.footprint, (40, 40))
+		self.assertValidPath(self.astar, path, self.start, self.end)
+		self.assertFalse([node for node in path if 9 <= node.x <= 11 and 2 <= node.y <= 18])
+
+class AStarCacheTest(unittest.TestCase):
+
+	def setUp(self):
+		self.astar = grid(cache_size=4)
+		self.nodes = self.astar.nodes
+
+	def search(self, start, end):
+		return self.astar.search(self.nodes[start], self.nodes[end], None, None)
+
+	def test_repeated_search_hits(self):
+		first = self.search(0, 399)
+		second = self.search(0, 399)
+		self.assertEqual(first, second)
+		self.assertEqual(self.astar.cache_stats()["hits"], 1)
+		self.assertEqual(self.astar.cache_stats()["misses"], 1)
+
+	def test_callers_get_copies(self):
+		self.search(0, 399).pop()
+		self.assertIs(self.search(0, 399)[-1], self.nodes[399])
+
+	def test_obstacle_change_bumps_version(self):
+		self.search(0, 399)
+		version = self.astar.version
+		self.astar.add_obstacle(wall(10, 3, 17))
+		self.assertEqual(self.astar.version, version + 1)
+		self.assertEqual(len(self.astar.cache), 0)
+		self.search(0, 399)
+		self.assertEqual(self.astar.cache_stats()["hits"], 0)
+
+	def test_obstacle_between_nodes_keeps_cache(self):
+		self.search(0, 399)
+		version = self.astar.version
+		self.assertEqual(self.astar.add_obstacle(pygame.Rect(22, 22, 16, 16)), [])
+		self.assertEqual(self.astar.version, version)
+		self.search(0, 399)
+		self.assertEqual(self.astar.cache_stats()["hits"], 1)
+
+	def test_no_path_is_cached(self):
+		self.astar.add_obstacle(wall(10, 0, 19))
+		self.assertIsNone(self.search(0, 399))
+		self.assertIsNone(self.search(0, 399))
+		self.assertEqual(self.astar.cache_stats()["hits"], 1)
+
+	def test_least_recently_used_evicted(self):
+		for end in range(395, 400):
+			self.search(0, end)
+		self.assertEqual(len(self.astar.cache), 4)
+		self.assertNotIn((0, 395, self.astar.version), self.astar.cache)
+		self.search(0, 396)
+		self.search(0, 399)
+		self.assertEqual(self.astar.cache_stats()["hits"], 2)
+
+	def test_stale_path_not_stored(self):
+		self.astar.cache_store((0, 399, self.astar.version - 1), [])
+		self.assertEqual(len(self.astar.cache), 0)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,82 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import unittest
+import pygame
+from engine.Display import DirtyRects
+
+class DirtyRectsTest(unittest.TestCase):
+
+	def setUp(self):
+		# the collector is shared, start every test from a presented frame
+		self.dirty = DirtyRects()
+		self.dirty.rects = []
+		self.dirty.full = False
+		self.dirty.active = False
+		self.dirty.ambient = False
+
+	def tearDown(self):
+		self.dirty.rects = []
+
+	def test_overlapping_rects_merged(self):
+		self.dirty.add((0, 0, 10, 10))
+		self.dirty.add((5, 5, 10, 10))
+		self.dirty.add((50, 50, 10, 10))
+		self.assertEqual(sorted(map(tuple, self.dirty.merged())), [(0, 0, 15, 15), (50, 50, 10, 10)])
+
+	def test_chains_merged_until_none_overlap(self):
+		# the third rect only overlaps the union of the first two
+		self.dirty.add((0, 0, 10, 10))
+		self.dirty.add((40, 0, 10, 10))
+		self.dirty.add((12, 5, 10, 10))
+		self.dirty.add((5, 12, 40, 5))
+		merged = self.dirty.merged()
+		self.assertEqual(len(merged), 1)
+		self.assertEqual(tuple(merged[0]), (0, 0, 50, 17))
+
+	def test_touching_rects_kept_apart(self):
+		self.dirty.add((0, 0, 10, 10))
+		self.dirty.add((10, 0, 10, 10))
+		self.assertEqual(len(self.dirty.merged()), 2)
+
+	def test_empty_rects_dropped(self):
+		self.dirty.add((0, 0, 0, 10))
+		self.dirty.add((5, 5, 10, 0))
+		self.assertEqual(self.dirty.merged(), [])
+
+	def test_ambient_and_active(self):
+		self.dirty.add((0, 0, 10, 10), ambient=True)
+		self.assertTrue(self.dirty.ambient)
+		self.assertFalse(self.dirty.active)
+		self.dirty.add((0, 0, 10, 10))
+		self.assertTrue(self.dirty.active)
+
+	def test_touches(self):
+		self.dirty.add((0, 0, 10, 10))
+		self.assertTrue(self.dirty.touches(pygame.Rect(5, 5, 10, 10)))
+		self.assertFalse(self.dirty.touches(pygame.Rect(20, 20, 10, 10)))
+		self.dirty.invalidate()
+		self.assertTrue(self.dirty.touches(pygame.Rect(20, 20, 10, 10)))
+
+	def test_present_copies_only_dirty_regions(self):
+		pygame.display.init()
+		try:
+			display = pygame.display.set_mode((40, 40))
+			display.fill((0, 0, 0))
+			source = pygame.Surface((40, 40))
+			source.fill((255, 0, 0))
+			self.dirty.add((0, 0, 10, 10))
+			self.dirty.present(display, source)
+			self.assertEqual(display.get_at((5, 5))[:3], (255, 0, 0))
+			self.assertEqual(display.get_at((20, 20))[:3], (0, 0, 0))
+			self.assertEqual(self.dirty.rects, [])
+			self.assertFalse(self.dirty.active)
+			self.dirty.invalidate()
+			self.dirty.present(display, source)
+			self.assertEqual(display.get_at((20, 20))[:3], (255, 0, 0))
+			self.assertFalse(self.dirty.full)
+		finally:
+			pygame.display.quit()
+
+if __name__ == "__main__":
+	unittest.main()
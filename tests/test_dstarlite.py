@@ -0,0 +1,93 @@
+import unittest
+import random
+import pygame
+from misc.path.dstarlite import DStarLite
+from tests.paths import grid, wall, PathAssertions
+
+class DStarLiteTest(PathAssertions, unittest.TestCase):
+
+	def setUp(self):
+		self.astar = grid()
+		self.nodes = self.astar.nodes
+		self.start, self.goal = self.node(2, 10), self.node(17, 10)
+
+	def node(self, x, y):
+		return self.nodes[x * 20 + y]
+
+	def cost(self, path):
+		return sum(a.move_cost(b) for a, b in zip(path, path[1:]))
+
+	def assertOptimal(self, path, start):
+		# the same cost as a full search from scratch
+		self.assertValidPath(self.astar, path, start, self.goal)
+		self.assertEqual(self.cost(path), self.cost(self.astar._search(start, self.goal)))
+
+	def test_initial_plan(self):
+		planner = DStarLite(self.astar, self.start, self.goal)
+		self.assertOptimal(planner.plan(self.start), self.start)
+
+	def test_replans_around_added_obstacle(self):
+		planner = DStarLite(self.astar, self.start, self.goal)
+		planner.plan(self.start)
+		planner.update_cells(self.astar.add_obstacle(wall(10, 3, 17)))
+		path = planner.plan(self.start)
+		self.assertOptimal(path, self.start)
+		self.assertFalse([node for node in path if node.x == 10 and 3 <= node.y <= 17])
+
+	def test_replans_after_obstacle_moves(self):
+		obstacle = wall(10, 0, 12)
+		self.astar.add_obstacle(obstacle)
+		planner = DStarLite(self.astar, self.start, self.goal)
+		self.assertOptimal(planner.plan(self.start), self.start)
+		obstacle.y = 8 * 20 - 10
+		obstacle.height = 12 * 20
+		planner.update_cells(self.astar.update_obstacle(obstacle))
+		self.assertOptimal(planner.plan(self.start), self.start)
+
+	def test_moving_start(self):
+		planner = DStarLite(self.astar, self.start, self.goal)
+		planner.plan(self.start)
+		planner.update_cells(self.astar.add_obstacle(wall(10, 3, 17)))
+		start = self.node(5, 4)
+		self.assertOptimal(planner.plan(start), start)
+
+	def test_random_changes_match_full_search(self):
+		rng = random.Random(5)
+		obstacles = [pygame.Rect(rng.randint(60, 300), rng.randint(0, 360), 30, 30) for i in range(12)]
+		for obstacle in obstacles:
+			self.astar.add_obstacle(obstacle)
+		planner = DStarLite(self.astar, self.start, self.goal)
+		for i in range(20):
+			obstacle = rng.choice(obstacles)
+			obstacle.x, obstacle.y = rng.randint(60, 300), rng.randint(0, 360)
+			planner.update_cells(self.astar.update_obstacle(obstacle))
+			path = planner.plan(self.start)
+			if self.astar._search(self.start, self.goal) is None:
+				self.assertIsNone(path)
+			else:
+				self.assertOptimal(path, self.start)
+
+	def test_no_path_through_full_wall(self):
+		planner = DStarLite(self.astar, self.start, self.goal)
+		planner.plan(self.start)
+		planner.update_cells(self.astar.add_obstacle(wall(10, 0, 19)))
+		self.assertIsNone(planner.plan(self.start))
+
+	def test_no_path_out_of_a_dead_end(self):
+		# the start is walled in after the first plan, every way out costs infinity
+		planner = DStarLite(self.astar, self.start, self.goal)
+		planner.plan(self.start)
+		for x, y in [(1, 9), (2, 9), (3, 9), (1, 10), (3, 10), (1, 11), (2, 11), (3, 11)]:
+			planner.update_cells(self.astar.add_obstacle(wall(x, y, y)))
+		self.assertIsNone(planner.plan(self.start))
+
+	def test_unblocked_again(self):
+		planner = DStarLite(self.astar, self.start, self.goal)
+		obstacle = wall(10, 0, 19)
+		planner.update_cells(self.astar.add_obstacle(obstacle))
+		self.assertIsNone(planner.plan(self.start))
+		planner.update_cells(self.astar.remove_obstacle(obstacle))
+		self.assertOptimal(planner.plan(self.start), self.start)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,139 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import unittest
+import random
+import pygame
+from misc.Constants import json_settings
+from engine.Engine import GameEngine
+from map.Levels import GameLevel
+from event.EventHandler import EventDispatcher
+from event.Events import ButtonClickEvent
+from engine.Governor import FrameGovernor
+
+class StepLimit(Exception):
+	pass
+
+class FixedClock(object):
+
+	# a clock where every frame takes the same number of milliseconds
+	def __init__(self, milliseconds):
+		self.milliseconds = milliseconds
+
+	def tick(self, *args):
+		return self.milliseconds
+
+	def get_fps(self):
+		return 1000.0 / self.milliseconds
+
+class ScriptedGovernor(FrameGovernor):
+
+	# a governor that starts idle and waits for the given milliseconds, one wait a frame
+	def __init__(self, waits):
+		FrameGovernor.__init__(self, idle_timeout=0.25)
+		self.state = FrameGovernor.IDLE
+		self.waits = list(waits)
+
+	def wait(self, clock):
+		if not self.waits:
+			raise StepLimit()
+		return [], self.waits.pop(0)
+
+class FixedStepTest(unittest.TestCase):
+
+	def setUp(self):
+		# paths found by worker processes arrive whenever they are ready, search them inline
+		self.processes = json_settings["pathfinding"]["processes"]
+		json_settings["pathfinding"]["processes"] = 0
+
+	def tearDown(self):
+		json_settings["pathfinding"]["processes"] = self.processes
+
+	def trajectory(self, milliseconds, steps=600, seed=5):
+		# run the engine's main loop at a frame rate, recording the robots after every step
+		random.seed(seed)
+		engine = GameEngine()
+		engine.clock = FixedClock(milliseconds)
+		engine.change_level(GameLevel())
+		level = engine.level
+		# the sliders set the robots' speed the first time the gui updates
+		level.update(0, [])
+		EventDispatcher().dispatch_events()
+		positions = []
+		step = level.step
+		def record(time):
+			step(time)
+			positions.append([(robot.x, robot.y, robot.bearing, robot.score) for robot in level.game.robots])
+			if len(positions) == steps:
+				raise StepLimit()
+		level.step = record
+		try:
+			engine.mainloop()
+		except StepLimit:
+			pass
+		finally:
+			level.close()
+		return positions
+
+	def test_same_trajectory_at_any_frame_rate(self):
+		expected = self.trajectory(16)
+		# the robots move, or there would be nothing to compare
+		self.assertNotEqual(expected[0], expected[-1])
+		for milliseconds in (7, 33, 50, 200):
+			positions = self.trajectory(milliseconds)
+			self.assertEqual(len(positions), len(expected))
+			for step, (robots, expected_robots) in enumerate(zip(positions, expected)):
+				self.assertEqual(robots, expected_robots, "%d ms frames, step %d" % (milliseconds, step))
+
+	def test_idle_wait_caught_up(self):
+		# a wait for input longer than max_steps can simulate in a frame is caught up afterwards
+		engine = GameEngine()
+		engine.change_level(GameLevel())
+		level = engine.level
+		waits = [250] + [16] * 20
+		engine.governor = ScriptedGovernor(waits)
+		steps = []
+		level.step = steps.append
+		try:
+			engine.mainloop()
+		except StepLimit:
+			pass
+		finally:
+			level.close()
+		self.assertGreater(0.25 / engine.step_time, engine.max_steps)
+		self.assertEqual(len(steps), int(sum(waits) / 1000.0 / engine.step_time))
+		self.assertEqual(engine.owed, 0.0)
+
+class PauseTest(unittest.TestCase):
+
+	def setUp(self):
+		self.processes = json_settings["pathfinding"]["processes"]
+		json_settings["pathfinding"]["processes"] = 0
+		self.engine = GameEngine()
+		self.engine.change_level(GameLevel())
+
+	def tearDown(self):
+		self.engine.level.close()
+		json_settings["pathfinding"]["processes"] = self.processes
+		EventDispatcher().send_event(ButtonClickEvent("resume"))
+
+	def run_frames(self, frames):
+		self.engine.governor = ScriptedGovernor([16] * frames)
+		try:
+			self.engine.mainloop()
+		except StepLimit:
+			pass
+
+	def test_idle_once_faded_in(self):
+		self.run_frames(2)
+		EventDispatcher().send_event(ButtonClickEvent("pause"))
+		fade = json_settings["rendering"]["pause_fade_frames"]
+		self.run_frames(fade)
+		self.assertEqual(self.engine.governor.state, FrameGovernor.ACTIVE)
+		self.assertEqual(pygame.image.tostring(self.engine.display, "RGB"), pygame.image.tostring(self.engine.pause_menu, "RGB"))
+		# nothing changes after the fade, so the engine goes idle after idle_delay
+		self.run_frames(int(self.engine.governor.idle_delay / 0.016) + 1)
+		self.assertEqual(self.engine.governor.state, FrameGovernor.IDLE)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,228 @@
+import gc
+import unittest
+from event.EventHandler import EventDispatcher, IEventHandler
+from event.Events import *
+
+class Recorder(IEventHandler):
+
+	# records the events it is sent, in the order every recorder was sent them
+	def __init__(self, log, tag, subscriptions=None, solid=False):
+		self.log = log
+		self.tag = tag
+		self.subscribed = subscriptions
+		IEventHandler.__init__(self, solid)
+
+	def subscriptions(self):
+		return self.subscribed
+
+	def event_handler(self, event):
+		self.log.append((self.tag, event))
+
+class DispatcherTestCase(unittest.TestCase):
+
+	def setUp(self):
+		# every test registers in a scope of its own, and starts with nothing queued
+		self.dispatcher = EventDispatcher()
+		self.dispatcher.dispatch_events()
+		self.dispatcher.open_scope("test")
+		self.log = []
+		# the dispatcher only holds handlers weakly
+		self.handlers = []
+
+	def tearDown(self):
+		for handler in self.handlers:
+			self.dispatcher.deregister_event(handler)
+		self.dispatcher.open_scope()
+
+	def recorder(self, tag, subscriptions=None, solid=False):
+		handler = Recorder(self.log, tag, subscriptions, solid)
+		self.handlers.append(handler)
+		return handler
+
+	def tags(self):
+		return [tag for tag, event in self.log]
+
+class RoutingTest(DispatcherTestCase):
+
+	def test_routed_by_class_and_name(self):
+		self.recorder("fps", [(LabelChange, "fps")])
+		self.recorder("time", [(LabelChange, "time")])
+		self.recorder("click", [(ButtonClickEvent, "fps")])
+		self.dispatcher.send_event(LabelChange("fps", "60"))
+		self.assertEqual(self.tags(), ["fps"])
+
+	def test_name_of_none_is_every_name(self):
+		self.recorder("labels", [(LabelChange, None)])
+		self.recorder("fps", [(LabelChange, "fps")])
+		self.dispatcher.send_event(LabelChange("time", "1.0"))
+		self.dispatcher.send_event(LabelChange("fps", "60"))
+		self.assertEqual(self.tags(), ["labels", "labels", "fps"])
+
+	def test_subscription_to_a_base_class(self):
+		self.recorder("events", [(Event, None)])
+		self.dispatcher.send_event(SliderEvent("velocityai", 3))
+		self.dispatcher.send_event(TreasureCollectEvent(None))
+		self.assertEqual(self.tags(), ["events", "events"])
+
+	def test_catch_all_and_registration_order(self):
+		self.recorder("first", [(ButtonClickEvent, "start")])
+		self.recorder("all")
+		self.recorder("last", [(ButtonClickEvent, None)])
+		self.dispatcher.send_event(ButtonClickEvent("start"))
+		self.dispatcher.send_event(CheckBoxEvent("displaypath", True))
+		self.assertEqual(self.tags(), ["first", "all", "last", "all"])
+
+	def test_solid_handlers_first(self):
+		self.recorder("scoped", [(ButtonClickEvent, "exit")])
+		self.recorder("solid", [(ButtonClickEvent, "exit")], solid=True)
+		self.dispatcher.send_event(ButtonClickEvent("exit"))
+		self.assertEqual(self.tags(), ["solid", "scoped"])
+
+	def test_handler_registered_after_first_send(self):
+		self.recorder("first", [(LabelChange, "fps")])
+		self.dispatcher.send_event(LabelChange("fps", "60"))
+		self.recorder("second", [(LabelChange, "fps")])
+		self.dispatcher.send_event(LabelChange("fps", "59"))
+		self.assertEqual(self.tags(), ["first", "first", "second"])
+
+	def test_reindex(self):
+		label = self.recorder("label", [(LabelChange, None)])
+		label.subscribed = [(LabelChange, "fps")]
+		self.dispatcher.reindex(label)
+		self.dispatcher.send_event(LabelChange("time", "1.0"))
+		self.dispatcher.send_event(LabelChange("fps", "60"))
+		self.assertEqual([event.name for tag, event in self.log], ["fps"])
+
+	def test_deregistered_while_sending(self):
+		class Remover(Recorder):
+			def event_handler(self, event):
+				Recorder.event_handler(self, event)
+				EventDispatcher().deregister_event(self.other)
+		remover = Remover(self.log, "remover", [(ButtonClickEvent, "pause")])
+		self.handlers.append(remover)
+		remover.other = self.recorder("removed", [(ButtonClickEvent, "pause")])
+		self.dispatcher.send_event(ButtonClickEvent("pause"))
+		self.assertEqual(self.tags(), ["remover"])
+
+class QueueTest(DispatcherTestCase):
+
+	def test_posted_events_wait_for_dispatch(self):
+		self.recorder("click", [(ButtonClickEvent, None)])
+		self.dispatcher.post_event(ButtonClickEvent("start"))
+		self.assertEqual(self.log, [])
+		self.dispatcher.dispatch_events()
+		self.assertEqual(self.tags(), ["click"])
+		self.dispatcher.dispatch_events()
+		self.assertEqual(self.tags(), ["click"])
+
+	def test_coalescing_keeps_latest(self):
+		self.recorder("labels", [(LabelChange, None)])
+		for value in range(5):
+			self.dispatcher.post_event(LabelChange("fps", str(value)))
+		self.dispatcher.post_event(LabelChange("time", "1.0"))
+		self.dispatcher.dispatch_events()
+		self.assertEqual([(event.name, event.string) for tag, event in self.log], [("fps", "4"), ("time", "1.0")])
+
+	def test_other_events_all_sent_in_order(self):
+		self.recorder("all")
+		self.dispatcher.post_event(ButtonClickEvent("start"))
+		self.dispatcher.post_event(SliderEvent("velocityai", 1))
+		self.dispatcher.post_event(ButtonClickEvent("start"))
+		self.dispatcher.post_event(SliderEvent("velocityai", 2))
+		self.dispatcher.post_event(CheckBoxEvent("displaypath", True))
+		self.dispatcher.dispatch_events()
+		# the slider keeps the place of its first post but the value of its last
+		self.assertEqual([type(event).__name__ for tag, event in self.log],
+						["ButtonClickEvent", "SliderEvent", "ButtonClickEvent", "CheckBoxEvent"])
+		self.assertEqual(self.log[1][1].slidervalue, 2)
+
+	def test_posted_while_draining_waits(self):
+		class Poster(Recorder):
+			def event_handler(self, event):
+				Recorder.event_handler(self, event)
+				if event.name == "start":
+					EventDispatcher().post_event(ButtonClickEvent("again"))
+		self.handlers.append(Poster(self.log, "poster", [(ButtonClickEvent, None)]))
+		self.dispatcher.post_event(ButtonClickEvent("start"))
+		self.dispatcher.dispatch_events()
+		self.assertEqual([event.name for tag, event in self.log], ["start"])
+		self.dispatcher.dispatch_events()
+		self.assertEqual([event.name for tag, event in self.log], ["start", "again"])
+
+class ScopeTest(DispatcherTestCase):
+
+	def test_new_scope_drops_old_handlers(self):
+		self.recorder("old", [(ButtonClickEvent, None)])
+		self.recorder("solid", [(ButtonClickEvent, None)], solid=True)
+		self.dispatcher.open_scope("next")
+		self.recorder("new", [(ButtonClickEvent, None)])
+		self.dispatcher.send_event(ButtonClickEvent("start"))
+		self.assertEqual(self.tags(), ["solid", "new"])
+
+	def test_scope_closed_while_sending(self):
+		# a handler that changes the level stops the rest of the old level getting the event
+		class Closer(Recorder):
+			def event_handler(self, event):
+				Recorder.event_handler(self, event)
+				EventDispatcher().open_scope("next")
+		self.handlers.append(Closer(self.log, "closer", [(ButtonClickEvent, None)]))
+		self.recorder("after", [(ButtonClickEvent, None)])
+		self.dispatcher.send_event(ButtonClickEvent("start"))
+		self.assertEqual(self.tags(), ["closer"])
+
+	def test_handlers_held_weakly(self):
+		self.recorder("kept", [(ButtonClickEvent, None)])
+		Recorder(self.log, "dropped", [(ButtonClickEvent, None)])
+		gc.collect()
+		self.assertEqual(len(self.dispatcher.scope), 1)
+		self.dispatcher.send_event(ButtonClickEvent("start"))
+		self.assertEqual(self.tags(), ["kept"])
+
+	def test_stats_report_closed_scopes(self):
+		self.recorder("leaked", [(ButtonClickEvent, None)])
+		self.dispatcher.open_scope("next")
+		stats = self.dispatcher.stats()
+		self.assertEqual(stats[1], {"scope": "next", "live": 0, "closed": False})
+		self.assertEqual(stats[2], {"scope": "test", "live": 1, "closed": True})
+		del self.handlers[:]
+		gc.collect()
+		self.assertEqual(self.dispatcher.stats()[2]["live"], 0)
+
+class ProfileTest(DispatcherTestCase):
+
+	def tearDown(self):
+		self.dispatcher.profile(False)
+		DispatcherTestCase.tearDown(self)
+
+	def test_handlers_timed_while_profiling(self):
+		self.recorder("fps", [(LabelChange, "fps")])
+		self.recorder("labels", [(LabelChange, None)])
+		self.dispatcher.profile(True)
+		self.assertTrue(self.dispatcher.profiling)
+		self.dispatcher.send_event(LabelChange("fps", "60"))
+		self.dispatcher.send_event(LabelChange("time", "1.0"))
+		self.assertEqual(self.tags(), ["fps", "labels", "labels"])
+		report = self.dispatcher.profiler.report()
+		self.assertEqual([(row["event"], row["handler"], row["calls"]) for row in report["handlers"]], [("LabelChange", "Recorder", 3)])
+		self.assertEqual(report["events"], [{"event": "LabelChange", "sent": 2, "fanout": 1.5, "max_fanout": 2}])
+
+	def test_nothing_recorded_once_stopped(self):
+		self.recorder("fps", [(LabelChange, "fps")])
+		self.dispatcher.profile(True)
+		self.dispatcher.send_event(LabelChange("fps", "60"))
+		self.dispatcher.profile(False)
+		self.assertFalse(self.dispatcher.profiling)
+		self.dispatcher.send_event(LabelChange("fps", "59"))
+		self.assertEqual(self.tags(), ["fps", "fps"])
+		# the last timings are kept
+		self.assertEqual(self.dispatcher.profiler.report()["handlers"][0]["calls"], 1)
+
+	def test_starting_again_starts_new_timings(self):
+		self.recorder("fps", [(LabelChange, "fps")])
+		self.dispatcher.profile(True)
+		self.dispatcher.send_event(LabelChange("fps", "60"))
+		self.dispatcher.profile(True)
+		self.assertEqual(self.dispatcher.profiler.report(), {"handlers": [], "events": []})
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,54 @@
+import unittest
+import pygame
+from misc.Constants import *
+from misc.Fonts import Fonts
+
+class FontsTest(unittest.TestCase):
+
+	def setUp(self):
+		pygame.font.init()
+		self.fonts = Fonts()
+
+	def test_font_shared(self):
+		font = self.fonts.font(FONT_REGULAR, 13)
+		hits = self.fonts.font_hits
+		self.assertIs(self.fonts.font(FONT_REGULAR, 13), font)
+		self.assertIsNot(self.fonts.font(FONT_REGULAR, 14), font)
+		self.assertEqual(self.fonts.font_hits, hits + 1)
+
+	def test_rendered_text_cached(self):
+		font = self.fonts.font(FONT_REGULAR, 13)
+		first = self.fonts.render(font, "fonts test", (255, 255, 255))
+		hits = self.fonts.hits
+		self.assertIs(self.fonts.render(font, "fonts test", [255, 255, 255]), first)
+		self.assertEqual(self.fonts.hits, hits + 1)
+		# a different colour or antialiasing is rendered on its own
+		self.assertIsNot(self.fonts.render(font, "fonts test", (0, 0, 0)), first)
+		self.assertIsNot(self.fonts.render(font, "fonts test", (255, 255, 255), False), first)
+
+	def test_least_recently_used_dropped(self):
+		font = self.fonts.font(FONT_REGULAR, 13)
+		size = self.fonts.cache_size
+		self.fonts.cache_size = 3
+		try:
+			self.fonts.cache.clear()
+			for text in ["a", "b", "c"]:
+				self.fonts.render(font, text, (0, 0, 0))
+			# using "a" again keeps it, so "b" is dropped
+			self.fonts.render(font, "a", (0, 0, 0))
+			self.fonts.render(font, "d", (0, 0, 0))
+			self.assertEqual([key[1] for key in self.fonts.cache], ["c", "a", "d"])
+		finally:
+			self.fonts.cache_size = size
+
+	def test_stats(self):
+		font = self.fonts.font(FONT_REGULAR, 13)
+		self.fonts.render(font, "stats", (0, 0, 0))
+		self.fonts.render(font, "stats", (0, 0, 0))
+		stats = self.fonts.stats()
+		self.assertEqual(stats["size"], len(self.fonts.cache))
+		self.assertGreater(stats["hit_rate"], 0.0)
+		self.assertLessEqual(stats["hit_rate"], 1.0)
+
+if __name__ == "__main__":
+	unittest.main()
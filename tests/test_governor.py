@@ -0,0 +1,49 @@
+import unittest
+from engine.Governor import FrameGovernor
+
+class FrameGovernorTest(unittest.TestCase):
+
+	def setUp(self):
+		self.governor = FrameGovernor(60, 30, idle_delay=0.5, idle_timeout=0.05)
+
+	def test_active_while_changing(self):
+		for i in range(60):
+			self.governor.frame(1.0 / 60, [], True, False)
+		self.assertEqual(self.governor.state, FrameGovernor.ACTIVE)
+
+	def test_ambient_animations_lower_rate(self):
+		self.governor.frame(1.0 / 60, [], False, True)
+		self.assertEqual(self.governor.state, FrameGovernor.AMBIENT)
+
+	def test_idle_after_delay(self):
+		for i in range(3):
+			self.governor.frame(0.125, [], False, False)
+		self.assertEqual(self.governor.state, FrameGovernor.ACTIVE)
+		self.governor.frame(0.125, [], False, False)
+		self.assertEqual(self.governor.state, FrameGovernor.IDLE)
+
+	def test_input_wakes(self):
+		self.governor.frame(1.0, [], False, False)
+		self.assertEqual(self.governor.state, FrameGovernor.IDLE)
+		self.governor.frame(0.05, ["event"], False, False)
+		self.assertEqual(self.governor.state, FrameGovernor.ACTIVE)
+		self.assertEqual(self.governor.quiet, 0.0)
+		self.assertEqual(self.governor.frames, {FrameGovernor.ACTIVE: 1, FrameGovernor.AMBIENT: 0, FrameGovernor.IDLE: 1})
+
+	def test_cpu_time_counts_up(self):
+		start = self.governor.cpu_time()
+		sum(i * i for i in range(200000))
+		self.assertGreaterEqual(self.governor.cpu_time(), start)
+
+	def test_time_counted_against_state_waited_in(self):
+		self.governor.frame(0.125, [], False, True)
+		self.governor.frame(0.125, [], False, False)
+		stats = self.governor.stats()["states"]
+		self.assertEqual(self.governor.states[FrameGovernor.ACTIVE]["wakeups"], 1)
+		self.assertEqual(self.governor.states[FrameGovernor.AMBIENT]["wakeups"], 1)
+		self.assertEqual(self.governor.states[FrameGovernor.IDLE]["wakeups"], 0)
+		self.assertEqual(stats[FrameGovernor.IDLE], {"seconds": 0.0, "cpu_seconds": 0.0, "cpu": 0.0, "wakeups_per_second": 0.0})
+		self.assertGreaterEqual(stats[FrameGovernor.AMBIENT]["seconds"], 0.0)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,171 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import unittest
+import pygame
+from gui.Gui import Gui
+from gui.Components import Button, Component
+from misc.Allocations import Allocations
+
+class BackgroundTest(unittest.TestCase):
+
+	def setUp(self):
+		pygame.display.init()
+		pygame.font.init()
+		self.display = pygame.display.set_mode((300, 200))
+		self.gui = Gui(self.display, size=(200, 200), offset=(100, 0))
+		self.button = Button("Button", None, self.gui, offset=(20, 30))
+		self.gui.add_component(self.button)
+		self.gui.update(0, [])
+
+	def tearDown(self):
+		Allocations().stop()
+		pygame.display.quit()
+
+	def background(self, rect):
+		# the pixels of the gui's background under rect, in gui coordinates
+		return [self.gui.initial_image.get_at((x, y)) for x in range(rect.left, rect.right) for y in range(rect.top, rect.bottom)]
+
+	def drawn(self, rect):
+		# the pixels on the display under rect, in display coordinates
+		return [self.display.get_at((x, y)) for x in range(rect.left, rect.right) for y in range(rect.top, rect.bottom)]
+
+	def test_removed_component_restored(self):
+		self.assertNotEqual(self.drawn(self.button.event_rect), self.background(self.button.rect))
+		self.gui.remove_component(self.button)
+		self.assertEqual(self.drawn(self.button.event_rect), self.background(self.button.rect))
+
+	def test_restoring_creates_no_surfaces(self):
+		Allocations().start()
+		self.gui.remove_component(self.button)
+		Allocations().stop()
+		self.assertEqual(Allocations().stats()["total"], 0)
+
+	def test_allocations_counted(self):
+		surface = pygame.Surface((10, 10))
+		Allocations().start()
+		surface.copy()
+		surface.subsurface((0, 0, 5, 5))
+		pygame.transform.rotate(surface, 45)
+		Allocations().frame()
+		Allocations().stop()
+		stats = Allocations().stats()
+		self.assertEqual(stats["counts"], {"copy": 1, "subsurface": 1, "rotate": 1})
+		self.assertEqual(stats["per_frame"], 3.0)
+
+class Probe(Component):
+
+	interactive = True
+
+	# a component that records the mouse input the gui sends it
+	def __init__(self, log, parent, size=(40, 40), capture=False, **kwargs):
+		Component.__init__(self, size, parent, **kwargs)
+		self.log = log
+		self.capture = capture
+
+	def mouse_enter(self, position):
+		self.log.append((self.name, "enter"))
+
+	def mouse_leave(self, position):
+		self.log.append((self.name, "leave"))
+
+	def mouse_motion(self, position):
+		self.log.append((self.name, "motion", position))
+
+	def mouse_down(self, position, button):
+		self.log.append((self.name, "down"))
+		return self.capture
+
+	def mouse_up(self, position, button):
+		self.log.append((self.name, "up"))
+
+	def update(self, time, events):
+		return False
+
+def motion(position):
+	return pygame.event.Event(pygame.MOUSEMOTION, pos=position, rel=(0, 0), buttons=(0, 0, 0))
+
+def button(kind, position):
+	return pygame.event.Event(kind, pos=position, button=1)
+
+class DispatchTest(unittest.TestCase):
+
+	def setUp(self):
+		pygame.display.init()
+		pygame.font.init()
+		self.display = pygame.display.set_mode((300, 300))
+		self.gui = Gui(self.display, size=(300, 300))
+		self.log = []
+		# a straddles the corner where four of the grid's cells meet
+		self.a = self.probe("a", (50, 50), capture=True)
+		self.b = self.probe("b", (150, 50))
+
+	def tearDown(self):
+		pygame.display.quit()
+
+	def probe(self, name, offset, **kwargs):
+		component = Probe(self.log, self.gui, offset=offset, **kwargs)
+		component.name = name
+		self.gui.add_component(component)
+		return component
+
+	def test_found_across_cell_edges(self):
+		size = Gui.cell_size
+		self.assertEqual(sorted(cell for cell, components in self.gui.cells.items() if self.a in components),
+						[(0, 0), (0, 1), (1, 0), (1, 1)])
+		for position in ((50, 50), (size - 1, size - 1), (size, size), (89, 89), (size - 1, 89), (89, size - 1)):
+			self.assertIs(self.gui.component_at(position), self.a, position)
+		for position in ((49, 50), (50, 49), (90, size), (size, 90), (10, 10)):
+			self.assertIsNone(self.gui.component_at(position), position)
+
+	def test_last_added_on_top(self):
+		c = self.probe("c", (70, 70))
+		self.assertIs(self.gui.component_at((80, 80)), c)
+		self.assertIs(self.gui.component_at((60, 60)), self.a)
+
+	def test_enter_and_leave_in_order(self):
+		self.gui.dispatch_input([motion((60, 60))])
+		self.gui.dispatch_input([motion((160, 60))])
+		self.gui.dispatch_input([motion((10, 10))])
+		self.assertEqual(self.log, [("a", "enter"), ("a", "motion", (60, 60)), ("a", "leave"),
+									("b", "enter"), ("b", "motion", (160, 60)), ("b", "leave")])
+
+	def test_motion_coalesced(self):
+		self.gui.dispatch_input([motion((60, 60)), motion((10, 10)), motion((155, 55)), motion((160, 60))])
+		self.assertEqual(self.log, [("b", "enter"), ("b", "motion", (160, 60))])
+
+	def test_press_applies_its_own_position(self):
+		# the motion before the press is replaced by the press, the motion after it still arrives
+		self.gui.dispatch_input([motion((160, 60)), button(pygame.MOUSEBUTTONDOWN, (60, 60)), motion((70, 70))])
+		self.assertEqual(self.log, [("a", "enter"), ("a", "motion", (60, 60)), ("a", "down"), ("a", "motion", (70, 70))])
+
+	def test_capture_kept_until_released(self):
+		self.gui.dispatch_input([button(pygame.MOUSEBUTTONDOWN, (60, 60))])
+		del self.log[:]
+		self.gui.dispatch_input([motion((160, 60))])
+		self.gui.dispatch_input([button(pygame.MOUSEBUTTONUP, (160, 60))])
+		self.assertEqual(self.log, [("a", "motion", (160, 60)), ("a", "motion", (160, 60)), ("a", "up"),
+									("a", "leave"), ("b", "enter"), ("b", "motion", (160, 60))])
+		self.assertIsNone(self.gui.captured)
+		self.assertIs(self.gui.hovered, self.b)
+
+	def test_press_without_capture(self):
+		self.gui.dispatch_input([button(pygame.MOUSEBUTTONDOWN, (160, 60))])
+		self.gui.dispatch_input([motion((60, 60)), button(pygame.MOUSEBUTTONUP, (60, 60))])
+		self.assertIsNone(self.gui.captured)
+		self.assertEqual(self.log[-3:], [("a", "enter"), ("a", "motion", (60, 60)), ("a", "up")])
+
+	def test_removed_component_forgotten(self):
+		self.gui.dispatch_input([button(pygame.MOUSEBUTTONDOWN, (60, 60))])
+		self.assertIs(self.gui.captured, self.a)
+		self.gui.remove_component(self.a)
+		self.assertIsNone(self.gui.captured)
+		self.assertIsNone(self.gui.hovered)
+		self.assertFalse(any(self.a in components for components in self.gui.cells.values()))
+		self.assertIsNone(self.gui.component_at((60, 60)))
+		del self.log[:]
+		self.gui.dispatch_input([motion((160, 60)), button(pygame.MOUSEBUTTONUP, (160, 60))])
+		self.assertEqual(self.log, [("b", "enter"), ("b", "motion", (160, 60)), ("b", "up")])
+
+if __name__ == "__main__":
+	unittest.main()
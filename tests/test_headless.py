@@ -0,0 +1,34 @@
+import unittest
+from misc.Constants import json_settings
+from engine.Headless import HeadlessRunner
+
+class HeadlessRunnerTest(unittest.TestCase):
+
+	def setUp(self):
+		self.runner = HeadlessRunner()
+
+	def test_same_seed_same_run(self):
+		first = self.runner.run(seconds=5, seed=3)
+		second = self.runner.run(seconds=5, seed=3)
+		self.assertEqual(first["steps"], 300)
+		self.assertEqual(first["scores"], second["scores"])
+		self.assertEqual(first["collected"], second["collected"])
+		# each run searches its own level's paths
+		self.assertEqual(first["path_cache"], second["path_cache"])
+		self.assertGreater(first["path_cache"]["misses"], 0)
+
+	def test_settings_left_alone(self):
+		processes = json_settings["pathfinding"]["processes"]
+		self.runner.run(seconds=1, seed=1)
+		self.assertEqual(json_settings["pathfinding"]["processes"], processes)
+
+	def test_stops_at_treasures(self):
+		result = self.runner.run(treasures=1, seconds=120, seed=3)
+		self.assertEqual(result["collected"], 1)
+		self.assertLess(result["simulated"], 120)
+
+	def test_needs_somewhere_to_stop(self):
+		self.assertRaises(ValueError, self.runner.run)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import random
+import pygame
+from misc.path.hierarchical import HierarchicalAStar
+from tests.paths import grid, wall, PathAssertions
+
+class HierarchicalAStarTest(PathAssertions, unittest.TestCase):
+
+	def setUp(self):
+		self.astar = grid(30, 30)
+		self.hpa = HierarchicalAStar(self.astar, 10)
+		self.nodes = self.astar.nodes
+
+	def node(self, x, y):
+		return self.nodes[x * 30 + y]
+
+	def cost(self, path):
+		return sum(a.move_cost(b) for a, b in zip(path, path[1:]))
+
+	def test_path_across_clusters(self):
+		start, end = self.node(1, 1), self.node(28, 27)
+		path = self.hpa.search(start, end, None, None)
+		self.assertValidPath(self.astar, path, start, end)
+		self.assertLessEqual(self.cost(path), self.cost(self.astar._search(start, end)) * 1.1)
+
+	def test_path_within_cluster(self):
+		start, end = self.node(11, 11), self.node(18, 15)
+		path = self.hpa.search(start, end, None, None)
+		self.assertValidPath(self.astar, path, start, end)
+		self.assertFalse([node for node in path if self.hpa.cluster_of(node.id) != (1, 1)])
+
+	def test_rebuilt_after_obstacle_change(self):
+		start, end = self.node(2, 15), self.node(27, 15)
+		self.hpa.search(start, end, None, None)
+		self.astar.add_obstacle(wall(15, 2, 27))
+		path = self.hpa.search(start, end, None, None)
+		self.assertEqual(self.hpa.built_version, self.astar.version)
+		self.assertValidPath(self.astar, path, start, end)
+		self.assertFalse([node for node in path if node.x == 15 and 2 <= node.y <= 27])
+
+	def test_no_path_through_full_wall(self):
+		self.astar.add_obstacle(wall(15, 0, 29))
+		self.assertIsNone(self.hpa.search(self.node(2, 15), self.node(27, 15), None, None))
+
+	def test_random_obstacles_near_optimal(self):
+		# the abstract graph only crosses borders at a few transitions, so a path can take a
+		# detour of up to a cluster's width but they are always valid
+		rng = random.Random(7)
+		for i in range(40):
+			self.astar.add_obstacle(pygame.Rect(rng.randint(0, 560), rng.randint(0, 560), rng.randint(10, 60), rng.randint(10, 60)))
+		free = [node for node in self.nodes if not self.astar.occupancy.is_blocked(node.id)]
+		total, best_total = 0, 0
+		for i in range(100):
+			start, end = rng.choice(free), rng.choice(free)
+			path = self.hpa.search(start, end, None, None)
+			best = self.astar._search(start, end)
+			if best is None:
+				self.assertIsNone(path)
+				continue
+			self.assertValidPath(self.astar, path, start, end)
+			self.assertLessEqual(self.cost(path), self.cost(best) + 10 * self.hpa.cluster_size)
+			total += self.cost(path)
+			best_total += self.cost(best)
+		self.assertLessEqual(total, best_total * 1.15)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,75 @@
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import unittest
+import random
+import pygame
+from event.EventHandler import EventDispatcher
+from event.Events import CheckBoxEvent
+from misc.Constants import *
+from map.Levels import GameLevel, GameSurface
+
+class GameSurfaceLayersTest(unittest.TestCase):
+
+	def setUp(self):
+		pygame.init()
+		random.seed(1)
+		EventDispatcher().open_scope("test")
+		self.level = GameLevel(processes=0)
+		self.game = self.level.game
+		# start with the layers drawn
+		self.game.refresh_layers()
+
+	def tearDown(self):
+		self.level.close()
+		EventDispatcher().dispatch_events()
+		EventDispatcher().open_scope()
+
+	def pending(self):
+		return dict((layer, len(changes)) for layer, changes in self.game.layer_changes.items())
+
+	def region(self, surface, rect):
+		return pygame.image.tostring(surface.subsurface(rect), "RGB")
+
+	def test_traps_composited_when_shown(self):
+		rect = self.game.obstacles[0].rect.clip(self.game.rect)
+		self.assertEqual(self.region(self.game.background, rect), self.region(self.game.mapimg, rect))
+		self.game.event_handler(CheckBoxEvent("displaytraps", True))
+		self.game.refresh_layers()
+		self.assertNotEqual(self.region(self.game.background, rect), self.region(self.game.mapimg, rect))
+		self.game.event_handler(CheckBoxEvent("displaytraps", False))
+		self.game.refresh_layers()
+		self.assertEqual(self.region(self.game.background, rect), self.region(self.game.mapimg, rect))
+
+	def test_covered_change_not_added(self):
+		self.game.layer_change(LAYER_TRAPS, pygame.Rect(0, 0, 100, 100), True)
+		self.game.layer_change(LAYER_TRAPS, pygame.Rect(10, 10, 20, 20))
+		self.assertEqual(self.game.layer_changes[LAYER_TRAPS], [(pygame.Rect(0, 0, 100, 100), False)])
+
+	def test_changes_merged_past_limit(self):
+		for i in range(GameSurface.max_layer_changes + 1):
+			self.game.layer_change(LAYER_TREASURES, pygame.Rect(i * 20, 0, 10, 10), True)
+		self.assertEqual(self.game.layer_changes[LAYER_TREASURES], [(pygame.Rect(0, 0, GameSurface.max_layer_changes * 20 + 10, 10), True)])
+
+	def test_pending_changes_bounded_without_drawing(self):
+		# stepping for a minute without ever drawing, like the headless runner or a paused game
+		for i in range(3600):
+			self.level.step(1.0 / 60)
+		for layer, count in self.pending().items():
+			self.assertLessEqual(count, GameSurface.max_layer_changes)
+
+	def test_drawing_clears_changes(self):
+		self.game.layer_change(LAYER_TRAPS, pygame.Rect(0, 0, 100, 100))
+		self.game.refresh_layers()
+		self.assertEqual(sum(self.pending().values()), 0)
+
+	def test_new_score_redraws_treasure(self):
+		self.level.step(1.0 / 60)
+		self.game.refresh_layers()
+		self.assertEqual(sum(self.pending().values()), 0)
+		treasure = self.game.treasures[0]
+		treasure.set_score(1000)
+		self.assertTrue([rect for rect, ambient in self.game.layer_changes[LAYER_TREASURES] if rect.contains(treasure.rect)])
+
+if __name__ == "__main__":
+	unittest.main()
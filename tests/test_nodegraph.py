@@ -0,0 +1,67 @@
+import unittest
+import random
+from misc.path.astar import NodeGraph, GridGraph
+
+class GridGraphTest(unittest.TestCase):
+
+	def setUp(self):
+		self.graph = GridGraph(4, 3, 20)
+
+	def test_nodes_numbered_by_column(self):
+		self.assertEqual(len(self.graph), 12)
+		for node in self.graph:
+			self.assertEqual(node.id, node.x * 3 + node.y)
+			self.assertEqual((node.xpos, node.ypos), (node.x * 20, node.y * 20))
+
+	def test_neighbours_and_costs(self):
+		for node in self.graph:
+			adjacent = self.graph[node]
+			costs = self.graph.costs[self.graph.offsets[node.id]:self.graph.offsets[node.id + 1]]
+			self.assertEqual(len(adjacent), len(costs))
+			for other, cost in zip(adjacent, costs):
+				self.assertEqual(max(abs(node.x - other.x), abs(node.y - other.y)), 1)
+				self.assertEqual(cost, node.move_cost(other))
+		# corners, edges and the middle
+		self.assertEqual(len(self.graph[self.graph.nodes[0]]), 3)
+		self.assertEqual(len(self.graph[self.graph.nodes[1]]), 5)
+		self.assertEqual(len(self.graph[self.graph.nodes[4]]), 8)
+
+	def test_undirected(self):
+		for node in self.graph:
+			for other in self.graph[node]:
+				self.assertIn(node, self.graph[other])
+
+class NearestNodeTest(unittest.TestCase):
+
+	def setUp(self):
+		self.nodegraph = NodeGraph(None, 20, 31, 41)
+
+	def brute_force(self, x, y):
+		# the nearest node in each direction, halfway between two goes to the higher one like rounding
+		return min(self.nodegraph.graph, key=lambda node: (abs(node.xpos - x), abs(node.ypos - y), -node.x, -node.y))
+
+	def test_snaps_to_nearest(self):
+		self.assertIs(self.nodegraph.find_closest_node(0, 0), self.nodegraph.nodes[0][0])
+		self.assertIs(self.nodegraph.find_closest_node(29, 31), self.nodegraph.nodes[1][2])
+		self.assertIs(self.nodegraph.find_closest_node(30, 30), self.nodegraph.nodes[2][2])
+
+	def test_off_map_clamped_to_edge(self):
+		self.assertIs(self.nodegraph.find_closest_node(-50, 1000), self.nodegraph.nodes[0][40])
+		self.assertIs(self.nodegraph.find_closest_node(1000, -5), self.nodegraph.nodes[30][0])
+
+	def test_matches_brute_force(self):
+		rng = random.Random(3)
+		coords = [(rng.uniform(-30, 630), rng.uniform(-30, 830)) for i in range(200)]
+		for x, y in coords:
+			nearest = self.nodegraph.find_closest_node(x, y)
+			expected = self.brute_force(min(max(x, 0), 600), min(max(y, 0), 800))
+			self.assertEqual((nearest.x, nearest.y), (expected.x, expected.y))
+
+	def test_batch_matches_single(self):
+		rng = random.Random(4)
+		coords = [(rng.uniform(-30, 630), rng.uniform(-30, 830)) for i in range(200)] + [(10, 10), (30, 50)]
+		ids = self.nodegraph.find_closest_nodes(coords)
+		self.assertEqual(ids, [self.nodegraph.find_closest_node(x, y).id for x, y in coords])
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+import pygame
+from misc.path.occupancy import OccupancyGrid
+
+class OccupancyGridTest(unittest.TestCase):
+
+	def setUp(self):
+		self.grid = OccupancyGrid(10, 10, spacing=20)
+
+	def test_cells_for_rect_strict_edges(self):
+		# a node on the rect's edge isn't covered, like pygame.Rect.colliderect
+		self.assertEqual(self.grid.cells_for_rect(pygame.Rect(20, 20, 40, 40)), [2 * 10 + 2])
+		self.assertEqual(self.grid.cells_for_rect(pygame.Rect(10, 10, 20, 20)), [1 * 10 + 1])
+
+	def test_footprint_dilates(self):
+		self.grid.footprint = (40, 40)
+		cells = self.grid.cells_for_rect(pygame.Rect(30, 30, 20, 20))
+		self.assertEqual(sorted(cells), sorted(x * 10 + y for x in (1, 2, 3) for y in (1, 2, 3)))
+
+	def test_cells_clipped_to_grid(self):
+		cells = self.grid.cells_for_rect(pygame.Rect(-100, -100, 130, 130))
+		self.assertEqual(sorted(cells), [0, 1, 10, 11])
+
+	def test_add_and_remove_report_changes(self):
+		rect = pygame.Rect(10, 10, 20, 20)
+		self.assertEqual(self.grid.add_rect(rect), [11])
+		self.assertTrue(self.grid.is_blocked(11))
+		# a second obstacle over the same node doesn't change its state
+		self.assertEqual(self.grid.add_rect(rect), [])
+		self.assertEqual(self.grid.remove_rect(rect), [])
+		self.assertTrue(self.grid.is_blocked(11))
+		self.assertEqual(self.grid.remove_rect(rect), [11])
+		self.assertFalse(self.grid.is_blocked(11))
+
+	def test_counts_past_a_byte(self):
+		rect = pygame.Rect(10, 10, 20, 20)
+		for i in range(300):
+			self.grid.add_rect(rect)
+		self.assertEqual(self.grid.cells[11], 300)
+		for i in range(299):
+			self.assertEqual(self.grid.remove_rect(rect), [])
+		self.assertTrue(self.grid.is_blocked(11))
+		self.assertEqual(self.grid.remove_rect(rect), [11])
+
+	def test_rebuild_with_footprint(self):
+		rect = pygame.Rect(30, 30, 20, 20)
+		self.grid.add_rect(rect)
+		self.grid.add_rect(rect)
+		self.grid.rebuild([rect], (40, 40))
+		self.assertEqual(self.grid.footprint, (40, 40))
+		self.assertEqual(sum(self.grid.cells), 9)
+		self.assertEqual(len(self.grid.cells), 100)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+import random
+from itertools import permutations
+from misc.path.route import RoutePlanner, INFINITY
+from tests.paths import grid, wall
+
+class Treasure(object):
+
+	# the parts of a treasure the planner uses
+	def __init__(self, node, score):
+		self.node = node
+		self.score = score
+
+class RoutePlannerTest(unittest.TestCase):
+
+	def setUp(self):
+		self.astar = grid()
+		self.nodes = self.astar.nodes
+		self.planner = RoutePlanner(self.astar)
+
+	def node(self, x, y):
+		return self.nodes[x * 20 + y]
+
+	def cost(self, path):
+		return sum(a.move_cost(b) for a, b in zip(path, path[1:]))
+
+	def test_distances_match_searches(self):
+		self.astar.add_obstacle(wall(10, 3, 17))
+		treasure = Treasure(self.node(15, 10), 100)
+		self.planner.sync([treasure])
+		rng = random.Random(2)
+		for node in rng.sample(self.nodes, 40):
+			path = self.astar._search(node, treasure.node)
+			self.assertEqual(self.planner.distance(node, treasure), self.cost(path) if path is not None else INFINITY)
+
+	def test_sync_searches_only_new_treasures(self):
+		first, second = Treasure(self.node(5, 5), 10), Treasure(self.node(15, 15), 10)
+		self.planner.sync([first])
+		self.planner.sync([first, second])
+		self.assertEqual(self.planner.searches, 2)
+		self.planner.sync([second])
+		self.assertEqual(list(self.planner.fields), [second])
+		self.assertEqual(self.planner.searches, 2)
+
+	def test_obstacle_change_refreshes_distances(self):
+		treasure = Treasure(self.node(15, 10), 10)
+		start = self.node(5, 10)
+		self.planner.sync([treasure])
+		self.assertEqual(self.planner.distance(start, treasure), 100)
+		self.astar.add_obstacle(wall(10, 3, 17))
+		self.planner.sync([treasure])
+		self.assertEqual(self.planner.searches, 2)
+		self.assertEqual(self.planner.distance(start, treasure), self.cost(self.astar._search(start, treasure.node)))
+
+	def test_exact_plan_is_best_tour(self):
+		rng = random.Random(3)
+		treasures = [Treasure(rng.choice(self.nodes), rng.randint(1, 10) * 100) for i in range(5)]
+		start = self.node(0, 0)
+		tour = self.planner.plan(start, treasures)
+		self.assertEqual(sorted(tour), sorted(treasures))
+		best = max(self.planner.value(start, other) for other in permutations(treasures))
+		self.assertEqual(self.planner.value(start, tour), best)
+
+	def test_unreachable_treasures_left_out(self):
+		self.astar.add_obstacle(wall(10, 0, 19))
+		near, far = Treasure(self.node(5, 5), 10), Treasure(self.node(15, 5), 1000)
+		self.assertEqual(self.planner.plan(self.node(0, 0), [near, far]), [near])
+
+	def test_greedy_plan_visits_everything(self):
+		rng = random.Random(4)
+		treasures = [Treasure(rng.choice(self.nodes), rng.randint(1, 10) * 100) for i in range(10)]
+		start = self.node(0, 0)
+		tour = self.planner.plan(start, treasures)
+		self.assertEqual(sorted(tour), sorted(treasures))
+		# swapping any two stops doesn't improve it
+		value = self.planner.value(start, tour)
+		for i in range(len(tour) - 1):
+			for j in range(i + 1, len(tour)):
+				swapped = list(tour)
+				swapped[i], swapped[j] = swapped[j], swapped[i]
+				self.assertLessEqual(self.planner.value(start, swapped), value)
+
+if __name__ == "__main__":
+	unittest.main()
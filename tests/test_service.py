@@ -0,0 +1,86 @@
+import unittest
+from misc.path.service import PathfindingService, WorkerPool
+from tests.paths import grid, wall, PathAssertions
+
+class PathfindingServiceTest(PathAssertions, unittest.TestCase):
+
+	def setUp(self):
+		self.astar = grid()
+		self.nodes = self.astar.nodes
+		self.start, self.end = self.nodes[2 * 20 + 10], self.nodes[17 * 20 + 10]
+
+	def test_inline_search(self):
+		service = PathfindingService(self.astar, 0)
+		future = service.submit(self.start, self.end, None)
+		self.assertTrue(future.done())
+		self.assertValidPath(self.astar, future.result(), self.start, self.end)
+		self.assertIsNone(service.pool)
+		# the second request is served from the cache
+		service.submit(self.start, self.end, None)
+		self.assertEqual(self.astar.cache_stats()["hits"], 1)
+
+	def test_hierarchical_inline_search(self):
+		service = PathfindingService(self.astar, 0, 5)
+		self.astar.add_obstacle(wall(10, 3, 17))
+		self.assertValidPath(self.astar, service.submit(self.start, self.end, None).result(), self.start, self.end)
+
+class WorkerPoolTest(PathAssertions, unittest.TestCase):
+
+	def setUp(self):
+		self.astar = grid()
+		self.nodes = self.astar.nodes
+		self.start, self.end = self.nodes[2 * 20 + 10], self.nodes[17 * 20 + 10]
+		WorkerPool().start(2, len(self.astar.occupancy.cells))
+		self.pool = WorkerPool().pool
+
+	def tearDown(self):
+		WorkerPool().stop()
+
+	def test_searched_by_workers(self):
+		service = PathfindingService(self.astar)
+		self.assertIs(service.pool, WorkerPool())
+		self.assertEqual(len(service.submit(self.start, self.end, None).result()), 16)
+		# the workers share the grid, so they see obstacles added after they started
+		self.astar.add_obstacle(wall(10, 3, 17))
+		path = service.submit(self.start, self.end, None).result()
+		self.assertValidPath(self.astar, path, self.start, self.end)
+		self.assertGreater(len(path), 16)
+
+	def test_started_once(self):
+		WorkerPool().start(2, 10)
+		self.assertIs(WorkerPool().pool, self.pool)
+		self.assertEqual(len(WorkerPool().cells), 400)
+
+	def test_kept_for_the_next_level(self):
+		first = PathfindingService(self.astar, None, 5)
+		self.astar.add_obstacle(wall(10, 3, 17))
+		self.assertGreater(len(first.submit(self.start, self.end, None).result()), 16)
+		first.close()
+		# the grid the first service had keeps its obstacles once it lets go of the pool
+		self.assertTrue(self.astar.occupancy.is_blocked(10 * 20 + 10))
+		self.assertIsNot(self.astar.occupancy.cells, WorkerPool().cells)
+		astar = grid()
+		second = PathfindingService(astar, None, 5)
+		self.assertIs(WorkerPool().pool, self.pool)
+		# the shared cells hold the new grid, and the workers' hierarchical search is rebuilt
+		path = second.submit(astar.nodes[self.start.id], astar.nodes[self.end.id], None).result()
+		self.assertEqual(len(path), 16)
+		self.assertIs(path[0], astar.nodes[self.start.id])
+
+	def test_replaced_service_searches_inline(self):
+		first = PathfindingService(self.astar)
+		second = PathfindingService(grid())
+		self.assertTrue(first.submit(self.start, self.end, None).done())
+		self.assertIs(WorkerPool().owner, second)
+		# closing the replaced service leaves the pool with the new one
+		first.close()
+		self.assertIs(WorkerPool().owner, second)
+
+	def test_inline_without_workers(self):
+		self.assertIsNone(PathfindingService(self.astar, 0).pool)
+		self.assertIsNone(PathfindingService(grid(10, 10)).pool)
+		WorkerPool().stop()
+		self.assertIsNone(PathfindingService(self.astar).pool)
+
+if __name__ == "__main__":
+	unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+import random
+import pygame
+from misc.path.smoothing import PathSmoother
+from tests.paths import grid, wall
+
+class PathSmootherTest(unittest.TestCase):
+
+	def setUp(self):
+		self.astar = grid()
+		self.nodes = self.astar.nodes
+		self.smoother = PathSmoother(self.astar)
+
+	def node(self, x, y):
+		return self.nodes[x * 20 + y]
+
+	def test_straight_path_keeps_ends(self):
+		start, end = self.node(2, 10), self.node(17, 10)
+		smoothed = self.smoother.smooth(self.astar._search(start, end))
+		self.assertEqual(smoothed, [start, end])
+		self.assertEqual(self.smoother.last, (16, 2))
+
+	def test_short_paths_unchanged(self):
+		path = [self.node(0, 0), self.node(1, 1)]
+		self.assertEqual(self.smoother.smooth(path), path)
+		self.assertIsNone(self.smoother.smooth(None))
+
+	def test_line_of_sight(self):
+		self.astar.add_obstacle(wall(10, 8, 12))
+		self.assertFalse(self.smoother.line_of_sight(self.node(2, 10), self.node(17, 10)))
+		self.assertTrue(self.smoother.line_of_sight(self.node(2, 2), self.node(17, 2)))
+		# the end itself can be blocked
+		self.assertTrue(self.smoother.line_of_sight(self.node(2, 10), self.node(10, 10)))
+
+	def test_smoothed_path_around_obstacle_is_clear(self):
+		self.astar.add_obstacle(wall(10, 3, 17))
+		path = self.astar._search(self.node(2, 10), self.node(17, 10))
+		smoothed = self.smoother.smooth(path)
+		self.assertLess(len(smoothed), len(path))
+		self.assertIs(smoothed[0], path[0])
+		self.assertIs(smoothed[-1], path[-1])
+		# every waypoint is on the path, in order
+		positions = [path.index(node) for node in smoothed]
+		self.assertEqual(positions, sorted(positions))
+		for a, b in zip(smoothed, smoothed[1:]):
+			self.assertTrue(self.smoother.segment_clear(a, b))
+
+	def test_is_clear_after_obstacle_change(self):
+		path = self.smoother.smooth(self.astar._search(self.node(2, 10), self.node(17, 10)))
+		self.assertTrue(self.smoother.is_clear(path))
+		obstacle = wall(10, 8, 12)
+		self.astar.add_obstacle(obstacle)
+		self.assertFalse(self.smoother.is_clear(path))
+		self.astar.remove_obstacle(obstacle)
+		self.assertTrue(self.smoother.is_clear(path))
+
+	def test_random_obstacles(self):
+		rng = random.Random(6)
+		for i in range(15):
+			self.astar.add_obstacle(pygame.Rect(rng.randint(0, 360), rng.randint(0, 360), rng.randint(10, 50), rng.randint(10, 50)))
+		free = [node for node in self.nodes if not self.astar.occupancy.is_blocked(node.id)]
+		for i in range(30):
+			path = self.astar._search(rng.choice(free), rng.choice(free))
+			if path is None:
+				continue
+			smoothed = self.smoother.smooth(path)
+			self.assertTrue(self.smoother.is_clear(smoothed))
+			self.assertLessEqual(len(smoothed), len(path))
+
+if __name__ == "__main__":
+	unittest.main()